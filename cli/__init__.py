@@ -1,3 +1,5 @@
 from .menu import Menu
+from .control_server import ControlServer
+from .remote_menu import RemoteMenu
 
-__all__ = ['Menu']
\ No newline at end of file
+__all__ = ['Menu', 'ControlServer', 'RemoteMenu']
\ No newline at end of file
@@ -0,0 +1,242 @@
+import asyncio
+import sys
+import threading
+
+
+class ControlServer:
+    """
+    Non-blocking control plane: a local socket protocol plus the terminal UI
+
+    Runs an asyncio loop on its own thread. Every client (the terminal, TCP
+    or Unix-socket connections from scripts and foot controllers) sends one
+    Menu command per line and gets the reply back. Commands that arrive
+    together are batched into a single control-queue submission, so the
+    audio thread applies them all at the top of its next block.
+
+    Blocking replies (file I/O, process starts) run on a worker thread
+    without holding up the dispatcher: other clients keep being served,
+    while the same client's later lines are held back until they are done,
+    so each client's commands still apply in the order it sent them.
+
+    Protocol extras on top of the menu commands:
+        subscribe / unsubscribe  stream "STATUS ..." lines at a capped rate
+        bye                      close this connection
+    An empty line (or "loop") is the looper button, as in the terminal menu.
+    """
+
+    def __init__(self, menu, host="127.0.0.1", port=7777, unix_path=None,
+                 status_rate_hz=10.0, terminal=True):
+        self.menu = menu
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.status_interval = 1.0 / max(0.1, status_rate_hz)
+        self.terminal = terminal
+        self.status_sources = []  # Extra callables returning "key=value" text
+        self._inbox = None
+        self._loop = None
+        self._held = {}       # Client -> lines waiting on its blocking replies
+        self._released = []   # Clients whose blocking replies are done
+        self._replying = set()  # Clients with blocking replies running
+        self._reply_tasks = set()
+
+    def start_thread(self):
+        threading.Thread(target=lambda: asyncio.run(self.serve()), daemon=True).start()
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._inbox = asyncio.Queue()
+        tasks = [asyncio.create_task(self._dispatcher())]
+
+        servers = []
+        if self.port is not None:
+            servers.append(await asyncio.start_server(self._client, self.host, self.port))
+        if self.unix_path is not None:
+            servers.append(await asyncio.start_unix_server(self._client, path=self.unix_path))
+        if self.terminal:
+            tasks.append(asyncio.create_task(self._terminal()))
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for server in servers:
+                server.close()
+
+    async def submit(self, line, client=None):
+        """Queue one command line, resolves to its reply text"""
+        return await self.enqueue(line, client)
+
+    def enqueue(self, line, client=None):
+        """Queue one command line without waiting, returns the reply future"""
+        reply = self._loop.create_future()
+        self._inbox.put_nowait((line, reply, client))
+        return reply
+
+    async def _dispatcher(self):
+        while True:
+            batch = [await self._inbox.get()]
+            while not self._inbox.empty():
+                batch.append(self._inbox.get_nowait())
+            # Lines held for clients whose blocking replies have finished go
+            # first, they were sent before anything of theirs in this batch
+            released = []
+            while self._released:
+                released.extend(self._held.pop(self._released.pop(0)))
+            batch = released + [item for item in batch if item[0] is not None]
+            try:
+                await self._dispatch(batch)
+            except Exception as e:
+                # A bad batch answers with the error; the server keeps serving
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_result(f"Error: {e}")
+                # and holds nothing back for blocking replies that never started
+                for client in self._held:
+                    if client not in self._replying and client not in self._released:
+                        self._released.append(client)
+                        self._inbox.put_nowait((None, None, None))
+
+    async def _dispatch(self, batch):
+        menu = self.menu
+        # Parse in order; a mode switch changes how later lines parse,
+        # so the batch is applied up to it before parsing further
+        items = []
+        for line, future, client in batch:
+            if client in self._held:
+                self._held[client].append((line, future, client))
+                continue
+            command = menu.parse(line)
+            items.append((command, future, client))
+            if command.blocking:
+                self._held[client] = []
+            if command.barrier:
+                await self._apply(items)
+                items = []
+        await self._apply(items)
+
+    async def _apply(self, items):
+        if not items:
+            return
+        actions = [command.action for command, _, _ in items if command.action is not None]
+        results = []
+        if actions:
+            control = self.menu.control
+            if control is None:
+                results = [action() for action in actions]
+            else:
+                results = await control.wait_async(control.submit(actions))
+        results = iter(results)
+        blocking = {}
+        for command, future, client in items:
+            result = next(results) if command.action is not None else None
+            if command.blocking:
+                blocking.setdefault(client, []).append((command, result, future))
+            elif not future.done():
+                future.set_result(self.menu.reply(command, result))
+        for client, pending in blocking.items():
+            self._replying.add(client)
+            task = asyncio.create_task(self._blocking_replies(client, pending))
+            self._reply_tasks.add(task)
+            task.add_done_callback(self._reply_tasks.discard)
+
+    async def _blocking_replies(self, client, pending):
+        """One client's blocking replies, on a worker thread; then release its held lines"""
+        try:
+            for command, result, future in pending:
+                reply = await asyncio.to_thread(self.menu.reply, command, result)
+                if not future.done():
+                    future.set_result(reply)
+        finally:
+            self._replying.discard(client)
+            self._released.append(client)
+            self._inbox.put_nowait((None, None, None))  # Wake the dispatcher
+
+    def status_text(self):
+        parts = [self.menu.status_line()]
+        parts.extend(source() for source in self.status_sources)
+        return "STATUS " + " ".join(parts)
+
+    async def _stream_status(self, writer):
+        while True:
+            writer.write((self.status_text() + "\n").encode())
+            await writer.drain()
+            await asyncio.sleep(self.status_interval)
+
+    async def _write_replies(self, replies, writer):
+        # Replies go out in command order, while later lines are already queued
+        while True:
+            reply = await (await replies.get())
+            writer.write((reply.strip("\n") + "\n").encode())
+            await writer.drain()
+
+    async def _client(self, reader, writer):
+        status_task = None
+        client = object()  # Orders this connection's commands
+        replies = asyncio.Queue()
+        reply_task = asyncio.create_task(self._write_replies(replies, writer))
+        writer.write(b"guitar-fx ready\n")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                text = line.decode(errors="replace").strip()
+                if text == "bye":
+                    break
+                if text == "subscribe":
+                    if status_task is None:
+                        status_task = asyncio.create_task(self._stream_status(writer))
+                    continue
+                if text == "unsubscribe":
+                    if status_task is not None:
+                        status_task.cancel()
+                        status_task = None
+                    continue
+                # Don't wait for the reply: a burst of lines becomes one batch
+                replies.put_nowait(self.enqueue(text, client))
+        except ConnectionError:
+            pass
+        finally:
+            while not replies.empty():
+                await replies.get_nowait()
+            reply_task.cancel()
+            if status_task is not None:
+                status_task.cancel()
+            writer.close()
+
+    async def _terminal(self):
+        """The interactive menu, without blocking the loop on input()"""
+        print(self.menu.menu_text())
+        if self.port is not None:
+            print(f"(control server on {self.host}:{self.port})")
+        try:
+            reader = asyncio.StreamReader()
+            await self._loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+            )
+            read_line = reader.readline
+        except (NotImplementedError, ValueError, OSError):
+            # No pipe support for stdin here (e.g. Windows): read on a helper thread
+            read_line = self._threaded_readline()
+
+        while self.menu.running:
+            print("> ", end="", flush=True)
+            line = await read_line()
+            if not line:
+                break
+            if isinstance(line, bytes):
+                line = line.decode(errors="replace")
+            reply = await self.submit(line.strip())
+            if reply:
+                print(reply)
+
+    def _threaded_readline(self):
+        lines = asyncio.Queue()
+
+        def reader():
+            for line in sys.stdin:
+                self._loop.call_soon_threadsafe(lines.put_nowait, line)
+            self._loop.call_soon_threadsafe(lines.put_nowait, "")
+
+        threading.Thread(target=reader, daemon=True).start()
+        return lines.get
@@ -1,7 +1,28 @@
+import os
 import threading
+from config import LOOPER_FILE
+
+class Command:
+    """
+    One parsed menu command
+
+    `action` (or None) changes state the audio thread reads, so it is run
+    on the audio thread through the control queue. `reply(result)` runs
+    afterwards on the caller's side and returns the text to show.
+    `barrier` marks commands that change what later commands mean
+    (mode switches), so a batch is applied before parsing further.
+    `blocking` marks replies that do file I/O or start processes; the
+    control server runs those on a worker thread, not its event loop.
+    """
+
+    def __init__(self, reply, action=None, barrier=False, blocking=False):
+        self.reply = reply
+        self.action = action
+        self.barrier = barrier
+        self.blocking = blocking
 
 class Menu:
-    def __init__(self, effects, effect_chain, looper, on_quit_callback):
+    def __init__(self, effects, effect_chain, looper, on_quit_callback, presets=None, parameters=None, control=None, meter=None, recorder=None, tuner=None, pipeline=None):
         self.effects = effects
         self.effect_chain = effect_chain
         self.looper = looper
@@ -9,114 +30,313 @@ class Menu:
         self.running = True
         self.on_quit = on_quit_callback
         self.chain_mode = False
-    
+        self.presets = presets
+        self.preset_mode = False
+        self.parameters = parameters
+        self.control = control
+        self.meter = meter
+        self.recorder = recorder
+        self.tuner = tuner
+        self.pipeline = pipeline
+
     def get_current_effect(self):
+        if self.preset_mode:
+            return self.presets.switcher
         if self.chain_mode:
+            if self.pipeline is not None and self.pipeline.running:
+                return self.pipeline
             return self.effect_chain
         return self.effects[self.current_effect_idx]
-    
-    def display_menu(self):
-        print("\n" + "="*50)
-        print(" Guitar FX Menu")
-        print("="*50)
-        
+
+    def menu_text(self):
+        lines = ["\n" + "="*50, " Guitar FX Menu", "="*50]
+
         # Always show looper status
-        print(f"\n[LOOPER: {self.looper.get_status()}]")
-        
-        if not self.chain_mode:
-            print("\n[SINGLE EFFECT MODE]")
-            print("\nEffects:")
+        lines.append(f"\n[LOOPER: {self.looper.get_status()}]")
+
+        if self.preset_mode:
+            lines.append("\n[PRESET MODE]")
+            lines.append(f"\n{self.presets.status}")
+            lines.append("\nPresets:")
+            for i, path in enumerate(self.presets.presets(), 1):
+                lines.append(f"    {i}. {os.path.splitext(os.path.basename(path))[0]}")
+            lines.append("\nCommands:")
+            lines.append("  1-9    : Load preset")
+            lines.append("  s      : Switch to Single Mode")
+            lines.append("  c      : Switch to Chain Mode")
+        elif not self.chain_mode:
+            lines.append("\n[SINGLE EFFECT MODE]")
+            lines.append("\nEffects:")
             for i, effect in enumerate(self.effects, 1):
                 marker = "→" if i-1 == self.current_effect_idx else " "
-                print(f"  {marker} {i}. {effect.name}")
-            print("\nCommands:")
-            print("  1-9    : Select effect")
-            print("  c      : Switch to Chain Mode")
+                lines.append(f"  {marker} {i}. {effect.name}")
+            lines.append("\nCommands:")
+            lines.append("  1-9    : Select effect")
+            lines.append("  c      : Switch to Chain Mode")
+            if self.presets is not None:
+                lines.append("  p      : Switch to Preset Mode")
+        else:
+            lines.append("\n[CHAIN MODE - Multiple Effects]")
+            lines.append("\nEffect Chain:")
+            lines.append(self.effect_chain.get_status_display())
+            lines.append("\nCommands:")
+            lines.append("  1-9    : Toggle effect on/off")
+            lines.append("  s      : Switch to Single Mode")
+            lines.append("  r      : Reset all effects")
+            if self.pipeline is not None:
+                lines.append(f"  pipe   : Run the active effects as a multi-core pipeline [{'ON' if self.pipeline.running else 'OFF'}]")
+            if self.presets is not None:
+                lines.append("  p      : Switch to Preset Mode")
+
+        if self.parameters is not None:
+            lines.append("\nParameters:")
+            lines.append("  params           : List parameters")
+            lines.append("  set <name> <val> : Glide a parameter, e.g. set Tremolo.depth 0.8")
+
+        if self.meter is not None:
+            lines.append("\nMeters:")
+            lines.append("  meter            : Show output levels (and 'analyze' tap)")
+
+        if self.recorder is not None:
+            lines.append("\nRecorder:")
+            lines.append(f"  rec              : Start/stop recording dry, wet and output tracks [{self.recorder.status}]")
+
+        if self.tuner is not None:
+            lines.append("\nTuner:")
+            lines.append(f"  tune             : Tuner on/off, mutes the output [{'ON' if self.tuner.enabled else 'OFF'}]")
+            lines.append("  note             : Show the note being played")
+            if self.tuner.enabled:
+                lines.append(self.tuner.display())
+
+        lines.append("\nLooper Controls:")
+        lines.append("  SPACE  : Toggle recording/playback (just press Enter)")
+        lines.append("  d      : Start/stop overdub")
+        lines.append("  u      : Undo last overdub layer")
+        lines.append("  m1-m9  : Mute/unmute overdub layer")
+        lines.append("  x      : Clear loop")
+        lines.append(f"  w      : Save loop to {LOOPER_FILE}")
+        lines.append(f"  o      : Open loop from {LOOPER_FILE}")
+        lines.append("  h      : Show this menu")
+        lines.append("  q      : Quit")
+        lines.append("="*50)
+        return "\n".join(lines)
+
+    def display_menu(self):
+        print(self.menu_text())
+
+    def status_line(self):
+        """One-line status for clients that stream it"""
+        if self.preset_mode:
+            mode = "PRESET"
+        elif self.chain_mode:
+            mode = "CHAIN"
+        else:
+            mode = "SINGLE"
+        line = f"mode={mode} effect={self.get_current_effect().name} looper={self.looper.get_status()}"
+        if self.chain_mode and self.pipeline is not None and self.pipeline.running:
+            line += f" pipeline_late={self.pipeline.underruns}"
+        if self.tuner is not None and self.tuner.enabled:
+            line += " " + (self.tuner.status_text() or "tuner.hz=-")
+        if self.recorder is not None and self.recorder.recording:
+            line += f" rec={self.recorder.frames_written / self.recorder.sample_rate:.0f}s dropped={self.recorder.overflows}"
+        return line
+
+    # --- State changes, run on the audio thread ---
+
+    def _select_effect(self, idx):
+        self.current_effect_idx = idx
+
+    def _set_mode(self, chain_mode, preset_mode):
+        self.chain_mode = chain_mode
+        self.preset_mode = preset_mode
+
+    def _looper_button(self):
+        if not self.looper.is_recording and self.looper.loop_length == 0:
+            # Start recording if no loop exists
+            return self.looper.start_recording()
+        elif self.looper.is_recording:
+            # Stop recording and start playback
+            return self.looper.stop_recording()
+        # Toggle playback if loop exists
+        return self.looper.toggle_playback()
+
+    def _on_audio_thread(self, action):
+        """Run one action on the audio thread and wait for its result (not from the audio thread)"""
+        if self.control is None:
+            return action()
+        result = self.control.wait(self.control.submit([action]))[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _quit(self):
+        self.running = False
+        self.on_quit()
+        return "\nExiting…"
+
+    def parse(self, choice):
+        """Turn one command line into a Command"""
+        looper_reply = lambda msg: f"\n♪ {msg}"
+
+        if choice.isdigit():
+            idx = int(choice) - 1
+
+            if self.preset_mode:
+                # Preset mode - prepared in the background, swapped in by the audio thread
+                paths = self.presets.presets()
+                if 0 <= idx < len(paths):
+                    def load_preset(_):
+                        self.presets.request(paths[idx])
+                        return f"\n✓ {self.presets.status}"
+                    return Command(load_preset, blocking=True)
+                return Command(lambda _: "Invalid preset number")
+            elif not self.chain_mode:
+                # Single effect mode - select effect
+                if 0 <= idx < len(self.effects):
+                    return Command(lambda _: f"\n✓ {self.effects[idx].name} enabled",
+                                   action=lambda: self._select_effect(idx))
+                return Command(lambda _: "Invalid effect number")
+            else:
+                # Chain mode - toggle effect
+                def toggled(ok):
+                    if not ok:
+                        return "Invalid effect number"
+                    status = "ON" if self.effect_chain.is_active(idx) else "OFF"
+                    return f"\n✓ {self.effect_chain.effects[idx].name} toggled {status}"
+                return Command(toggled, action=lambda: self.effect_chain.toggle_effect(idx))
+
+        elif choice == "p" and self.presets is not None and not self.preset_mode:
+            return Command(lambda _: self.menu_text() + "\n\n✓ Switched to Preset Mode",
+                           action=lambda: self._set_mode(False, True), barrier=True)
+
+        elif choice == "c" and (self.preset_mode or not self.chain_mode):
+            return Command(lambda _: self.menu_text() + "\n\n✓ Switched to Chain Mode",
+                           action=lambda: self._set_mode(True, False), barrier=True)
+
+        elif choice == "s" and (self.preset_mode or self.chain_mode):
+            return Command(lambda _: self.menu_text() + "\n\n✓ Switched to Single Effect Mode",
+                           action=lambda: self._set_mode(False, False), barrier=True)
+
+        elif choice == "pipe" and self.chain_mode and self.pipeline is not None:
+            # Measuring and launching stages happens here; the callback follows `running`
+            def toggle_pipeline(_):
+                if self.pipeline.running:
+                    return f"\n✓ {self.pipeline.stop()}"
+                return f"\n✓ {self.pipeline.start()} (toggle 'pipe' again after changing effects to re-split)"
+            return Command(toggle_pipeline, blocking=True)
+
+        elif choice == "r" and self.chain_mode:
+            return Command(lambda _: "\n✓ All effects reset", action=self.effect_chain.reset)
+
+        # Looper controls - SPACEBAR (empty string = just pressing Enter)
+        elif choice in ("", "loop"):
+            return Command(looper_reply, action=self._looper_button)
+
+        elif choice == "x":
+            return Command(looper_reply, action=self.looper.clear_loop)
+
+        elif choice == "params" and self.parameters is not None:
+            return Command(lambda _: "\n" + "\n".join(f"  {line}" for line in self.parameters.describe()))
+
+        elif choice.startswith("set ") and self.parameters is not None:
+            # Parameters glide on their own; set() publishes the whole ramp at once,
+            # so setting a target is safe from any thread
+            def set_parameter(_):
+                parts = choice.split()
+                try:
+                    value = self.parameters.set(parts[1], float(parts[2]))
+                    return f"\n✓ {parts[1]} → {value:g}"
+                except (IndexError, KeyError, ValueError):
+                    return "Usage: set <Effect.param> <value> (see 'params')"
+            return Command(set_parameter)
+
+        # Layer edits refuse to run while the audio thread may be committing a
+        # chunk; they are switched on the audio thread, and undo and mute
+        # rewrite the mixdown there a few chunks per block. Starting an
+        # overdub may copy a loaded loop first, so it replies off the event loop
+        elif choice == "d":
+            return Command(lambda _: looper_reply(self.looper.toggle_overdub(self._on_audio_thread)),
+                           blocking=True)
+
+        elif choice == "u":
+            return Command(looper_reply, action=self.looper.undo_layer)
+
+        elif choice.startswith("m") and choice[1:].isdigit():
+            index = int(choice[1:]) - 1
+            return Command(looper_reply, action=lambda: self.looper.toggle_layer_mute(index))
+
+        # Loop files are read and written on a worker thread; a load stops and
+        # restarts the looper through the control queue
+        elif choice == "w":
+            return Command(lambda _: looper_reply(self.looper.save_loop(LOOPER_FILE)), blocking=True)
+
+        elif choice == "o":
+            return Command(lambda _: looper_reply(self.looper.load_loop(LOOPER_FILE, self._on_audio_thread)),
+                           blocking=True)
+
+        elif choice in ("h", "menu"):
+            return Command(lambda _: self.menu_text())
+
+        elif choice == "meter" and self.meter is not None:
+            return Command(lambda _: "\n" + self.meter.display())
+
+        elif choice == "rec" and self.recorder is not None:
+            # Opening/closing files happens here, the audio thread only sees the flag
+            return Command(lambda _: f"\n● {self.recorder.toggle()}", blocking=True)
+
+        elif choice == "tune" and self.tuner is not None:
+            # The callback reads the flag, nothing to hand over
+            return Command(lambda _: f"\n♫ {self.tuner.toggle()}")
+
+        elif choice == "note" and self.tuner is not None:
+            return Command(lambda _: "\n" + self.tuner.display())
+
+        elif choice == "status":
+            return Command(lambda _: self.status_line())
+
+        elif choice == "q":
+            return Command(lambda _: self._quit())
+
+        return Command(lambda _: "Unknown command")
+
+    def apply(self, commands):
+        """Apply a batch of commands in one audio block, returns their replies"""
+        actions = [command.action for command in commands if command.action is not None]
+        if not actions:
+            results = []
+        elif self.control is None:
+            results = [action() for action in actions]
         else:
-            print("\n[CHAIN MODE - Multiple Effects]")
-            print("\nEffect Chain:")
-            print(self.effect_chain.get_status_display())
-            print("\nCommands:")
-            print("  1-9    : Toggle effect on/off")
-            print("  s      : Switch to Single Mode")
-            print("  r      : Reset all effects")
-        
-        print("\nLooper Controls:")
-        print("  SPACE  : Toggle recording/playback (just press Enter)")
-        print("  x      : Clear loop")
-        print("  q      : Quit")
-        print("="*50)
-    
+            results = self.control.wait(self.control.submit(actions))
+        return self.replies(commands, results)
+
+    def replies(self, commands, results):
+        """Reply text for each command, given the results of their actions"""
+        results = iter(results)
+        return [self.reply(command, next(results) if command.action is not None else None)
+                for command in commands]
+
+    def reply(self, command, result):
+        """Reply text for one command; a failing action or reply becomes an error reply"""
+        if isinstance(result, Exception):
+            return f"Error: {result}"
+        try:
+            return command.reply(result)
+        except Exception as e:
+            return f"Error: {e}"
+
+    def execute(self, choice):
+        """Parse and apply a single command, returns its reply"""
+        return self.apply([self.parse(choice)])[0]
+
     def run(self):
+        """Plain blocking terminal menu (used when the control server is off)"""
         self.display_menu()
-        
+
         while self.running:
-            choice = input("> ").strip()
-            
-            if choice.isdigit():
-                idx = int(choice) - 1
-                
-                if not self.chain_mode:
-                    # Single effect mode - select effect
-                    if 0 <= idx < len(self.effects):
-                        self.current_effect_idx = idx
-                        self.display_menu()
-                        print(f"\n✓ {self.effects[idx].name} enabled")
-                    else:
-                        print("Invalid effect number")
-                else:
-                    # Chain mode - toggle effect
-                    if self.effect_chain.toggle_effect(idx):
-                        self.display_menu()
-                        status = "ON" if self.effect_chain.is_active(idx) else "OFF"
-                        print(f"\n✓ {self.effect_chain.effects[idx].name} toggled {status}")
-                    else:
-                        print("Invalid effect number")
-            
-            elif choice == "c" and not self.chain_mode:
-                self.chain_mode = True
-                self.display_menu()
-                print("\n✓ Switched to Chain Mode")
-            
-            elif choice == "s" and self.chain_mode:
-                self.chain_mode = False
-                self.display_menu()
-                print("\n✓ Switched to Single Effect Mode")
-            
-            elif choice == "r" and self.chain_mode:
-                self.effect_chain.reset()
-                print("\n✓ All effects reset")
-            
-            # Looper controls - SPACEBAR (empty string = just pressing Enter)
-            elif choice == "":
-                # Empty input = spacebar/enter pressed
-                if not self.looper.is_recording and self.looper.loop_length == 0:
-                    # Start recording if no loop exists
-                    msg = self.looper.start_recording()
-                    print(f"\n♪ {msg}")
-                elif self.looper.is_recording:
-                    # Stop recording and start playback
-                    msg = self.looper.stop_recording()
-                    self.display_menu()
-                    print(f"\n♪ {msg}")
-                else:
-                    # Toggle playback if loop exists
-                    msg = self.looper.toggle_playback()
-                    print(f"\n♪ {msg}")
-            
-            elif choice == "x":
-                msg = self.looper.clear_loop()
-                self.display_menu()
-                print(f"\n♪ {msg}")
-            
-            elif choice == "q":
-                print("\nExiting…")
-                self.running = False
-                self.on_quit()
-                break
-            
-            else:
-                print("Unknown command")
-    
+            reply = self.execute(input("> ").strip())
+            if reply:
+                print(reply)
+
     def start_thread(self):
-        threading.Thread(target=self.run, daemon=True).start()
\ No newline at end of file
+        threading.Thread(target=self.run, daemon=True).start()
@@ -0,0 +1,48 @@
+from .menu import Menu, Command
+
+
+class RemoteMenu(Menu):
+    """
+    The menu in the UI process, for a DSP engine running in its own process
+
+    Drop-in for Menu wherever the control server or the terminal loop
+    uses one. `set` and `params` work on the engine's shared parameter
+    block and `status` on its newest published status line, so the most
+    frequent commands never reach the DSP process. Every other line is run
+    there by the real Menu and its reply comes back.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.parameters = engine.parameters
+        self.control = None  # Nothing here is run on an audio thread
+        self.running = True
+        self._menu_text = None
+
+    def menu_text(self):
+        # Only changes with the mode, cached until a forwarded command may have switched it
+        if self._menu_text is None:
+            self._menu_text = self.engine.execute("h")
+        return self._menu_text
+
+    def status_line(self):
+        return self.engine.status_line()
+
+    def _forward(self, choice):
+        reply = self.engine.execute(choice)
+        self._menu_text = None
+        return reply
+
+    def _quit(self):
+        self.running = False
+        return self.engine.execute("q")
+
+    def parse(self, choice):
+        if choice in ("params", "status") or choice.startswith("set "):
+            return super().parse(choice)
+        # Everything below waits on the DSP process
+        if choice in ("h", "menu"):
+            return Command(lambda _: self.menu_text(), blocking=True)
+        if choice == "q":
+            return Command(lambda _: self._quit(), blocking=True)
+        return Command(lambda _: self._forward(choice), blocking=True)
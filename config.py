@@ -1,6 +1,18 @@
 #audio setup
 SAMPLE_RATE = 48000
 BUFFER_SIZE = 128
+#effects always run on blocks of this size, whatever the device delivers
+INTERNAL_BLOCK_SIZE = 128
+#grow/shrink the device block size from the measured callback load
+ADAPTIVE_BLOCKSIZE = False
+ADAPTIVE_BLOCK_SIZES = [128, 256, 512, 1024]
+#step effects down to cheaper quality tiers (fewer reverb combs, slower wah
+#sweeps...) when a callback comes close to its deadline, and back up once
+#the load has stayed low for a while. loads are fractions of the block period
+QUALITY_GOVERNOR = True
+GOVERNOR_DEGRADE_LOAD = 0.75
+GOVERNOR_RESTORE_LOAD = 0.4
+GOVERNOR_SETTLE_SECONDS = 5.0
 #input/output might change depending on the audio seutp
 #focusrite seems to be 0/0 on my mac
 #printing this will show you the devices available print(sd.query_devices())
@@ -16,4 +28,70 @@ DIST_GAIN = 20.0
 ECHO_DELAY_MS = 350
 ECHO_FEEDBACK = 0.35
 ECHO_MIX = 0.5
-ECHO_MAX_SECONDS = 2.0
\ No newline at end of file
+ECHO_MAX_SECONDS = 2.0
+
+#zero the feedback state of echoes, reverbs and filters once it is ~400 dB
+#down, before it turns into denormal floats that are very slow on x86
+DENORMAL_FLUSH = True
+
+#lookahead brickwall limiter on the final output, so nothing clips at the device
+LIMITER = True
+LIMITER_CEILING_DB = -0.3
+LIMITER_LOOKAHEAD_MS = 1.5
+LIMITER_HOLD_MS = 20.0
+
+#chain mode can run as a pipeline of stages on other cores ('pipe' in the
+#menu), for chains too heavy for one block period. adds DEPTH blocks of latency.
+#processes get around the GIL for per-sample python effects
+PIPELINE_STAGES = 2
+PIPELINE_DEPTH = 2
+PIPELINE_PROCESSES = False
+
+#effects run at 1/2 or 1/4 of SAMPLE_RATE; their wet signal is band limited to
+#~0.45 x the lower rate, the dry signal stays full rate. long delays and reverb
+#tails don't need the top octave
+RATE_DIVISORS = {"Echo": 2, "Reverb": 2}
+
+#convolution cabinet: path to an impulse response .wav (cab or room),
+#None uses a built-in synthetic 4x12 style response
+CAB_IR_PATH = None
+
+#looper storage: "ram" keeps the loop in memory, "memmap" spills it to a file
+#so loops can run for minutes without holding them all in RAM
+LOOPER_STORAGE = "ram"
+LOOPER_MAX_SECONDS = 30.0
+LOOPER_MEMMAP_MAX_SECONDS = 600.0
+LOOPER_FILE = "loop.npy"
+
+#presets: json files describing a chain, prepared off the audio thread
+PRESET_DIR = "presets"
+PRESET_CROSSFADE_MS = 20.0
+
+#tuner: pitch of the dry input, output muted while it is on
+TUNER_REFERENCE_HZ = 440.0
+TUNER_DECIMATION = 2
+
+#keep python's garbage collector out of the audio callback: freeze startup
+#objects, turn automatic gc off and collect between callbacks instead
+GC_SCHEDULED = True
+GC_FULL_INTERVAL = 30.0
+
+#level meters, computed on their own thread. spectrum adds octave bands
+METER_RATE_HZ = 10.0
+METER_SPECTRUM = False
+
+#session recorder: dry/wet/out tracks as float wav files, for reamping
+RECORD_DIR = "recordings"
+RECORDER_RING_SECONDS = 4.0
+
+#run the audio stream and effects in their own process, the menu/control
+#server stay in this one. UI work then can't hold the GIL the callback needs
+ENGINE_PROCESS = False
+
+#control server: local socket protocol + terminal UI, commands reach the
+#audio thread through its control queue. False = plain blocking input() menu
+CONTROL_SERVER = True
+CONTROL_HOST = "127.0.0.1"
+CONTROL_PORT = 7777
+CONTROL_UNIX_SOCKET = None
+STATUS_RATE_HZ = 10.0
\ No newline at end of file
@@ -6,11 +6,19 @@ from .echo import Echo
 from .wahwah import WahWah
 from .ultra_metal import UltraMetal
 from .effect_chain import EffectChain
+from .graph import EffectGraph
 from .tremolo import Tremolo
 from .flanger import Flanger
 from .reverb import Reverb
+from .fdn_reverb import FDNReverb
 from .looper import Looper
 from .pitch_bend import PitchBend
 from .learning_effects import LearningEffects
+from .convolution import Convolution
+from .pitch_shift import PitchShifter
+from .multirate import MultiRate
+from .limiter import Limiter
+from .harmonizer import Harmonizer
+from .parameters import Parameter, ParameterRegistry
 
-__all__ = ['Clean', 'GainBoost', 'LowPassFilter', 'Distortion', 'Echo', 'WahWah', 'UltraMetal', 'EffectChain', 'Tremolo', 'Flanger', 'Reverb', 'Looper', 'PitchBend', 'LearningEffects']
\ No newline at end of file
+__all__ = ['Clean', 'GainBoost', 'LowPassFilter', 'Distortion', 'Echo', 'WahWah', 'UltraMetal', 'EffectChain', 'EffectGraph', 'Tremolo', 'Flanger', 'Reverb', 'FDNReverb', 'Looper', 'PitchBend', 'LearningEffects', 'Convolution', 'PitchShifter', 'MultiRate', 'Limiter', 'Harmonizer', 'Parameter', 'ParameterRegistry']
\ No newline at end of file
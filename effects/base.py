@@ -1,7 +1,30 @@
 import numpy as np
 
 class Effect:
-    """Base class for all effects"""
+    """
+    Base class for all effects
+    
+    dtype policy: audio blocks are float32 in and out, and so is every
+    buffer that holds audio. float64 is for state that accumulates error
+    (phase accumulators, IIR filter state, running sums); list those
+    attributes in `float64_state`. Scalar coefficients and state used in
+    per-sample loops are plain Python floats: a NumPy float64 scalar turns
+    any float32 block it touches into a float64 block. `python -m
+    engine.dtypecheck` enforces this.
+    
+    Quality tiers: an effect with a cheaper way to run lists its tiers in
+    `quality_tiers`, best first, and reads `self.quality` (an index into
+    them) in `process`. The engine's QualityGovernor steps tiers down when
+    the callback nears its deadline; the effect fades between tiers itself
+    so a change is never heard as a click.
+    """
+    
+    latency = 0  # Samples of delay the effect adds (FFT/reblocking effects set this)
+    dtype = np.float32  # Of the blocks it takes and returns
+    float64_state = ()  # Attributes that are float64 on purpose
+    quality_tiers = ('full',)  # Names of the quality tiers, best first
+    quality = 0  # Current tier, an index into quality_tiers
+    wet_only = False  # Set by MultiRate on effects with a `dry_gain`: process returns the wet part alone
     
     def __init__(self, sample_rate):
         self.sample_rate = sample_rate
@@ -15,6 +38,24 @@ class Effect:
         """Process audio buffer and return output"""
         raise NotImplementedError
     
+    def ramp(self, name, frames):
+        """Per-block values of a smoothed Parameter: a float when settled, else an array"""
+        return self._smoothed[name].block(frames)
+    
+    def set_quality(self, tier):
+        """Move to a quality tier (0 is the best), clamped to the ones the effect has"""
+        self.quality = min(max(int(tier), 0), len(self.quality_tiers) - 1)
+    
+    @property
+    def max_latency(self):
+        """Most `latency` can grow to; graphs size their compensating delays for it"""
+        return self.latency
+    
+    def snap_parameters(self):
+        """Jump every smoothed Parameter straight to its target (no glide)"""
+        for state in self.__dict__.get('_smoothed', {}).values():
+            state.snap()
+    
     @property
     def name(self):
         """Effect name for display"""
@@ -0,0 +1,251 @@
+import os
+import numpy as np
+from .base import Effect
+from .parameters import Parameter
+from .reblock import Reblocker
+from .wavfile import read_wav
+
+# np.fft writes into caller buffers from NumPy 2.0 on
+_FFT_OUT = np.lib.NumpyVersion(np.__version__) >= '2.0.0'
+
+
+def _biquad(x, b0, b1, b2, a1, a2):
+    """Direct form I biquad over a whole array (only used offline)"""
+    y = np.zeros_like(x)
+    x1 = x2 = y1 = y2 = 0.0
+    for n in range(len(x)):
+        y[n] = b0 * x[n] + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+        x2, x1 = x1, x[n]
+        y2, y1 = y1, y[n]
+    return y
+
+
+def _rbj(kind, freq, q, gain_db, sample_rate):
+    """RBJ cookbook coefficients, normalised so a0 = 1"""
+    w0 = 2 * np.pi * freq / sample_rate
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0 = np.cos(w0)
+    A = 10 ** (gain_db / 40.0)
+    if kind == 'lowpass':
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif kind == 'highpass':
+        b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    else:  # peaking
+        b = [1 + alpha * A, -2 * cos_w0, 1 - alpha * A]
+        a = [1 + alpha / A, -2 * cos_w0, 1 - alpha / A]
+    return b[0] / a[0], b[1] / a[0], b[2] / a[0], a[1] / a[0], a[2] / a[0]
+
+
+def synthetic_cabinet_ir(sample_rate, seconds=0.05):
+    """
+    A stand-in 4x12 style cabinet response when no IR file is configured:
+    low cut, a little low-end thump, presence bump and a steep top roll-off
+    """
+    ir = np.zeros(int(sample_rate * seconds))
+    ir[0] = 1.0
+    for kind, freq, q, gain_db in [
+        ('highpass', 80, 0.7, 0),
+        ('peaking', 120, 1.0, 3.0),
+        ('peaking', 2500, 1.2, 4.0),
+        ('lowpass', 5000, 0.7, 0),
+        ('lowpass', 5000, 0.7, 0),
+    ]:
+        ir = _biquad(ir, *_rbj(kind, freq, q, gain_db, sample_rate))
+    return ir.astype('float32')
+
+
+def read_ir(path, sample_rate):
+    """Read an impulse response WAV as mono float32 at `sample_rate`"""
+    ir, file_rate = read_wav(path)
+    if file_rate != sample_rate and len(ir) > 1:
+        # Linear resampling is plenty for an IR that only shapes tone
+        length = int(round(len(ir) * sample_rate / file_rate))
+        positions = np.arange(length) * (file_rate / sample_rate)
+        ir = np.interp(positions, np.arange(len(ir)), ir).astype('float32')
+    return ir
+
+
+def _unit_energy(ir):
+    """Scale an IR to unit energy, so swapping IRs doesn't jump the volume"""
+    energy = float(np.sqrt(np.sum(ir.astype('float64') ** 2)))
+    return (ir / energy).astype('float32') if energy > 0 else ir
+
+
+class ConvolutionKernel:
+    """
+    Everything the audio thread needs for one impulse response
+
+    The IR is cut into partitions of B samples; each is zero-padded to 2B
+    and transformed once here. The spectra are stored reversed and doubled
+    so the partitions lined up against the frequency-domain delay line are
+    one contiguous slice, whatever the ring position.
+    """
+
+    float64_state = ('window', 'spectrum', 'time')  # FFT work buffers
+
+    def __init__(self, ir, partition_size):
+        B = partition_size
+        self.partition_size = B
+        self.ir_length = len(ir)
+        self.partitions = max(1, -(-len(ir) // B))
+        bins = B + 1
+
+        padded = np.zeros(self.partitions * B, dtype='float32')
+        padded[:len(ir)] = ir
+        blocks = np.zeros((self.partitions, 2 * B), dtype='float32')
+        blocks[:, :B] = padded.reshape(self.partitions, B)
+        spectra = np.fft.rfft(blocks, axis=1).astype('complex64')
+        reversed_spectra = spectra[::-1]
+        self.spectra = np.concatenate([reversed_spectra, reversed_spectra])
+
+        # Frequency-domain delay line: spectra of the last P input frames
+        self.fdl = np.zeros((self.partitions, bins), dtype='complex64')
+        self.position = 0  # Ring slot of the newest input spectrum
+        # Reused work buffers. The transforms run in float64: NumPy's float32
+        # FFTs allocate working buffers on every call
+        self.window = np.zeros(2 * B)                    # Previous + current input frame
+        self.spectrum = np.zeros(bins, dtype='complex128')
+        self.products = np.zeros((self.partitions, bins), dtype='complex64')
+        self.ones = np.ones(self.partitions, dtype='complex64')
+        self.accumulator = np.zeros(bins, dtype='complex64')
+        self.time = np.zeros(2 * B)
+        self.output = np.zeros(B, dtype='float32')
+
+    def clear(self):
+        self.fdl[:] = 0
+        self.window[:] = 0
+        self.position = 0
+
+    def process(self, frame):
+        """Convolve one frame of B samples, returns the reused output view"""
+        B = self.partition_size
+        P = self.partitions
+
+        # Overlap-save: transform the last 2B inputs
+        self.window[:B] = self.window[B:]
+        self.window[B:] = frame
+        if _FFT_OUT:
+            np.fft.rfft(self.window, out=self.spectrum)
+        else:
+            self.spectrum[:] = np.fft.rfft(self.window)
+
+        # Newest spectrum into the delay line
+        self.position = (self.position + 1) % P
+        self.fdl[self.position] = self.spectrum
+
+        # Slot s holds the input from (position - s) mod P frames ago, which
+        # meets partition (position - s) mod P: one slice of the doubled array
+        start = P - 1 - self.position
+        np.multiply(self.spectra[start:start + P], self.fdl, out=self.products)
+        np.dot(self.ones, self.products, out=self.accumulator)  # sum(axis=0) buffers the reduction
+
+        self.spectrum[:] = self.accumulator
+        if _FFT_OUT:
+            np.fft.irfft(self.spectrum, n=2 * B, out=self.time)
+        else:
+            self.time[:] = np.fft.irfft(self.spectrum, n=2 * B)
+        # The first half is circular wrap-around, the second half is valid
+        self.output[:] = self.time[B:]
+        return self.output
+
+
+class Convolution(Effect):
+    """
+    Convolution with a recorded impulse response (speaker cabinet or room)
+
+    Key Concepts:
+    - An IR captures how a cab/mic or a room colours an impulse; convolving
+      the guitar with it makes the signal sound as if it went through them
+    - Direct convolution costs IR-length multiplies per sample, far too much
+      for a 200 ms IR, so we work in the frequency domain
+    - Uniformly partitioned overlap-save: the IR is split into block-sized
+      partitions, their spectra are computed once, and each block costs one
+      forward FFT, P complex multiply-adds per bin and one inverse FFT
+    - A frequency-domain delay line keeps the spectra of past input blocks
+      so each is only transformed once
+
+    Latency is zero when `block_frames` (the caller's block size) is a
+    whole number of partitions; other block sizes are evened out by a
+    Reblocker, which adds a fixed delay (partition_size - 1 when
+    block_frames is None, meaning any size). The dry/wet mix happens per
+    partition, behind the Reblocker, so dry and wet are delayed alike.
+    """
+
+    mix = Parameter(0.0, 1.0)
+    level = Parameter(0.0, 4.0)
+
+    def __init__(self, sample_rate, ir_path=None, partition_size=128, ir=None, block_frames=None):
+        self.ir_path = ir_path         # WAV file, None = synthetic cabinet
+        self.partition_size = partition_size
+        self.block_frames = block_frames
+        self.mix = 1.0                 # Cabinets are usually 100% wet
+        self.level = 1.0
+        self._ir = ir                  # Explicit IR array overrides ir_path
+        self._ir_source = None
+        self.kernel = None
+        super().__init__(sample_rate)
+
+    def reset(self):
+        if self.kernel is None or self._ir_source != (self.ir_path, self.partition_size):
+            self.impulse_response = self._impulse_response()
+            self.kernel = self.prepare(self.impulse_response)
+            self._ir_source = (self.ir_path, self.partition_size)
+        self.kernel.clear()
+        self._out = np.zeros(self.partition_size, dtype='float32')
+        self.reblocker = Reblocker(self._process_frame, self.partition_size, frames=self.block_frames)
+        self.latency = self.reblocker.latency
+
+    def _impulse_response(self):
+        if self._ir is not None:
+            ir = np.asarray(self._ir, dtype='float32')
+        elif self.ir_path:
+            ir = read_ir(self.ir_path, self.sample_rate)
+        else:
+            ir = synthetic_cabinet_ir(self.sample_rate)
+        return _unit_energy(ir)
+
+    def prepare(self, ir):
+        """Build a kernel for an IR (slow, call off the audio thread)"""
+        return ConvolutionKernel(ir, self.partition_size)
+
+    def load_ir(self, path):
+        """Load another IR; the kernel is built here and swapped in whole"""
+        ir = read_ir(path, self.sample_rate) if path else synthetic_cabinet_ir(self.sample_rate)
+        ir = _unit_energy(ir)
+        kernel = self.prepare(ir)
+        self.impulse_response = ir
+        self.ir_path = path
+        self._ir = None
+        self._ir_source = (path, self.partition_size)
+        self.kernel = kernel
+
+    @property
+    def name(self):
+        if self.ir_path:
+            return f"Convolution ({os.path.basename(self.ir_path)})"
+        return "Convolution (Cabinet)"
+
+    @property
+    def max_latency(self):
+        return self.reblocker.max_latency
+
+    def _process_frame(self, audio, frames):
+        wet = self.kernel.process(audio)
+        out = self._out
+        mix = self.ramp('mix', frames)
+        level = self.ramp('level', frames)
+        # out = (dry + (wet - dry) * mix) * level
+        np.subtract(wet, audio, out=out)
+        out *= mix
+        out += audio
+        out *= level
+        return out
+
+    def process(self, audio, frames):
+        # Always through the Reblocker, so an odd-sized block can't tear the
+        # stream; at whole partitions it is only a copy and adds no delay
+        out = self.reblocker.process(audio, frames)
+        self.latency = self.reblocker.latency
+        return out
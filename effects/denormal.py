@@ -0,0 +1,50 @@
+"""
+Denormal guards for recursive effects
+
+A feedback path fed silence decays forever: 0.5, 0.25, ... until the
+values drop below the smallest normal float (1.2e-38 in float32, 2.2e-308
+in float64). From there on they are denormal, and x86 handles every
+arithmetic op on one in microcode, up to ~100x slower. A reverb tail
+fading out would then cost more CPU than a loud chord.
+
+The guards zero anything that quiet once per block:
+- `flush_block` adds a tiny offset to a block and subtracts it again. In
+  float32, anything under ~1e-25 rounds to exactly zero and anything above
+  ~1e-11 (-220 dBFS) comes back bit for bit. Two in-place vector ops, no
+  comparisons or masks
+- `flush_span` does the same to the part of a circular buffer written in
+  the last block, so a delay line is cleaned as it is filled
+- `flush_value` zeroes a Python float state variable under -400 dBFS
+"""
+from config import DENORMAL_FLUSH
+
+FLUSH_OFFSET = 1e-18
+DENORMAL_FLOOR = 1e-20
+
+# Module switch rather than a per-effect setting, so benchmarks can turn it off
+enabled = DENORMAL_FLUSH
+
+
+def flush_block(block):
+    """Round a float array's near-zero values to exactly zero, in place"""
+    if enabled:
+        block += FLUSH_OFFSET
+        block -= FLUSH_OFFSET
+    return block
+
+
+def flush_span(buffer, start, frames):
+    """flush_block on `frames` samples of a circular buffer from `start`, wrapping"""
+    if enabled:
+        size = len(buffer)
+        end = start + min(frames, size)
+        flush_block(buffer[start:min(end, size)])
+        if end > size:
+            flush_block(buffer[:end - size])
+
+
+def flush_value(value):
+    """A Python float state variable, or 0.0 if it is quieter than DENORMAL_FLOOR"""
+    if enabled and -DENORMAL_FLOOR < value < DENORMAL_FLOOR:
+        return 0.0
+    return value
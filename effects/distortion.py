@@ -1,12 +1,19 @@
 import numpy as np
 from .base import Effect
+from .parameters import Parameter
 from config import DIST_GAIN
 
 class Distortion(Effect):
+    gain = Parameter(0.0, 200.0)
+    
+    def __init__(self, sample_rate):
+        self.gain = DIST_GAIN  # Drive into the tanh, defaults to config
+        super().__init__(sample_rate)
+    
     @property
     def name(self):
         return "Distortion"
     
     def process(self, audio, frames):
-        boosted = audio * DIST_GAIN
-        return np.tanh(boosted)
\ No newline at end of file
+        boosted = audio * self.ramp('gain', frames)
+        return np.tanh(boosted)
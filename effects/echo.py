@@ -1,11 +1,24 @@
 import numpy as np
 from .base import Effect
-from config import SAMPLE_RATE, ECHO_DELAY_MS, ECHO_FEEDBACK, ECHO_MIX, ECHO_MAX_SECONDS
+from .parameters import Parameter
+from .denormal import flush_span
+from config import ECHO_DELAY_MS, ECHO_FEEDBACK, ECHO_MIX, ECHO_MAX_SECONDS
 
 class Echo(Effect):
+    mix = Parameter(0.0, 1.0)
+    dry_gain = 1.0  # Of the last block, when wet_only
+    
+    def __init__(self, sample_rate):
+        # Defaults come from config, presets can override them
+        self.delay_ms = ECHO_DELAY_MS
+        self.feedback = ECHO_FEEDBACK
+        self.mix = ECHO_MIX
+        self.max_seconds = ECHO_MAX_SECONDS
+        super().__init__(sample_rate)
+    
     def reset(self):
-        self.echo_delay_samples = int(self.sample_rate * (ECHO_DELAY_MS / 1000.0))
-        self.echo_buffer_size = int(self.sample_rate * ECHO_MAX_SECONDS)
+        self.echo_delay_samples = int(self.sample_rate * (self.delay_ms / 1000.0))
+        self.echo_buffer_size = int(self.sample_rate * self.max_seconds)
         self.echo_buffer = np.zeros(self.echo_buffer_size, dtype="float32")
         self.echo_write_idx = 0
     
@@ -14,19 +27,25 @@ class Echo(Effect):
         return "Echo"
     
     def process(self, audio, frames):
-        out = np.zeros_like(audio)
+        wet = np.zeros_like(audio)
+        start = self.echo_write_idx
         
         for i in range(frames):
             read_idx = (self.echo_write_idx - self.echo_delay_samples) % self.echo_buffer_size
             delayed_sample = self.echo_buffer[read_idx]
             
             dry = audio[i]
-            wet = delayed_sample
+            wet[i] = delayed_sample
             
-            out_sample = (1.0 - ECHO_MIX) * dry + ECHO_MIX * wet
-            out[i] = out_sample
-            
-            self.echo_buffer[self.echo_write_idx] = dry + delayed_sample * ECHO_FEEDBACK
+            self.echo_buffer[self.echo_write_idx] = dry + delayed_sample * self.feedback
             self.echo_write_idx = (self.echo_write_idx + 1) % self.echo_buffer_size
         
-        return out
\ No newline at end of file
+        # Repeats fed silence decay toward denormals, zero them as they are written
+        flush_span(self.echo_buffer, start, frames)
+        
+        # Dry/wet mix for the whole block (mix may be ramping)
+        mix = self.ramp('mix', frames)
+        if self.wet_only:
+            self.dry_gain = 1.0 - mix
+            return mix * wet
+        return (1.0 - mix) * audio + mix * wet
\ No newline at end of file
@@ -30,6 +30,16 @@ class EffectChain(Effect):
             return self.active_states[index]
         return False
     
+    @property
+    def latency(self):
+        """Total delay of the active effects"""
+        return sum(effect.latency for effect, active in zip(self.effects, self.active_states) if active)
+    
+    @property
+    def max_latency(self):
+        """Total delay with every effect switched on"""
+        return sum(effect.max_latency for effect in self.effects)
+    
     def get_status_display(self):
         """Get visual status of all effects"""
         lines = []
@@ -43,9 +53,14 @@ class EffectChain(Effect):
         for effect in self.effects:
             effect.reset()
     
+    def snap_parameters(self):
+        """Snap the smoothed parameters of every effect in the chain"""
+        for effect in self.effects:
+            effect.snap_parameters()
+    
     def process(self, audio, frames):
         """Process audio through active effects in series"""
-        out = audio.copy()
+        out = audio.astype(self.dtype)  # A copy, and float32 whatever the caller sends
         
         for effect, active in zip(self.effects, self.active_states):
             if active:
@@ -0,0 +1,211 @@
+import numpy as np
+from .base import Effect
+from .parameters import Parameter
+from .denormal import flush_block
+
+
+def fdn_delays(lines, shortest, longest):
+    """`lines` distinct prime lengths spread geometrically between two lengths (samples)"""
+    delays = []
+    for target in np.geomspace(shortest, longest, lines):
+        length = max(int(target), 2)
+        while any(length % p == 0 for p in range(2, int(length ** 0.5) + 1)) or length in delays:
+            length += 1
+        delays.append(length)
+    return delays
+
+
+class FDNReverb(Effect):
+    """
+    Feedback delay network reverb: 8-16 delay lines mixed through one matrix
+
+    Key Concepts:
+    - Every delay line's output is fed back into ALL lines through a
+      Householder matrix A = I - (2/N) 11^T. It is lossless (orthogonal)
+      and applying it is a vector op: each line minus 2/N of their sum.
+      Echo density grows with every pass instead of needing more combs
+    - The lines are mutually prime lengths, so their echoes never line up
+      into the metallic ringing of a few parallel combs
+    - Sub-blocks: a line's output at time t was written at least its
+      delay earlier. As long as a sub-block is shorter than the shortest
+      delay, everything it reads was written before it starts, so the whole
+      (lines x frames) state is read, filtered, mixed and written back in
+      a handful of array ops. More lines make the matrices taller, not the
+      Python loop longer
+    - Per-line loss: gain 10^(-3 delay / (decay x rate)) gives every line
+      the same RT60. Damping is a two-tap FIR (this sample and the one
+      before), stronger on longer lines, so highs die away faster
+    - Each delay length drifts slowly with its own LFO (fractional reads,
+      linear interpolation), which smears the remaining resonances
+    """
+
+    wet_level = Parameter(0.0, 1.0)
+    dry_level = Parameter(0.0, 1.0)
+    decay = Parameter(0.1, 20.0)    # RT60 in seconds
+    damping = Parameter(0.0, 1.0)   # High-frequency loss per pass
+    # LFO phases and fractional read positions
+    float64_state = ('lfo', '_lfo_step', '_rates', '_delays', '_ramp', '_positions', '_whole')
+
+    def __init__(self, sample_rate, lines=8):
+        # Set parameters BEFORE calling super().__init__()
+        self.lines = lines
+        self.delays = fdn_delays(lines, sample_rate * 0.029, sample_rate * 0.073)
+        self.mod_depth = sample_rate * 0.00025                     # Samples either way
+        self.mod_rates = [0.3 * (1 + i / lines) / sample_rate      # Cycles per sample, one per line
+                          for i in range(lines)]
+        self.wet_level = 0.3
+        self.dry_level = 0.7
+        self.decay = 2.0
+        self.damping = 0.4
+        super().__init__(sample_rate)
+
+    @property
+    def name(self):
+        return f"FDN Reverb ({self.lines} lines)"
+
+    def reset(self):
+        n = self.lines
+        delays = np.asarray(self.delays, dtype='float64')
+        # Reads reach one sample past the interpolated delay (damping tap) plus the modulation
+        self.max_sub = int(delays.min() - self.mod_depth) - 2
+        self.size = int(np.ceil(delays.max() + self.mod_depth)) + 3 + self.max_sub
+        self.buffer = np.zeros((n, self.size), dtype='float32')
+        self.write_pos = 0
+        self.lfo = np.arange(n, dtype='float64') / n  # Spread phases
+        self.in_gains = np.full((n, 1), 1.0 / np.sqrt(n), dtype='float32')
+        self.out_gains = np.array([(-1.0) ** i / np.sqrt(n) for i in range(n)], dtype='float32')
+        self._delays = delays[:, None]
+        self._rates = np.asarray(self.mod_rates, dtype='float64')[:, None]
+        self._rows = (np.arange(n) * self.size)[:, None]
+        self._settings = None
+        self._allocate()
+        self._lfo_step = np.zeros(n)
+        self._wet = np.zeros(1024, dtype='float32')
+        self._out = np.zeros(1024, dtype='float32')
+
+    def _allocate(self):
+        # Flat scratch, viewed as (lines, frames) by _rows_of so short sub-blocks stay
+        # contiguous; a strided `out` makes numpy buffer the whole operation
+        shape = self.lines * self.max_sub
+        self._ramp = np.arange(self.max_sub, dtype='float64')
+        self._positions = np.zeros(shape)
+        self._whole = np.zeros(shape)
+        self._index = np.zeros(shape, dtype=np.intp)
+        self._taps = [np.zeros(shape, dtype=np.intp) for _ in range(3)]
+        self._samples = [np.zeros(shape, dtype='float32') for _ in range(3)]
+        self._fraction = np.zeros(shape, dtype='float32')
+        self._state = np.zeros(shape, dtype='float32')
+        self._older = np.zeros(shape, dtype='float32')
+        self._sum = np.zeros(self.max_sub, dtype='float32')
+        self._ones = np.ones(self.lines, dtype='float32')
+
+    def _rows_of(self, scratch, frames):
+        return scratch[:self.lines * frames].reshape(self.lines, frames)
+
+    def _update_losses(self):
+        """Per-line feedback gain and damping, recomputed when decay/damping move"""
+        settings = (self.decay, self.damping)
+        if settings == self._settings:
+            return
+        self._settings = settings
+        delays = self._delays[:, 0]
+        gains = 10.0 ** (-3.0 * delays / (self.decay * self.sample_rate))
+        older = 0.5 * self.damping * delays / delays.max()  # Weight of the earlier tap, <= 0.5
+        self.newer_gains = (gains * (1.0 - older)).astype('float32')[:, None]
+        self.older_gains = (gains * older).astype('float32')[:, None]
+
+    def _sub_block(self, audio, wet, frames):
+        size = self.size
+        self._update_losses()
+
+        # Read position of every line at every sample: t - delay - modulation.
+        # Per-line columns and per-sample rows are spread over a whole scratch
+        # block first: numpy buffers any operand it has to broadcast
+        positions = self._rows_of(self._positions, frames)
+        spread = self._rows_of(self._whole, frames)
+        ramp = self._ramp[:frames]
+        np.copyto(positions, self._rates)
+        np.copyto(spread, ramp)
+        positions *= spread
+        np.copyto(spread, self.lfo[:, None])
+        positions += spread
+        positions *= 2.0 * np.pi
+        np.sin(positions, out=positions)
+        positions *= -self.mod_depth
+        np.copyto(spread, self._delays)
+        positions -= spread
+        np.copyto(spread, ramp)
+        positions += spread
+        positions += self.write_pos
+        np.multiply(self._rates[:, 0], frames, out=self._lfo_step)
+        self.lfo += self._lfo_step
+        np.mod(self.lfo, 1.0, out=self.lfo)
+
+        whole = self._rows_of(self._whole, frames)
+        np.floor(positions, out=whole)
+        fraction = self._rows_of(self._fraction, frames)
+        np.subtract(positions, whole, out=positions)
+        fraction[:] = positions  # A float32 `out` on float64 maths would allocate a cast buffer
+
+        # The samples just before, at and after each read position, as flat indices
+        index = self._rows_of(self._index, frames)
+        samples = [self._rows_of(s, frames) for s in self._samples]
+        for offset, (tap, sample) in enumerate(zip(self._taps, samples)):
+            tap = self._rows_of(tap, frames)
+            np.add(whole, offset - 1, out=positions)
+            np.mod(positions, size, out=positions)
+            index[:] = positions
+            np.copyto(tap, self._rows)
+            tap += index
+            np.take(self.buffer, tap, out=sample, mode='clip')  # 'raise' would copy
+        before, at, after = samples
+
+        # Interpolated delay output, and the same one sample older for damping
+        state = self._rows_of(self._state, frames)
+        older = self._rows_of(self._older, frames)
+        np.subtract(after, at, out=state)
+        state *= fraction
+        state += at
+        np.subtract(at, before, out=older)
+        older *= fraction
+        older += before
+        np.copyto(after, self.newer_gains)  # The taps are spare from here on
+        state *= after
+        np.copyto(after, self.older_gains)
+        older *= after
+        state += older
+
+        np.dot(self.out_gains, state, out=wet)
+
+        # Householder feedback: each line minus 2/N of the sum of all lines, plus the input
+        total = self._sum[:frames]
+        np.dot(self._ones, state, out=total)
+        total *= -2.0 / self.lines
+        np.copyto(older, total)
+        state += older
+        np.copyto(older, self.in_gains)
+        np.copyto(after, audio)
+        older *= after
+        state += older
+        # Written at write_pos on, in two slices where it wraps round the buffer
+        start = self.write_pos
+        first = min(frames, size - start)
+        self.buffer[:, start:start + first] = state[:, :first]
+        self.buffer[:, :frames - first] = state[:, first:]
+        self.write_pos = (start + frames) % size
+
+    def process(self, audio, frames):
+        if frames > len(self._wet):
+            self._wet = np.zeros(frames, dtype='float32')
+            self._out = np.zeros(frames, dtype='float32')
+        wet = self._wet[:frames]
+        pos = 0
+        while pos < frames:
+            n = min(frames - pos, self.max_sub)
+            self._sub_block(audio[pos:pos + n], wet[pos:pos + n], n)
+            pos += n
+        out = self._out[:frames]
+        np.multiply(audio[:frames], self.ramp('dry_level', frames), out=out)
+        wet *= self.ramp('wet_level', frames)
+        out += wet
+        return out
@@ -1,5 +1,8 @@
+import math
 import numpy as np
 from .base import Effect
+from .parameters import Parameter
+from .denormal import flush_span
 
 class Flanger(Effect):
     """
@@ -10,8 +13,14 @@ class Flanger(Effect):
     - Fractional delay (interpolation)
     - Feedback for resonance
     - Comb filtering creates the "jet plane" sound
+    - Quality tiers: linear interpolation, or the nearest sample (cheaper,
+      slightly grainy). A tier change crossfades between the two reads
+      over quality_fade_ms
     """
     
+    mix = Parameter(0.0, 1.0)
+    quality_tiers = ('linear interpolation', 'nearest sample')
+    
     def __init__(self, sample_rate):
         # Set parameters BEFORE calling super().__init__()
         # Flanger parameters
@@ -23,6 +32,7 @@ class Flanger(Effect):
         # Delay line specs
         self.min_delay = 0.001    # Minimum delay: 1ms
         self.max_delay = 0.005    # Maximum delay: 5ms
+        self.quality_fade_ms = 20.0  # Crossfade between interpolation tiers
         
         super().__init__(sample_rate)
         
@@ -41,6 +51,9 @@ class Flanger(Effect):
         
         # LFO phase
         self.phase = 0.0
+        
+        # Weight of the interpolated read against the nearest sample (1.0 at full quality)
+        self.interpolation = 1.0
     
     @property
     def name(self):
@@ -76,14 +89,20 @@ class Flanger(Effect):
                 ↑             ↓
                 └── Feedback ─┘
         """
-        out = np.empty_like(audio)
+        wet = np.empty_like(audio)
+        start = self.write_pos
         
         # LFO phase increment
         phase_increment = 2 * np.pi * self.rate / self.sample_rate
         
+        # Quality tier: fade towards the interpolated read (tier 0) or the nearest sample
+        interpolation = self.interpolation
+        target = 1.0 if self.quality == 0 else 0.0
+        fade_step = 1000.0 / (self.quality_fade_ms * self.sample_rate)
+        
         for i in range(frames):
             # Generate LFO (-1 to +1)
-            lfo = np.sin(self.phase)
+            lfo = math.sin(self.phase)  # A Python float, not a NumPy float64 scalar
             
             # Convert LFO to delay time in samples
             # LFO modulates between min_delay and max_delay
@@ -103,7 +122,17 @@ class Flanger(Effect):
             
             # Read delayed sample with interpolation
             # This is the KEY technique for smooth modulation
-            delayed_sample = self._linear_interpolate(self.buffer, read_pos)
+            if interpolation == 1.0:
+                delayed_sample = self._linear_interpolate(self.buffer, read_pos)
+            else:
+                delayed_sample = self.buffer[int(read_pos + 0.5) % self.buffer_size]
+                if interpolation > 0.0:
+                    # Mid-crossfade between the tiers
+                    interpolated = self._linear_interpolate(self.buffer, read_pos)
+                    delayed_sample += interpolation * (interpolated - delayed_sample)
+            if interpolation != target:
+                interpolation = (min(interpolation + fade_step, target) if target > interpolation
+                                 else max(interpolation - fade_step, target))
             
             # Input signal
             input_sample = audio[i]
@@ -112,12 +141,7 @@ class Flanger(Effect):
             # The feedback creates resonance peaks (the "swoosh")
             self.buffer[self.write_pos] = input_sample + delayed_sample * self.feedback
             
-            # Mix dry and wet signals
-            # Mixing delayed with undelayed creates COMB FILTERING
-            # This is what makes the flanger sound!
-            output_sample = input_sample * (1 - self.mix) + delayed_sample * self.mix
-            
-            out[i] = output_sample
+            wet[i] = delayed_sample
             
             # Advance pointers
             self.write_pos = (self.write_pos + 1) % self.buffer_size
@@ -125,4 +149,13 @@ class Flanger(Effect):
             if self.phase >= 2 * np.pi:
                 self.phase -= 2 * np.pi
         
-        return out
\ No newline at end of file
+        self.interpolation = interpolation
+        
+        # The feedback loop decays toward denormals in silence
+        flush_span(self.buffer, start, frames)
+        
+        # Mix dry and wet signals (for the whole block - mix may be ramping)
+        # Mixing delayed with undelayed creates COMB FILTERING
+        # This is what makes the flanger sound!
+        mix = self.ramp('mix', frames)
+        return audio * (1 - mix) + wet * mix
\ No newline at end of file
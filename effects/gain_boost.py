@@ -1,10 +1,17 @@
 from .base import Effect
+from .parameters import Parameter
 from config import GAIN_BOOST
 
 class GainBoost(Effect):
+    gain = Parameter(0.0, 100.0)
+    
+    def __init__(self, sample_rate):
+        self.gain = GAIN_BOOST  # Linear gain, defaults to config
+        super().__init__(sample_rate)
+    
     @property
     def name(self):
         return "Gain Boost"
     
     def process(self, audio, frames):
-        return audio * GAIN_BOOST
\ No newline at end of file
+        return audio * self.ramp('gain', frames)
@@ -0,0 +1,297 @@
+import numpy as np
+from .base import Effect
+
+
+class DelayLine:
+    """
+    Delay of `delay` samples, used to line up parallel branches
+
+    The buffer holds `max_delay` samples of history, so `set_delay` can
+    move the read position anywhere up to it without losing the signal.
+    """
+
+    def __init__(self, delay, max_frames=1024, max_delay=None):
+        self.max_delay = max(delay, max_delay or 0)
+        self.delay = delay
+        self._allocate(max_frames)
+
+    def _allocate(self, max_frames):
+        self.max_frames = max_frames
+        self.buffer = np.zeros(self.max_delay + max_frames, dtype='float32')
+        self.out = np.zeros(max_frames, dtype='float32')
+        self.write_pos = 0
+
+    def reset(self):
+        self.buffer[:] = 0.0
+        self.write_pos = 0
+
+    def set_delay(self, delay):
+        """Move the read position (clamped to max_delay); no allocation"""
+        self.delay = min(delay, self.max_delay)
+
+    def process(self, audio, frames):
+        if frames > self.max_frames:
+            self._allocate(frames)
+        buffer, size = self.buffer, len(self.buffer)
+        # Write the block, then read `delay` samples behind it; each in at
+        # most two slices, where it wraps round the end of the buffer
+        write = self.write_pos
+        first = min(frames, size - write)
+        buffer[write:write + first] = audio[:first]
+        buffer[:frames - first] = audio[first:frames]
+        out = self.out[:frames]
+        read = (write - self.delay) % size
+        first = min(frames, size - read)
+        out[:first] = buffer[read:read + first]
+        out[first:] = buffer[:frames - first]
+        self.write_pos = (write + frames) % size
+        return out
+
+
+class _Node:
+    def __init__(self, name, effect, inputs, gains):
+        self.name = name
+        self.effect = effect  # None for a mix node
+        self.inputs = inputs
+        self.gains = gains
+
+
+class EffectGraph(Effect):
+    """
+    Effects wired as a graph instead of a single line
+
+        graph = EffectGraph(sample_rate)
+        graph.add('amp', UltraMetal(sample_rate))               # fed by 'input'
+        graph.add('cab', Convolution(sample_rate), inputs=['amp'])
+        graph.add('verb', Reverb(sample_rate), inputs=['input'])
+        graph.mix('out', ['cab', 'verb'], gains=[1.0, 0.4])
+        graph.set_output('out')
+
+    Key Concepts:
+    - Every effect reports a `latency` (samples of delay it adds). A node's
+      signal arrives at the sum of the latencies along its path
+    - A mix node delays its faster inputs to match the slowest one, so
+      parallel branches stay phase-aligned instead of comb filtering. The
+      delays are sized for every effect's `max_latency`; when a latency
+      changes mid-stream only their read positions move, on the audio
+      thread, without allocating or losing what they hold
+    - `compile()` sorts the nodes so every node runs after its inputs and
+      gives each output a buffer from a small pool. A buffer goes back to
+      the pool after the last node that reads it, so memory depends on how
+      wide the graph is, not how many nodes it has. Call it (or `reset()`)
+      once the graph is built, off the audio thread; `process` only compiles
+      if nobody did, or when the block grows
+    """
+
+    def __init__(self, sample_rate, max_frames=1024):
+        self.nodes = {}
+        self.output = None
+        self._output_chosen = False
+        self.max_frames = max_frames
+        self._plan = None
+        super().__init__(sample_rate)
+
+    @property
+    def name(self):
+        return "Effect Graph"
+
+    def add(self, name, effect, inputs=('input',)):
+        """Add an effect node fed by the sum of `inputs` (node names or 'input')"""
+        self._add(_Node(name, effect, list(inputs), [1.0] * len(inputs)))
+        return effect
+
+    def mix(self, name, inputs, gains=None):
+        """Add a node summing `inputs`, each scaled by its gain"""
+        gains = [1.0] * len(inputs) if gains is None else list(gains)
+        if len(gains) != len(inputs):
+            raise ValueError(f"{name}: {len(inputs)} inputs but {len(gains)} gains")
+        self._add(_Node(name, None, list(inputs), gains))
+
+    def _add(self, node):
+        if node.name == 'input' or node.name in self.nodes:
+            raise ValueError(f"Node name {node.name!r} is already taken")
+        self.nodes[node.name] = node
+        if not self._output_chosen:
+            self.output = node.name  # Until set_output(): the last node added
+        self._plan = None
+
+    def set_output(self, name):
+        if name not in self.nodes:
+            raise ValueError(f"No node named {name!r}")
+        self.output = name
+        self._output_chosen = True
+        self._plan = None
+
+    # --- Compilation ---
+
+    def _order(self):
+        """Nodes the output depends on, each after its inputs (Kahn's algorithm)"""
+        needed, stack = set(), [self.output]
+        while stack:
+            name = stack.pop()
+            if name == 'input' or name in needed:
+                continue
+            if name not in self.nodes:
+                raise ValueError(f"Unknown node {name!r}")
+            needed.add(name)
+            stack.extend(self.nodes[name].inputs)
+
+        waiting = {name: sum(1 for i in self.nodes[name].inputs if i != 'input') for name in needed}
+        users = {name: [] for name in needed}
+        for name in needed:
+            for i in self.nodes[name].inputs:
+                if i != 'input':
+                    users[i].append(name)
+        # Insertion order among ready nodes keeps the plan predictable
+        ready = [name for name in self.nodes if name in needed and waiting[name] == 0]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for user in users[name]:
+                waiting[user] -= 1
+                if waiting[user] == 0:
+                    ready.append(user)
+        if len(order) != len(needed):
+            raise ValueError("Effect graph has a cycle")
+        return order
+
+    def _latencies(self, order, attribute='latency'):
+        """Samples of delay at each node's output ('max_latency': the most it can grow to)"""
+        latency = {'input': 0}
+        for name in order:
+            node = self.nodes[name]
+            arrival = max(latency[i] for i in node.inputs)
+            latency[name] = arrival + (getattr(node.effect, attribute, 0) if node.effect else 0)
+        return latency
+
+    def compile(self):
+        """Build the execution plan: order, compensating delays and buffer slots"""
+        if self.output is None:
+            raise ValueError("Effect graph is empty")
+        order = self._order()
+        most = self._latencies(order, 'max_latency')
+
+        # Last step reading each node's output; its slot is free after that
+        last_use = {}
+        for step, name in enumerate(order):
+            for i in self.nodes[name].inputs:
+                last_use[i] = step
+        last_use[self.output] = len(order)
+
+        slot_of = {'input': 0}  # Slot 0 holds the graph input
+        free, slots = [], 1
+        plan = []
+        for step, name in enumerate(order):
+            node = self.nodes[name]
+            # A single input is never behind; a mix input may be, by up to
+            # the latest its slowest input can arrive
+            longest = max(most[i] for i in node.inputs) if len(node.inputs) > 1 else 0
+            inputs = []
+            for i, gain in zip(node.inputs, node.gains):
+                delay = DelayLine(0, self.max_frames, longest) if longest > 0 else None
+                inputs.append((slot_of[i], gain, delay))
+            done = [slot_of[i] for i in set(node.inputs) if i != 'input' and last_use[i] == step]
+            # A single-input node may write over its input (a chain of effects
+            # keeps reusing one buffer); a mix still reads its inputs while writing
+            single = len(node.inputs) == 1
+            if single:
+                free.extend(done)
+            if free:
+                slot = free.pop()
+            else:
+                slot, slots = slots, slots + 1
+            if not single:
+                free.extend(done)
+            slot_of[name] = slot
+            plan.append((node.effect, inputs, slot))
+
+        self._slots = np.zeros((slots, self.max_frames), dtype='float32')
+        self._scratch = np.zeros(self.max_frames, dtype='float32')  # A scaled mix input
+        self._plan = plan
+        self._latency_effects = [node.effect for node in self.nodes.values() if node.effect]
+        self._order_names = order
+        self._max_latency = most[self.output]
+        self._output_slot = slot_of[self.output]
+        self._set_delays()
+        return plan
+
+    def _set_delays(self):
+        """Point every compensating delay at the current latencies"""
+        latency = self._latencies(self._order_names)
+        for name, (effect, inputs, slot) in zip(self._order_names, self._plan):
+            node = self.nodes[name]
+            arrival = max(latency[i] for i in node.inputs)
+            for i, (input_slot, gain, delay) in zip(node.inputs, inputs):
+                if delay is not None:
+                    delay.set_delay(arrival - latency[i])
+        self._latency_key = [getattr(effect, 'latency', 0) for effect in self._latency_effects]
+        self.latency = latency[self.output]
+
+    @property
+    def max_latency(self):
+        if self._plan is None:
+            self.compile()
+        return self._max_latency
+
+    def _latency_moved(self):
+        """Has any effect's latency changed since the delays were set? (no allocation)"""
+        for effect, latency in zip(self._latency_effects, self._latency_key):
+            if getattr(effect, 'latency', 0) != latency:
+                return True
+        return False
+
+    # --- Effect interface ---
+
+    def reset(self):
+        for node in self.nodes.values():
+            if node.effect is not None:
+                node.effect.reset()
+        self._plan = None
+        self.latency = 0
+        if self.output is not None:
+            self.compile()  # Here rather than on the audio thread's next block
+
+    def snap_parameters(self):
+        for node in self.nodes.values():
+            if node.effect is not None:
+                node.effect.snap_parameters()
+
+    def process(self, audio, frames):
+        if frames > self.max_frames:
+            self.max_frames = frames
+            self._plan = None
+        # Effects can change their latency (e.g. a Reblocker meeting an odd
+        # block size): move the compensating delays when they do
+        if self._plan is None:
+            self.compile()
+        elif self._latency_moved():
+            self._set_delays()
+
+        slots = self._slots
+        slots[0, :frames] = audio[:frames]
+        for effect, inputs, slot in self._plan:
+            out = slots[slot, :frames]
+            if len(inputs) == 1 and inputs[0][1] == 1.0 and inputs[0][2] is None:
+                source = slots[inputs[0][0], :frames]
+            else:
+                # Sum the inputs, each delayed to the latest arrival and scaled
+                source = out
+                mixed = False
+                for input_slot, gain, delay in inputs:
+                    signal = slots[input_slot, :frames]
+                    if delay is not None:
+                        signal = delay.process(signal, frames)
+                    if not mixed:
+                        np.multiply(signal, gain, out=out)
+                        mixed = True
+                    else:
+                        scaled = self._scratch[:frames]
+                        np.multiply(signal, gain, out=scaled)
+                        out += scaled
+            if effect is None:
+                if source is not out:
+                    out[:] = source
+            else:
+                out[:] = effect.process(source, frames)
+        return slots[self._output_slot, :frames]  # Reused next block, like any effect's output
@@ -0,0 +1,157 @@
+import numpy as np
+from .base import Effect
+from .parameters import Parameter
+
+
+class Harmonizer(Effect):
+    """
+    Harmonizer: adds 1-4 pitch-shifted voices (e.g. a third and a fifth above)
+
+    Key Concepts:
+    - Delay-line pitch shifting: a read head that moves through a delay
+      line faster (or slower) than the write head plays the audio back
+      higher (or lower), by the ratio of the speeds
+    - The delay can't shrink forever, so it jumps back by `window_ms` once
+      per cycle. Each voice has two heads half a cycle apart, crossfaded
+      with sin^2/cos^2 so the head that is jumping is always silent
+    - All voices read from ONE circular buffer. Their heads form a
+      (2 x voices, frames) matrix of read positions, and one gather with
+      linear interpolation reads them all. Another voice adds two rows to
+      the matrix, not another delay line or loop
+    """
+
+    dry_level = Parameter(0.0, 1.0)
+    wet_level = Parameter(0.0, 1.0)
+    # Head phases and read positions: float32 can't resolve a fraction of a sample in a long buffer
+    float64_state = ('phase', 'steps', '_ramp', '_offsets', '_row', '_phases', '_positions', '_whole')
+
+    def __init__(self, sample_rate):
+        # Set parameters BEFORE calling super().__init__()
+        self.intervals = [4.0, 7.0]   # Semitones per voice: major third and fifth above
+        self.levels = [0.6, 0.5]      # Level per voice
+        self.window_ms = 50.0         # One head's sweep: longer smears attacks, shorter warbles low notes
+        self.dry_level = 1.0
+        self.wet_level = 0.7
+        self.max_frames = 1024
+        super().__init__(sample_rate)
+
+    @property
+    def name(self):
+        return "Harmonizer"
+
+    def reset(self):
+        voices = len(self.intervals)
+        self.window = self.sample_rate * self.window_ms / 1000.0
+        # Two heads per voice: rows 2v and 2v+1
+        ratios = np.repeat(2.0 ** (np.asarray(self.intervals, dtype='float64') / 12.0), 2)
+        # A head's delay changes by (1 - ratio) samples per sample; as a fraction of the window
+        self.steps = ((1.0 - ratios) / self.window)[:, None]
+        self.head_levels = np.repeat(np.asarray(self.levels, dtype='float32'), 2)
+        self.phase = np.tile([0.0, 0.5], voices)
+        # Window + block, plus one sample for the interpolation partner
+        self.buffer_size = int(np.ceil(self.window)) + self.max_frames + 2
+        self.buffer = np.zeros(self.buffer_size, dtype='float32')
+        self.write_pos = 0
+        self._allocate(self.max_frames)
+
+    def _allocate(self, max_frames):
+        heads = len(self.phase)
+        self.max_frames = max_frames
+        self._ramp = np.arange(1, max_frames + 1, dtype='float64')
+        self._offsets = np.arange(max_frames, dtype='float64')
+        self._row = np.zeros(max_frames)
+        # Flat scratch, viewed as (heads, frames) by _rows_of so shorter blocks stay
+        # contiguous; a strided `out` makes numpy buffer the whole operation
+        shape = heads * max_frames
+        self._phases = np.zeros(shape)
+        self._positions = np.zeros(shape)
+        self._whole = np.zeros(shape)
+        self._index = np.zeros(shape, dtype=np.intp)
+        self._next = np.zeros(shape, dtype=np.intp)
+        self._fraction = np.zeros(shape, dtype='float32')
+        self._samples = np.zeros(shape, dtype='float32')
+        self._partners = np.zeros(shape, dtype='float32')
+        self._gains = np.zeros(shape, dtype='float32')
+        self._wet = np.zeros(max_frames, dtype='float32')
+        self._out = np.zeros(max_frames, dtype='float32')
+
+    def _rows_of(self, scratch, frames):
+        return scratch[:len(self.phase) * frames].reshape(len(self.phase), frames)
+
+    def process(self, audio, frames):
+        if frames > self.max_frames:
+            # Keep what's in the delay line, it only has to grow
+            old, pos = self.buffer, self.write_pos
+            self.max_frames = frames
+            self.buffer_size = int(np.ceil(self.window)) + frames + 2
+            self.buffer = np.zeros(self.buffer_size, dtype='float32')
+            self.buffer[:len(old)] = np.roll(old, -pos)
+            self.write_pos = len(old)
+            self._allocate(frames)
+        size = self.buffer_size
+
+        # Write the block into the circular buffer first, heads may read it
+        start = self.write_pos
+        first = min(frames, size - start)
+        self.buffer[start:start + first] = audio[:first]
+        self.buffer[:frames - first] = audio[first:frames]
+
+        # Phase of every head at every sample of the block, 0..1. Per-head
+        # columns and per-sample rows are spread over a whole scratch block
+        # first: numpy buffers any operand it has to broadcast
+        phases = self._rows_of(self._phases, frames)
+        spread = self._rows_of(self._whole, frames)
+        np.copyto(phases, self.steps)
+        np.copyto(spread, self._ramp[:frames])
+        phases *= spread
+        np.copyto(spread, self.phase[:, None])
+        phases += spread
+        np.mod(phases, 1.0, out=phases)
+        self.phase[:] = phases[:, -1]
+
+        # Read positions: delay = 1 + phase * window samples behind the write head
+        positions = self._rows_of(self._positions, frames)
+        np.multiply(phases, -self.window, out=positions)
+        row = self._row[:frames]
+        np.add(self._offsets[:frames], start - 1, out=row)
+        np.copyto(spread, row)
+        positions += spread
+        whole = self._rows_of(self._whole, frames)
+        np.floor(positions, out=whole)
+        positions -= whole
+        fraction = self._rows_of(self._fraction, frames)
+        fraction[:] = positions  # Between the two samples read; float32 to match them
+        np.mod(whole, size, out=whole)
+        index = self._rows_of(self._index, frames)
+        index[:] = whole
+        partner = self._rows_of(self._next, frames)
+        np.add(index, 1, out=partner)
+        np.mod(partner, size, out=partner)
+
+        # One gather for every head, then linear interpolation
+        # (mode='clip' on takes into `out`: the default 'raise' copies first)
+        samples = self._rows_of(self._samples, frames)
+        partners = self._rows_of(self._partners, frames)
+        np.take(self.buffer, index, out=samples, mode='clip')
+        np.take(self.buffer, partner, out=partners, mode='clip')
+        partners -= samples
+        partners *= fraction
+        samples += partners
+
+        # Crossfade: sin^2 of the phase, silent when the head jumps. Worked out
+        # in float64, a float32 `out` on float64 maths would allocate a cast buffer
+        np.multiply(phases, np.pi, out=positions)
+        np.sin(positions, out=positions)
+        np.square(positions, out=positions)
+        gains = self._rows_of(self._gains, frames)
+        gains[:] = positions
+        gains *= samples
+        wet = self._wet[:frames]
+        np.dot(self.head_levels, gains, out=wet)
+
+        self.write_pos = (start + frames) % size
+        out = self._out[:frames]
+        np.multiply(audio[:frames], self.ramp('dry_level', frames), out=out)
+        wet *= self.ramp('wet_level', frames)
+        out += wet
+        return out
@@ -9,6 +9,7 @@ class LearningEffects(Effect):
     
     def __init__(self, sample_rate):
         self.mode = 'simple_echo'  # Change this to try different effects
+        self.meter_tap = None      # Where 'analyze' sends audio (set by the app)
         super().__init__(sample_rate)
     
     @property
@@ -90,13 +91,13 @@ class LearningEffects(Effect):
             return np.maximum(audio, 0)
         
         # ===== ANALYSIS MODE =====
-        # Print out values to see what's happening
+        # Measure what's happening (type 'meter' in the menu to see it)
         
         elif self.mode == 'analyze':
-            # Print statistics about the audio
-            if frames > 0:
-                print(f"Min: {np.min(audio):.3f}, Max: {np.max(audio):.3f}, "
-                      f"Mean: {np.mean(audio):.3f}, RMS: {np.sqrt(np.mean(audio**2)):.3f}")
+            # Never print from here: console I/O in the audio callback causes
+            # dropouts. Hand the block to the meter thread, which does the maths
+            if self.meter_tap is not None:
+                self.meter_tap.push(audio, frames)
             return audio
         
         else:
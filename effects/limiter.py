@@ -0,0 +1,140 @@
+import numpy as np
+from .base import Effect
+from .graph import DelayLine
+
+
+class SlidingMax:
+    """
+    Maximum of the last `window` values (all >= 0), carried across blocks
+
+    van Herk / Gil-Werman: time is cut into blocks of `window` samples. A
+    window ending at offset j of block b covers offsets j+1.. of block b-1
+    and 0..j of block b, so its maximum is max(suffix max of block b-1 from
+    j+1, prefix max of block b up to j). Prefix maxima are a running
+    `maximum.accumulate`, the suffix maxima of a block are computed once
+    when it completes. About three comparisons per sample, whatever the
+    window length.
+    """
+
+    def __init__(self, window, max_frames=1024):
+        self.window = window
+        self.current = np.zeros(window, dtype='float32')     # Values of the unfinished block
+        self.suffix = np.zeros(window + 1, dtype='float32')  # Of the previous block; [window] stays 0
+        self._allocate(max_frames)
+        self.reset()
+
+    def _allocate(self, max_frames):
+        self.max_frames = max_frames
+        self.out = np.zeros(max_frames, dtype='float32')
+
+    def reset(self):
+        self.current[:] = 0.0
+        self.suffix[:] = 0.0
+        self.offset = 0     # Position in the unfinished block
+        self.prefix = 0.0   # Its running maximum
+
+    def process(self, values, frames):
+        if frames > self.max_frames:
+            self._allocate(frames)
+        k = self.window
+        out = self.out[:frames]
+        pos = 0
+        while pos < frames:
+            o = self.offset
+            n = min(frames - pos, k - o)
+            segment = values[pos:pos + n]
+            self.current[o:o + n] = segment
+            run = out[pos:pos + n]
+            np.maximum.accumulate(segment, out=run)
+            np.maximum(run, self.prefix, out=run)
+            self.prefix = float(run[-1])
+            np.maximum(run, self.suffix[o + 1:o + n + 1], out=run)
+            self.offset = o + n
+            if self.offset == k:
+                # Block finished: suffix[j] = max(current[j:]) serves the next block
+                np.maximum.accumulate(self.current[::-1], out=self.suffix[k - 1::-1])
+                self.offset = 0
+                self.prefix = 0.0
+            pos += n
+        return out
+
+
+class Limiter(Effect):
+    """
+    Lookahead brickwall limiter for the final output
+
+    Key Concepts:
+    - Lookahead: the audio is delayed by `lookahead_ms`, so the gain can
+      start coming down before a peak arrives instead of clipping it
+    - The gain needed at each sample is ceiling / (largest peak in the
+      last lookahead + hold samples), from a sliding maximum whose cost
+      does not depend on the window length
+    - That stepped gain is box-smoothed over the lookahead (a running sum).
+      Every value averaged is already low enough for the sample leaving the
+      delay line, so the average is too: the ceiling is never exceeded
+    - `hold_ms` keeps the gain down a little after a peak, so it doesn't
+      pump back up between the cycles of a low note
+    """
+
+    float64_state = ('_sum',)  # The running sum would drift in float32
+
+    def __init__(self, sample_rate, ceiling_db=-0.3, lookahead_ms=1.5, hold_ms=20.0):
+        self.ceiling_db = ceiling_db
+        self.lookahead_ms = lookahead_ms
+        self.hold_ms = hold_ms
+        super().__init__(sample_rate)
+
+    @property
+    def name(self):
+        return "Limiter"
+
+    def reset(self):
+        self.ceiling = 10 ** (self.ceiling_db / 20)
+        lookahead = max(1, int(self.sample_rate * self.lookahead_ms / 1000.0))
+        hold = int(self.sample_rate * self.hold_ms / 1000.0)
+        self.smoothing = lookahead + 1  # Box length: the oldest value averaged still covers the delayed sample
+        self.peaks = SlidingMax(lookahead + 1 + hold)
+        self.audio_delay = DelayLine(lookahead, max_frames=8192)
+        self.gain_delay = DelayLine(self.smoothing, max_frames=8192)  # What drops out of the running sum
+        # The box starts full of unity gain
+        self.gain_delay.buffer[:] = 1.0
+        self.gain_sum = float(self.smoothing)
+        self.latency = lookahead
+        self.reduction_db = 0.0  # Deepest gain reduction in the last block, for display
+        self._allocate(1024)
+
+    def _allocate(self, max_frames):
+        self.max_frames = max_frames
+        self._level = np.zeros(max_frames, dtype='float32')
+        self._gain = np.zeros(max_frames, dtype='float32')
+        self._sum = np.zeros(max_frames, dtype='float64')
+        self._out = np.zeros(max_frames, dtype='float32')
+
+    def process(self, audio, frames):
+        if frames > self.max_frames:
+            self._allocate(frames)
+        level = self._level[:frames]
+        np.abs(audio[:frames], out=level)
+        peak = self.peaks.process(level, frames)
+
+        # Gain each sample needs: ceiling / peak, never above 1
+        gain = self._gain[:frames]
+        np.maximum(peak, self.ceiling, out=gain)
+        np.divide(self.ceiling, gain, out=gain)
+
+        # Running sum over the last `smoothing` gains: add the new, drop the oldest
+        running = self._sum[:frames]
+        np.subtract(gain, self.gain_delay.process(gain, frames), out=running)
+        np.cumsum(running, out=running)
+        running += self.gain_sum
+        self.gain_sum = float(running[-1])
+
+        out = self._out[:frames]
+        np.multiply(running, 1.0 / self.smoothing, out=gain)
+        np.multiply(self.audio_delay.process(audio, frames), gain, out=out)
+        self.reduction_db = 20.0 * np.log10(max(float(gain.min()), 1e-6))
+        return out
+
+    def status_text(self):
+        """Compact key=value text for streamed status lines"""
+        return f"limiter.gr={self.reduction_db:.1f}"
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+class LoopLayer:
+    """
+    One overdub layer stored compactly as int16 with a scale per chunk
+
+    Each chunk is normalised to its own peak before quantising, so quiet
+    passages keep their resolution. Half the memory of float32, and a
+    layer can be added to or removed from a mixdown one chunk at a time.
+    """
+
+    def __init__(self, length, chunk_size=4096):
+        self.length = length
+        self.chunk_size = chunk_size
+        self.num_chunks = -(-length // chunk_size)
+        self.samples = np.zeros(length, dtype='int16')
+        self.scales = np.zeros(self.num_chunks, dtype='float32')
+        self.muted = False
+        self._scratch = np.zeros(chunk_size, dtype='float32')  # encode() runs on the audio thread
+
+    def bounds(self, chunk):
+        """Sample range [start, stop) covered by a chunk"""
+        start = chunk * self.chunk_size
+        return start, min(start + self.chunk_size, self.length)
+
+    def decode(self, chunk, out):
+        """Write the chunk's float samples into `out` (length of the chunk)"""
+        start, stop = self.bounds(chunk)
+        np.multiply(self.samples[start:stop], self.scales[chunk], out=out)
+        return out
+
+    def encode(self, chunk, data):
+        """Quantise float samples into the chunk, without allocating"""
+        start, stop = self.bounds(chunk)
+        scratch = self._scratch[:stop - start]
+        np.abs(data, out=scratch)
+        peak = float(scratch.max()) if len(scratch) else 0.0
+        if peak == 0.0:
+            self.samples[start:stop] = 0
+            self.scales[chunk] = 0.0
+            return
+        scale = peak / 32767.0
+        np.divide(data, scale, out=scratch)
+        np.rint(scratch, out=scratch)
+        self.samples[start:stop] = scratch  # A rint straight into int16 would allocate a cast buffer
+        self.scales[chunk] = scale
+
+    def add_chunk_to(self, mixdown, chunk, decoded, sign=1.0):
+        """Add (or with sign=-1, remove) one chunk of this layer from a mixdown, decoded into `decoded`"""
+        start, stop = self.bounds(chunk)
+        part = self.decode(chunk, decoded[:stop - start])
+        if sign < 0:
+            mixdown[start:stop] -= part
+        else:
+            mixdown[start:stop] += part
+
+    def add_to(self, mixdown, sign=1.0):
+        """Add (or with sign=-1, remove) this layer from a mixdown, chunk by chunk"""
+        decoded = np.empty(self.chunk_size, dtype='float32')
+        for chunk in range(self.num_chunks):
+            self.add_chunk_to(mixdown, chunk, decoded, sign)
@@ -1,16 +1,32 @@
 import numpy as np
 from .base import Effect
+from .looper_storage import RamLoopStorage
+from .loop_layers import LoopLayer
 
 class Looper(Effect):
-    def __init__(self, sample_rate):
-        self.max_loop_seconds = 30.0  # Maximum loop length
-        self.max_loop_samples = int(self.max_loop_seconds * sample_rate)
+    def __init__(self, sample_rate, storage=None):
+        # Where the loop lives - RAM by default, or a MemmapLoopStorage
+        # for multi-minute loops that spill to disk
+        if storage is None:
+            storage = RamLoopStorage(sample_rate, max_seconds=30.0)
+        self.storage = storage
+        self.max_loop_samples = storage.capacity  # Maximum loop length
+        self.max_loop_seconds = self.max_loop_samples / sample_rate
+        
+        # Overdubs are captured a chunk at a time, then folded into the
+        # storage buffer, which always holds the running mixdown
+        self.layer_chunk_size = 4096
+        self._take = np.zeros(self.layer_chunk_size, dtype='float32')
+        self._old = np.zeros(self.layer_chunk_size, dtype='float32')
+        self._new = np.zeros(self.layer_chunk_size, dtype='float32')
+        # Undo and mute rewrite the mixdown this many chunks per block
+        self.layer_mix_chunks = 4
         
         super().__init__(sample_rate)
         
     def reset(self):
-        # Loop buffer
-        self.loop_buffer = np.zeros(self.max_loop_samples, dtype='float32')
+        # Loop buffer is owned by the storage and never reallocated here
+        self.storage.use_scratch()
         self.loop_length = 0
         self.loop_position = 0
         
@@ -19,6 +35,16 @@ class Looper(Effect):
         self.is_playing = False
         self.record_position = 0
         
+        # Overdub layers (the first take lives only in the mixdown)
+        self.layers = []
+        self.is_overdubbing = False
+        self._overdub_layer = None
+        self._take_chunk = -1
+        self._mix_layer = None  # Layer being added to or removed from the mixdown
+        self._mix_sign = 1.0
+        self._mix_chunk = 0
+        self._mix_left = 0
+        
     @property
     def name(self):
         return "Looper"
@@ -51,9 +77,151 @@ class Looper(Effect):
         """Toggle playback on/off (keep loop in memory)"""
         if self.loop_length > 0:
             self.is_playing = not self.is_playing
+            if not self.is_playing:
+                self.is_overdubbing = False
             return "Playing" if self.is_playing else "Paused"
         return "No loop to play"
     
+    def start_overdub(self, on_audio_thread=None):
+        """
+        Start recording a new layer on top of the playing loop
+
+        Call it off the audio thread: a loop mapped from a file is copied
+        to writable storage here. The layer is switched in through
+        `on_audio_thread(action)` (e.g. the control queue), which checks
+        again that the last take has been committed.
+        """
+        run = on_audio_thread or (lambda action: action())
+        if self.is_recording or not self.is_playing or self.loop_length == 0:
+            return "Nothing to overdub onto"
+        if self.is_overdubbing:
+            return "Already overdubbing"
+        busy = self._layers_busy()
+        if busy:
+            return busy
+        self.storage.make_writable(self.loop_length)
+        layer = LoopLayer(self.loop_length, self.layer_chunk_size)
+        return run(lambda: self._begin_overdub(layer))
+    
+    def _begin_overdub(self, layer):
+        busy = self._layers_busy()
+        if busy:
+            return busy
+        if self.is_recording or not self.is_playing or self.loop_length != layer.length:
+            return "Nothing to overdub onto"
+        self._overdub_layer = layer
+        self.layers.append(layer)
+        self.is_overdubbing = True
+        return f"Overdubbing layer {len(self.layers)}..."
+    
+    def stop_overdub(self, on_audio_thread=None):
+        """Stop overdubbing, the layer is kept (the audio thread commits the last chunk)"""
+        run = on_audio_thread or (lambda action: action())
+        return run(self._end_overdub)
+    
+    def _end_overdub(self):
+        if not self.is_overdubbing:
+            return "Not overdubbing"
+        self.is_overdubbing = False
+        return f"Layer {len(self.layers)} added"
+    
+    def toggle_overdub(self, on_audio_thread=None):
+        """Start or stop overdubbing"""
+        if self.is_overdubbing:
+            return self.stop_overdub(on_audio_thread)
+        return self.start_overdub(on_audio_thread)
+    
+    def _layers_busy(self):
+        """Why the layers can't be edited right now, or None"""
+        if self.is_overdubbing or self._take_chunk >= 0:
+            return "Stop overdubbing first"
+        if self._mix_layer is not None:
+            return "Still applying the last layer change"
+        return None
+    
+    def undo_layer(self):
+        """
+        Remove the last overdub layer (call on the audio thread)
+
+        Its contribution is subtracted from the mixdown chunk by chunk,
+        by process(), the remaining layers are never re-summed.
+        """
+        busy = self._layers_busy()
+        if busy:
+            return busy
+        if not self.layers:
+            return "No layers to undo"
+        layer = self.layers.pop()
+        if not layer.muted:
+            self._start_layer_mix(layer, -1.0)
+        return f"Layer {len(self.layers) + 1} undone"
+    
+    def toggle_layer_mute(self, index):
+        """Mute/unmute an overdub layer (0-based, call on the audio thread)"""
+        busy = self._layers_busy()
+        if busy:
+            return busy
+        if not 0 <= index < len(self.layers):
+            return "Invalid layer number"
+        layer = self.layers[index]
+        self._start_layer_mix(layer, 1.0 if layer.muted else -1.0)
+        layer.muted = not layer.muted
+        return f"Layer {index + 1} {'muted' if layer.muted else 'unmuted'}"
+    
+    def _start_layer_mix(self, layer, sign):
+        # From the chunk under the playhead on, so the change is heard from
+        # there; process() stays well ahead of playback as it goes round
+        self._mix_layer = layer
+        self._mix_sign = sign
+        self._mix_chunk = min(self.loop_position // self.layer_chunk_size, layer.num_chunks - 1)
+        self._mix_left = layer.num_chunks
+    
+    def _mix_layer_chunks(self):
+        """Add or remove the next few chunks of the pending layer change"""
+        layer = self._mix_layer
+        for _ in range(min(self.layer_mix_chunks, self._mix_left)):
+            layer.add_chunk_to(self.storage.buffer, self._mix_chunk, self._old, self._mix_sign)
+            self._mix_chunk = (self._mix_chunk + 1) % layer.num_chunks
+            self._mix_left -= 1
+        if self._mix_left == 0:
+            self._mix_layer = None
+    
+    def save_loop(self, path):
+        """Save the current loop to a file"""
+        if self.loop_length == 0 or self.is_recording:
+            return "No loop to save"
+        self.storage.save(path, self.loop_length)
+        return f"Loop saved to {path}"
+    
+    def load_loop(self, path, on_audio_thread=None):
+        """
+        Load a loop file and start playing it
+
+        Call it off the audio thread, the file is read here. The looper is
+        stopped before the storage is touched and started once it is
+        loaded, both through `on_audio_thread(action)` (e.g. the control
+        queue), so the callback never sees a half-loaded loop or a
+        loop_length of 0 while it is playing.
+        """
+        run = on_audio_thread or (lambda action: action())
+        run(self.reset)
+        try:
+            length = self.storage.load(path)
+        except (OSError, ValueError) as e:
+            return f"Could not load loop: {e}"
+        run(lambda: self._start_loaded(length))
+        duration = length / self.sample_rate
+        return f"Loop loaded ({duration:.1f}s) - Playing back"
+    
+    def _start_loaded(self, length):
+        self.loop_length = length
+        self.loop_position = 0
+        self.is_playing = length > 0
+    
+    def close(self):
+        """Release the loop storage"""
+        self.storage.close()
+    
     def clear_loop(self):
         """Clear the current loop"""
         self.reset()
@@ -61,6 +229,17 @@ class Looper(Effect):
     
     def get_status(self):
         """Get current looper status"""
+        status = self._transport_status()
+        if self.is_overdubbing:
+            status = f"ODUB {status}"
+        if self.layers:
+            muted = sum(1 for layer in self.layers if layer.muted)
+            status += f" +{len(self.layers)} layers"
+            if muted:
+                status += f" ({muted} muted)"
+        return status
+    
+    def _transport_status(self):
         if self.is_recording:
             duration = self.record_position / self.sample_rate
             return f"REC [{duration:.1f}s]"
@@ -74,32 +253,81 @@ class Looper(Effect):
         else:
             return "EMPTY"
     
+    def _capture_overdub(self, audio, i, n):
+        """Copy input into the take chunk, returns how many samples fit in it"""
+        position = self.loop_position
+        chunk = position // self.layer_chunk_size
+        if chunk != self._take_chunk:
+            if self._take_chunk >= 0:
+                self._commit_overdub_chunk()
+            self._take[:] = 0.0
+            self._take_chunk = chunk
+        offset = position - chunk * self.layer_chunk_size
+        n = min(n, self.layer_chunk_size - offset)
+        self._take[offset:offset + n] = audio[i:i + n]
+        return n
+    
+    def _commit_overdub_chunk(self):
+        """
+        Fold the captured chunk into the overdub layer and the mixdown
+
+        Only the difference between the layer's old and new (quantised)
+        chunk is added, so the mixdown stays exactly the sum of its layers.
+        """
+        layer = self._overdub_layer
+        chunk = self._take_chunk
+        start, stop = layer.bounds(chunk)
+        n = stop - start
+        old = layer.decode(chunk, self._old[:n])
+        new = self._new[:n]
+        np.add(old, self._take[:n], out=new)
+        layer.encode(chunk, new)
+        layer.decode(chunk, new)
+        new -= old
+        self.storage.buffer[start:stop] += new
+        self._take_chunk = -1
+    
     def process(self, audio, frames):
-        out = np.zeros_like(audio)
+        out = audio.copy()  # Input always passes through
+        buffer = self.storage.buffer
+        start = 0
         
-        for i in range(frames):
-            input_sample = audio[i]
-            output_sample = input_sample
-            
-            if self.is_recording:
-                # Record input into buffer
-                if self.record_position < self.max_loop_samples:
-                    self.loop_buffer[self.record_position] = input_sample
-                    self.record_position += 1
-                else:
-                    # Auto-stop if max length reached
-                    self.stop_recording()
-                
-                output_sample = input_sample  # Pass through while recording
-            
-            if self.is_playing and self.loop_length > 0:
-                # Play back loop
-                loop_sample = self.loop_buffer[self.loop_position]
-                output_sample = input_sample + loop_sample  # Mix input with loop
-                
-                # Advance loop position
-                self.loop_position = (self.loop_position + 1) % self.loop_length
-            
-            out[i] = output_sample
+        if self.is_recording:
+            # Record input into buffer, one slice per block
+            n = min(frames, self.max_loop_samples - self.record_position)
+            buffer[self.record_position:self.record_position + n] = audio[:n]
+            self.record_position += n
+            start = n
+            if start < frames:
+                # Auto-stop if max length reached, rest of the block plays back
+                self.stop_recording()
+        
+        if self.is_playing and self.loop_length > 0:
+            # Play back loop, wrapping at the loop length
+            i = start
+            while i < frames:
+                n = min(frames - i, self.loop_length - self.loop_position)
+                if self.is_overdubbing:
+                    n = self._capture_overdub(audio, i, n)
+                out[i:i + n] += buffer[self.loop_position:self.loop_position + n]  # Mix input with loop
+                i += n
+                self.loop_position = (self.loop_position + n) % self.loop_length
+                if self.loop_position == 0 and self._take_chunk >= 0:
+                    # Wrapped: commit the take before the next pass writes over
+                    # it (a loop shorter than a chunk never changes chunk)
+                    self._commit_overdub_chunk()
+        
+        if not self.is_overdubbing and self._take_chunk >= 0:
+            # Overdub just stopped - fold in the partial chunk
+            self._commit_overdub_chunk()
+        
+        if self._mix_layer is not None:
+            self._mix_layer_chunks()
+        
+        # Let the storage page in whatever comes next
+        if self.is_recording:
+            self.storage.set_cursor(self.record_position, self.max_loop_samples, True)
+        else:
+            self.storage.set_cursor(self.loop_position, self.loop_length, False)
         
-        return out
\ No newline at end of file
+        return out
@@ -0,0 +1,211 @@
+import mmap
+import os
+import tempfile
+import threading
+import numpy as np
+
+
+class RamLoopStorage:
+    """Loop storage held entirely in memory (the original Looper behaviour)"""
+
+    def __init__(self, sample_rate, max_seconds=30.0):
+        self.sample_rate = sample_rate
+        self.capacity = int(max_seconds * sample_rate)
+        # Allocated once - clearing a loop only resets the Looper's counters
+        self.buffer = np.zeros(self.capacity, dtype='float32')
+
+    def set_cursor(self, position, length, recording):
+        """RAM is always resident, nothing to page in"""
+        pass
+
+    def save(self, path, length):
+        """Write the first `length` samples to a .npy file"""
+        np.save(path, self.buffer[:length])
+
+    def load(self, path):
+        """Load a .npy loop file, returns its length in samples"""
+        data = np.load(path, mmap_mode='r')
+        if data.dtype != np.float32 or data.ndim != 1:
+            raise ValueError(f"{path} is not a mono float32 loop file")
+        length = min(len(data), self.capacity)
+        self.buffer[:length] = data[:length]
+        return length
+
+    def use_scratch(self):
+        pass
+
+    def make_writable(self, length):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemmapLoopStorage:
+    """
+    Long-form loop storage backed by a chunked np.memmap file
+
+    The loop lives in a .npy file on disk rather than in RAM. A background
+    pager thread follows the Looper's cursor: chunks ahead of it are touched
+    so their pages are resident before the audio callback gets there, and
+    chunks behind a recording cursor are flushed to disk. The callback only
+    ever reads/writes pages the pager has already brought in.
+    """
+
+    def __init__(self, sample_rate, max_seconds=600.0, path=None,
+                 chunk_seconds=0.5, chunks_ahead=4, interval=0.05):
+        self.sample_rate = sample_rate
+        self.capacity = int(max_seconds * sample_rate)
+        self.chunk_size = max(1, int(chunk_seconds * sample_rate))
+        self.chunks_ahead = chunks_ahead
+        self.interval = interval
+
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix='looper-', suffix='.npy')
+            os.close(fd)
+            self._owns_file = True
+        else:
+            self._owns_file = False
+        self.path = path
+
+        self._scratch = np.lib.format.open_memmap(
+            path, mode='w+', dtype='float32', shape=(self.capacity,)
+        )
+        # The callback only reads this reference, swapping it is atomic
+        self.buffer = self._scratch
+
+        # Cursor published by the audio thread, consumed by the pager
+        self._cursor = 0
+        self._length = self.capacity
+        self._recording = False
+        self._flushed_chunk = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._pager, daemon=True)
+        self._thread.start()
+
+    def set_cursor(self, position, length, recording):
+        """Called from the audio thread - only stores a few values"""
+        self._cursor = position
+        self._length = length
+        self._recording = recording
+
+    def _touch_chunk(self, data, chunk):
+        start = chunk * self.chunk_size
+        if start >= len(data):
+            return
+        stop = min(start + self.chunk_size, len(data))
+        # One read per page is enough to fault it in. Never write: a
+        # read-modify-write here could undo samples the callback records
+        # into the same page at the same moment. Its first write to a
+        # resident page is only a cheap minor fault
+        step = max(1, 4096 // data.itemsize)
+        data[start:stop:step].sum()
+
+    def _pager(self):
+        while not self._stop.wait(self.interval):
+            data = self.buffer
+            cursor = self._cursor
+            recording = self._recording and data is self._scratch
+            current = cursor // self.chunk_size
+            # Playback wraps at the loop length, so look ahead modulo that
+            n_chunks = max(1, -(-self._length // self.chunk_size))
+
+            # Fill ahead: pages the callback will need next
+            for k in range(1, self.chunks_ahead + 1):
+                chunk = current + k if recording else (current + k) % n_chunks
+                self._touch_chunk(data, chunk)
+
+            # Spill behind: once the recorder has left a chunk, push it to disk
+            if recording and current > self._flushed_chunk:
+                self._flush_chunks(self._flushed_chunk, current)
+                self._flushed_chunk = current
+            elif not recording:
+                self._flushed_chunk = 0
+
+    def _flush_chunks(self, first, stop):
+        """
+        Write chunks [first, stop) of the scratch file to disk
+
+        Only their pages are synced, never the chunk the callback is
+        recording into: pages under writeback can stall a write to them.
+        """
+        data = self._scratch
+        # The mapping starts on an allocation boundary, the array `offset % granularity` into it
+        base = data.offset % mmap.ALLOCATIONGRANULARITY
+        start = base + first * self.chunk_size * data.itemsize
+        end = base + min(stop * self.chunk_size, len(data)) * data.itemsize
+        start -= start % mmap.ALLOCATIONGRANULARITY
+        end -= end % mmap.PAGESIZE  # A page shared with the current chunk waits for the next flush
+        if end > start:
+            data._mmap.flush(start, end - start)
+
+    def save(self, path, length):
+        """
+        Save the loop as a standalone .npy file
+
+        Written sequentially in chunks so a long loop never needs
+        to be held in memory as a whole. It goes to a temporary file that
+        then replaces `path`: the loop may be playing from a mapping of
+        that very file (after a load), and opening it for writing would
+        truncate it under the mapping.
+        """
+        if self.buffer is self._scratch:
+            self._scratch.flush()
+        fd, temp_path = tempfile.mkstemp(prefix='.looper-', suffix='.npy',
+                                         dir=os.path.dirname(os.path.abspath(path)))
+        os.close(fd)
+        try:
+            out = np.lib.format.open_memmap(temp_path, mode='w+', dtype='float32', shape=(length,))
+            for start in range(0, length, self.chunk_size):
+                stop = min(start + self.chunk_size, length)
+                out[start:stop] = self.buffer[start:stop]
+            out.flush()
+            del out
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def load(self, path):
+        """
+        Map a saved loop file for playback - nothing is copied, so loading
+        is instant regardless of loop length. Returns its length in samples.
+        """
+        data = np.load(path, mmap_mode='r')
+        if data.dtype != np.float32 or data.ndim != 1:
+            raise ValueError(f"{path} is not a mono float32 loop file")
+        length = min(len(data), self.capacity)
+        self._touch_chunk(data, 0)
+        self.buffer = data
+        return length
+
+    def use_scratch(self):
+        """Switch back to the writable scratch file before recording"""
+        self.buffer = self._scratch
+
+    def make_writable(self, length):
+        """
+        Overdubs write into the loop, so a loop mapped read-only from a
+        saved file is first copied into the scratch file
+        """
+        if self.buffer is self._scratch:
+            return
+        source = self.buffer
+        for start in range(0, length, self.chunk_size):
+            stop = min(start + self.chunk_size, length)
+            self._scratch[start:stop] = source[start:stop]
+        self.buffer = self._scratch
+
+    def close(self):
+        """Stop the pager and remove the scratch file if we created it"""
+        self._stop.set()
+        self._thread.join()
+        self._scratch.flush()
+        self.buffer = None
+        self._scratch = None
+        if self._owns_file:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
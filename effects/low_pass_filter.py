@@ -1,8 +1,17 @@
 import numpy as np
+from itertools import repeat
 from .base import Effect
+from .parameters import Parameter
+from .denormal import flush_value
 from config import LPF_COEFF
 
 class LowPassFilter(Effect):
+    coeff = Parameter(0.0, 1.0)
+    
+    def __init__(self, sample_rate):
+        self.coeff = LPF_COEFF  # Smoothing factor 0-1, defaults to config
+        super().__init__(sample_rate)
+    
     def reset(self):
         self.prev_lpf = 0.0
     
@@ -11,14 +20,16 @@ class LowPassFilter(Effect):
         return "Low-Pass Filter"
     
     def process(self, audio, frames):
-        alpha = LPF_COEFF
+        # Smoothed coefficient: one value for the block, or one per sample while it ramps
+        alphas = self.ramp('coeff', frames)
+        alphas = repeat(alphas, len(audio)) if np.isscalar(alphas) else alphas.tolist()
         out = np.empty_like(audio)
         
-        self.prev_lpf = self.prev_lpf + alpha * (audio[0] - self.prev_lpf)
-        out[0] = self.prev_lpf
-        
-        for i in range(1, len(audio)):
-            self.prev_lpf = self.prev_lpf + alpha * (audio[i] - self.prev_lpf)
+        # Python floats: the filter state stays float64 instead of rounding to float32 each sample
+        for i, (sample, alpha) in enumerate(zip(audio.tolist(), alphas)):
+            self.prev_lpf = self.prev_lpf + alpha * (sample - self.prev_lpf)
             out[i] = self.prev_lpf
         
+        self.prev_lpf = flush_value(self.prev_lpf)  # Decays toward denormals in silence
+        
         return out
\ No newline at end of file
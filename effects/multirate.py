@@ -0,0 +1,210 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from .base import Effect
+from .reblock import Reblocker
+from .graph import DelayLine
+
+
+def lowpass_taps(factor, taps_per_phase, passband=0.9):
+    """Kaiser-windowed sinc for a rate change of `factor`, unity DC gain"""
+    length = factor * taps_per_phase
+    cutoff = passband * 0.5 / factor  # In cycles per full-rate sample
+    n = np.arange(length) - (length - 1) / 2.0
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, 8.0)
+    return taps / np.sum(taps)
+
+
+class PolyphaseDecimator:
+    """
+    Low-pass filter and keep every `factor`-th sample, in one step
+
+    Only the kept outputs are computed: each is one dot product of the
+    filter with the `len(taps)` newest inputs, so the cost per input sample
+    is taps / factor. The tail of the previous block is kept so blocks join
+    seamlessly. `process` takes a multiple of `factor` samples.
+
+    The strided window views over the buffer are built once per block size
+    and reused, building one costs more than the filtering itself.
+    """
+
+    def __init__(self, taps, factor, max_frames=1024):
+        self.factor = factor
+        self.reversed_taps = np.ascontiguousarray(taps[::-1], dtype='float32')
+        self.length = len(taps)
+        self._allocate(max_frames)
+
+    def _allocate(self, max_frames):
+        self.max_frames = max_frames
+        self.buffer = np.zeros(self.length - self.factor + max_frames, dtype='float32')
+        self.out = np.zeros(max_frames // self.factor, dtype='float32')
+        self._views = {}
+
+    def reset(self):
+        self.buffer[:] = 0.0
+
+    def process(self, audio, frames):
+        if frames > self.max_frames:
+            history = self.buffer[:self.length - self.factor].copy()
+            self._allocate(frames)
+            self.buffer[:len(history)] = history
+        keep = self.length - self.factor
+        self.buffer[keep:keep + frames] = audio[:frames]
+        if frames not in self._views:
+            # Row m is the filter's window ending at input sample m * factor + factor - 1
+            self._views[frames] = (sliding_window_view(self.buffer[:keep + frames], self.length)[::self.factor],
+                                   self.out[:frames // self.factor])
+        windows, out = self._views[frames]
+        np.matmul(windows, self.reversed_taps, out=out)
+        self.buffer[:keep] = self.buffer[frames:frames + keep]
+        return out
+
+
+class PolyphaseInterpolator:
+    """
+    Raise the rate by `factor`: zero-stuff and low-pass, without the zeros
+
+    The filter is split into `factor` phases of `len(taps) / factor` taps;
+    output phase p of each input sample only meets the taps that line up
+    with real (non-zero) samples. All phases come out of one matrix product
+    of the input windows with the (taps_per_phase, factor) phase matrix.
+    """
+
+    def __init__(self, taps, factor, max_frames=1024):
+        self.factor = factor
+        self.taps_per_phase = len(taps) // factor
+        # phases[i, p] = factor * taps[(P - 1 - i) * factor + p]: newest input meets the first taps
+        self.phases = np.ascontiguousarray(factor * np.asarray(taps).reshape(self.taps_per_phase, factor)[::-1],
+                                           dtype='float32')
+        self._allocate(max_frames)
+
+    def _allocate(self, max_frames):
+        self.max_frames = max_frames
+        self.buffer = np.zeros(self.taps_per_phase - 1 + max_frames, dtype='float32')
+        self.out = np.zeros((max_frames, self.factor), dtype='float32')
+        self._views = {}  # Per block size, as in PolyphaseDecimator
+
+    def reset(self):
+        self.buffer[:] = 0.0
+
+    def process(self, audio, frames):
+        if frames > self.max_frames:
+            history = self.buffer[:self.taps_per_phase - 1].copy()
+            self._allocate(frames)
+            self.buffer[:len(history)] = history
+        keep = self.taps_per_phase - 1
+        self.buffer[keep:keep + frames] = audio[:frames]
+        if frames not in self._views:
+            out = self.out[:frames]
+            self._views[frames] = (sliding_window_view(self.buffer[:keep + frames], self.taps_per_phase),
+                                   out, out.reshape(-1))
+        windows, out, flat = self._views[frames]
+        np.matmul(windows, self.phases, out=out)
+        self.buffer[:keep] = self.buffer[frames:frames + keep]
+        return flat
+
+
+class MultiRate(Effect):
+    """
+    Runs an effect at 1/2 or 1/4 of the sample rate
+
+        reverb = MultiRate(48000, Reverb(48000 // 2), factor=2)
+
+    Key Concepts:
+    - The wrapped effect is built at the reduced rate, so every delay it
+      derives from its sample rate (echo time, comb and allpass lengths,
+      LFO rates, parameter glides) comes out right with half or a quarter
+      of the samples: buffers shrink and the per-sample work drops with them
+    - Polyphase filters: decimation only computes the samples it keeps and
+      interpolation never multiplies the stuffed zeros, so the conversion
+      costs len(taps) / factor multiplies per sample each way
+    - Only the wet signal is resampled. An effect with a `dry_gain` (Echo,
+      Reverb) is switched to `wet_only` and its dry signal is mixed back in
+      here at the full rate, delayed to line up with the wet one, so only
+      the repeats and the tail lose content above ~0.45 x the reduced rate
+      (10.8 kHz at 1/2 of 48 kHz). Any other effect passes through the
+      filters whole, its dry mix included
+    - Latency: the two linear-phase filters add len(taps) - factor samples,
+      plus the effect's own latency in full-rate samples. Blocks go through
+      a Reblocker, which adds factor - 1 more unless `block_frames` (the
+      caller's block size) is a multiple of `factor`
+    """
+
+    def __init__(self, sample_rate, effect, factor=2, taps_per_phase=16, block_frames=None):
+        if factor < 1 or sample_rate % factor or effect.sample_rate * factor != sample_rate:
+            raise ValueError(f"{effect.name} must be built at {sample_rate} / {factor} to run at 1/{factor} rate")
+        self.inner = effect
+        self.factor = factor
+        taps = lowpass_taps(factor, taps_per_phase)
+        self.decimator = PolyphaseDecimator(taps, factor)
+        self.interpolator = PolyphaseInterpolator(taps, factor)
+        self.filter_latency = len(taps) - factor
+        self.split_dry = factor > 1 and hasattr(effect, 'dry_gain')
+        if self.split_dry:
+            effect.wet_only = True
+            self.dry_delay = DelayLine(self.filter_latency + effect.latency * factor,
+                                       max_delay=self.filter_latency + effect.max_latency * factor)
+        self.reblocker = Reblocker(self._process_reduced, factor, multiple=True, frames=block_frames)
+        super().__init__(sample_rate)
+
+    @property
+    def name(self):
+        return f"{self.inner.name} (1/{self.factor} rate)"
+
+    def reset(self):
+        self.inner.reset()
+        self.decimator.reset()
+        self.interpolator.reset()
+        self.reblocker.reset()
+        if self.split_dry:
+            self.dry_delay.reset()
+
+    def snap_parameters(self):
+        self.inner.snap_parameters()
+
+    @property
+    def quality_tiers(self):
+        return self.inner.quality_tiers
+
+    @property
+    def quality(self):
+        return self.inner.quality
+
+    def set_quality(self, tier):
+        self.inner.set_quality(tier)
+
+    @property
+    def latency(self):
+        return self.filter_latency + self.inner.latency * self.factor + self.reblocker.latency
+
+    @property
+    def max_latency(self):
+        return self.filter_latency + self.inner.max_latency * self.factor + self.reblocker.max_latency
+
+    def _process_reduced(self, audio, frames):
+        if self.factor == 1:
+            return self.inner.process(audio, frames)
+        reduced = self.decimator.process(audio, frames)
+        processed = self.inner.process(reduced, len(reduced))
+        out = self.interpolator.process(processed, len(reduced))
+        if self.split_dry:
+            # The dry signal at the full rate, its gain held for each reduced-rate sample
+            self.dry_delay.set_delay(self.filter_latency + self.inner.latency * self.factor)
+            dry = self.dry_delay.process(audio, frames)
+            gain = self.inner.dry_gain
+            if np.ndim(gain):
+                dry.reshape(-1, self.factor)[:] *= gain[:, None]
+            else:
+                dry *= gain
+            out += dry
+        return out
+
+    def process(self, audio, frames):
+        return self.reblocker.process(audio, frames)
+
+
+def reduced_rate(effect_class, sample_rate, factor=1, block_frames=None, **kwargs):
+    """An effect built at sample_rate / factor and wrapped in MultiRate (as is for factor 1)"""
+    if factor == 1:
+        return effect_class(sample_rate, **kwargs)
+    return MultiRate(sample_rate, effect_class(sample_rate // factor, **kwargs), factor,
+                     block_frames=block_frames)
@@ -0,0 +1,188 @@
+import numpy as np
+
+
+class SmoothedValue:
+    """
+    A value that glides to its target instead of jumping
+
+    `block(frames)` returns a plain float while the value is settled, so a
+    parameter at rest costs nothing per sample. While moving it returns a
+    float32 ramp of `frames` values (linear or exponential) written into a
+    buffer that is reused between blocks.
+
+    `set` may be called from any thread: it publishes the new ramp as one
+    (target, samples, coeff) tuple, which `block` picks up whole at the
+    start of a block. Only the audio thread touches the ramp's running
+    state, so a block never sees a new target with the old step.
+    """
+
+    def __init__(self, value, smoothing_ms=20.0, curve='linear'):
+        self.current = float(value)
+        self.target = float(value)  # Latest requested, for display
+        self.smoothing_ms = smoothing_ms
+        self.curve = curve
+        self._request = (self.target, 1, 0.0)  # Published by set()
+        self._active = self._request            # The request block() ramps toward
+        self._goal = self.target
+        self._step = 0.0        # Linear: change per sample
+        self._remaining = 0     # Linear: samples left in the ramp
+        self._coeff = 0.0       # Exponential: per-sample decay toward target
+        self._buffer = np.zeros(0, dtype='float32')
+        self._index = np.zeros(0, dtype='float32')
+
+    @property
+    def moving(self):
+        return self.current != self._goal or self._request is not self._active
+
+    def set(self, value, sample_rate):
+        """Start a ramp toward `value` (from any thread)"""
+        target = float(value)
+        ramp_samples = max(1, int(sample_rate * self.smoothing_ms / 1000.0))
+        # Exponential: reach ~99% of the way (5 time constants) in smoothing_ms
+        coeff = float(np.exp(-5.0 / ramp_samples)) if self.curve == 'exponential' else 0.0
+        self.target = target
+        self._request = (target, ramp_samples, coeff)
+
+    def snap(self):
+        """Jump straight to the target"""
+        self._active = request = self._request
+        self._goal = self.current = request[0]
+        self._remaining = 0
+
+    def _take_request(self):
+        self._active = request = self._request
+        self._goal, self._remaining, self._coeff = request
+        self._step = (self._goal - self.current) / self._remaining
+
+    def _grow(self, frames):
+        if len(self._buffer) < frames:
+            self._buffer = np.zeros(frames, dtype='float32')
+            self._index = np.arange(1, frames + 1, dtype='float32')
+
+    def block(self, frames):
+        """Values for the next `frames` samples: a float if settled, else a ramp"""
+        if self._request is not self._active:
+            self._take_request()
+        if self.current == self._goal:
+            return self.current
+        self._grow(frames)
+        ramp = self._buffer[:frames]
+        index = self._index[:frames]
+
+        if self.curve == 'exponential':
+            # current + (target - current) * (1 - coeff^n), vectorised
+            np.power(self._coeff, index, out=ramp)
+            ramp *= self.current - self._goal
+            ramp += self._goal
+            last = float(ramp[-1])
+            if abs(last - self._goal) < 1e-6 * max(1.0, abs(self._goal)):
+                self.current = self._goal
+            else:
+                self.current = last
+        else:
+            n = min(frames, self._remaining)
+            np.multiply(index[:n], self._step, out=ramp[:n])
+            ramp[:n] += self.current
+            ramp[n:] = self._goal
+            self._remaining -= n
+            self.current = self._goal if self._remaining == 0 else float(ramp[n - 1])
+        return ramp
+
+
+class Parameter:
+    """
+    Declares a smoothed, automatable effect parameter
+
+        class Tremolo(Effect):
+            depth = Parameter(0.0, 1.0)
+
+    Assigning `self.depth = x` sets the target (the very first assignment
+    snaps), reading `self.depth` gives the target, and `self.ramp('depth',
+    frames)` gives the per-block values to use in the DSP.
+    """
+
+    def __init__(self, minimum=None, maximum=None, smoothing_ms=20.0, curve='linear'):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.smoothing_ms = smoothing_ms
+        self.curve = curve
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def clamp(self, value):
+        value = float(value)
+        if self.minimum is not None:
+            value = max(self.minimum, value)
+        if self.maximum is not None:
+            value = min(self.maximum, value)
+        return value
+
+    def state(self, obj):
+        return obj.__dict__.setdefault('_smoothed', {}).get(self.name)
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        state = self.state(obj)
+        if state is None:
+            raise AttributeError(self.name)
+        return state.target
+
+    def __set__(self, obj, value):
+        value = self.clamp(value)
+        state = self.state(obj)
+        if state is None:
+            obj._smoothed[self.name] = SmoothedValue(value, self.smoothing_ms, self.curve)
+        else:
+            state.set(value, obj.sample_rate)
+
+
+class ParameterRegistry:
+    """
+    Every smoothed parameter of a set of effects, addressed as
+    "EffectClass.param" (e.g. "Tremolo.depth")
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def register(self, effect, prefix=None):
+        # Wrappers (MultiRate) register the effect they run
+        effect = getattr(effect, 'inner', effect)
+        prefix = prefix or type(effect).__name__
+        for name in parameter_names(effect):
+            self._entries[f"{prefix}.{name}"] = (effect, name)
+
+    def names(self):
+        return list(self._entries)
+
+    def get(self, key):
+        effect, name = self._entries[key]
+        return getattr(effect, name)
+
+    def set(self, key, value):
+        """Set a parameter's target, the effect ramps to it. Raises KeyError"""
+        effect, name = self._entries[key]
+        setattr(effect, name, value)
+        return getattr(effect, name)
+
+    def bounds(self, key):
+        """(minimum, maximum) of a parameter, None where unbounded"""
+        effect, name = self._entries[key]
+        parameter = getattr(type(effect), name)
+        return parameter.minimum, parameter.maximum
+
+    def describe(self):
+        """One line per parameter with its current target"""
+        return [f"{key} = {self.get(key):g}" for key in self._entries]
+
+
+def parameter_names(effect):
+    """Names of the Parameter descriptors declared on an effect's class"""
+    names = []
+    for klass in reversed(type(effect).__mro__):
+        for name, attr in vars(klass).items():
+            if isinstance(attr, Parameter) and name not in names:
+                names.append(name)
+    return names
@@ -0,0 +1,267 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from .base import Effect
+from .parameters import Parameter
+from .reblock import Reblocker
+
+# np.fft writes into caller buffers from NumPy 2.0 on
+_FFT_OUT = np.lib.NumpyVersion(np.__version__) >= '2.0.0'
+
+
+class PitchShifter(Effect):
+    """
+    Phase-vocoder pitch shifter: clean ±12 semitones (e.g. drop tuning)
+
+    Key Concepts:
+    - STFT: every `hop` samples, take the last `fft_size` inputs through a
+      Hann window and an FFT
+    - Each bin's phase advance between frames reveals its true frequency
+      (the bin centre plus a small deviation)
+    - Shifting pitch = moving each bin's magnitude to bin k * ratio and
+      scaling its frequency by the same ratio
+    - Synthesis keeps a running phase per bin, so the shifted partials
+      stay continuous from frame to frame, then windowed overlap-add
+
+    Unlike PitchBend's read head, duration never changes, so there are no
+    wrap-around clicks. The cost is latency: `fft_size - hop` samples,
+    plus hop - gcd(hop, block size) if blocks don't come in whole hops
+    (`block_frames` is the caller's block size, None for any).
+    """
+
+    semitones = Parameter(-12.0, 12.0, smoothing_ms=50.0)
+    # Phases and their per-hop advances accumulate for the whole session.
+    # The rest of the spectral path is float64 too: NumPy's float32 FFTs and
+    # mixed-dtype ufuncs allocate working buffers on every call
+    float64_state = ('expected_advance', 'last_phase', 'synth_phase', 'source_phase', 'running',
+                     'phase', 'advance', 'shifted_advance', 'synth_phases', 'wraps', 'trig',
+                     'peak_phase', 'window', 'synthesis_window', 'centre', 'history', 'frames',
+                     'spectrum', 'magnitude', 'shifted_magnitude', 'synthesis', 'grains', 'overlap',
+                     '_valid', '_windows')
+
+    def __init__(self, sample_rate, fft_size=1024, hop=128, block_frames=None):
+        self.fft_size = fft_size
+        self.hop = hop
+        self.block_frames = block_frames
+        self.semitones = -2.0  # Drop D from standard, on every string
+        super().__init__(sample_rate)
+
+    @property
+    def name(self):
+        return f"Pitch Shift ({self.semitones:+g} st)"
+
+    def reset(self):
+        N, H = self.fft_size, self.hop
+        bins = N // 2 + 1
+        self.window = np.hanning(N + 1)[:N]  # Periodic Hann
+        # Overlap-added window² is flat; divide it out
+        self.ola_gain = float((self.window ** 2).reshape(N // H, H).sum(axis=0).mean())
+        self.synthesis_window = self.window / self.ola_gain
+        # Phase a bin-centred sine advances by in one hop
+        self.expected_advance = 2 * np.pi * H * np.arange(bins) / N
+        # (-1)^k moves the frame centre to time zero, so neighbouring bins of
+        # one partial share a phase and survive being shifted together
+        self.centre = np.where(np.arange(bins) % 2, -1.0, 1.0).astype('complex128')
+        # Phase accumulators (float64, they run for the whole session)
+        self.last_phase = np.zeros(bins)
+        self.synth_phase = np.zeros(bins)
+        self.bin_index = np.arange(bins)
+        self.source_phase = np.zeros(bins)
+        self.peak_phase = np.zeros(bins)
+        self.running = np.zeros(bins)
+        self._left = np.zeros(bins, dtype=np.intp)
+        self._right = np.zeros(bins, dtype=np.intp)
+        # _nearest_peak scratch
+        self._marked = np.zeros(bins, dtype=np.intp)
+        self._left_far = np.zeros(bins, dtype=np.intp)
+        self._right_far = np.zeros(bins, dtype=np.intp)
+        self._peak = np.zeros(bins, dtype=np.intp)
+        self._is_peak = np.zeros(bins, dtype=bool)
+        self._flags = np.zeros(bins, dtype=bool)
+        self._ratio = None
+        self._allocate(max_hops=8)
+        # Reblocked to whole hops, every full hop in one vectorized call
+        self.reblocker = Reblocker(self._process_hops, H, multiple=True, frames=self.block_frames)
+        self.latency = N - H + self.reblocker.latency
+
+    def _allocate(self, max_hops):
+        """All per-frame buffers, sized for up to max_hops frames per call"""
+        N, H = self.fft_size, self.hop
+        bins = N // 2 + 1
+        self.max_hops = max_hops
+        self.history = np.zeros(N - H + max_hops * H)
+        self.frames = np.zeros((max_hops, N))
+        self.spectrum = np.zeros((max_hops, bins), dtype='complex128')
+        self.magnitude = np.zeros((max_hops, bins))
+        self.phase = np.zeros((max_hops, bins))
+        self.advance = np.zeros((max_hops, bins))
+        self.shifted_magnitude = np.zeros((max_hops, bins))
+        self.shifted_advance = np.zeros((max_hops, bins))
+        self.synth_phases = np.zeros((max_hops, bins))
+        self.wraps = np.zeros((max_hops, bins))  # Scratch: whole turns, then cos/sin
+        self.trig = np.zeros((max_hops, bins))
+        self.synthesis = np.zeros((max_hops, bins), dtype='complex128')
+        self.grains = np.zeros((max_hops, N))
+        self.overlap = np.zeros(N + max_hops * H)
+        self._windows = {}  # Frame views of the history, per block size
+        self.output = np.zeros(max_hops * H, dtype='float32')
+
+    def _bin_map(self, ratio):
+        """Source bins for every output bin at this ratio (cached until it changes)"""
+        if ratio != self._ratio:
+            bins = self.fft_size // 2 + 1
+            source = np.round(np.arange(bins) / ratio).astype(np.intp)
+            self._valid = (source < bins).astype(np.float64)  # A gain, so no bool cast per block
+            self._source = np.where(source < bins, source, 0)
+            self._starts = None
+            if ratio < 1.0:
+                # Shifting down, several input bins land on each output bin:
+                # keep the strongest so a partial's peak bin is never skipped
+                targets = np.round(np.arange(bins) * ratio).astype(np.intp)
+                self._starts = np.searchsorted(targets, np.arange(targets[-1] + 1))
+            self._ratio = ratio
+        return self._source, self._valid, self._starts
+
+    def _nearest_peak(self, magnitude):
+        """Index of the closest local magnitude maximum, for every bin (into reused buffers)"""
+        index = self.bin_index
+        bins = len(index)
+        is_peak, flags, marked = self._is_peak, self._flags, self._marked
+        np.greater(magnitude[1:-1], magnitude[:-2], out=is_peak[1:-1])
+        np.greater_equal(magnitude[1:-1], magnitude[2:], out=flags[1:-1])
+        is_peak[1:-1] &= flags[1:-1]
+        if not is_peak.any():
+            return index
+        # Last peak at or before each bin, and first peak at or after it
+        left, right = self._left, self._right
+        marked.fill(-1)
+        np.copyto(marked, index, where=is_peak)
+        np.maximum.accumulate(marked, out=left)
+        marked.fill(bins)
+        np.copyto(marked, index, where=is_peak)
+        np.minimum.accumulate(marked[::-1], out=right[::-1])
+        left_far, right_far, peak = self._left_far, self._right_far, self._peak
+        np.subtract(index, left, out=left_far)
+        np.less(left, 0, out=flags)
+        left_far[flags] = bins
+        np.subtract(right, index, out=right_far)
+        np.greater_equal(right, bins, out=flags)
+        right_far[flags] = bins
+        np.less(right_far, left_far, out=flags)
+        np.copyto(peak, left)
+        np.copyto(peak, right, where=flags)
+        return peak
+
+    def _process_hops(self, audio, frames):
+        N, H = self.fft_size, self.hop
+        count = frames // H
+        if count > self.max_hops:
+            # Device block grew past what we planned for, keep the signal history
+            kept = self.history[:N - H].copy()
+            self._allocate(count)
+            self.history[:N - H] = kept
+
+        # Append the new input after the last N - H samples
+        self.history[N - H:N - H + frames] = audio[:frames]
+        if frames not in self._windows:
+            self._windows[frames] = sliding_window_view(self.history[:N - H + frames], N)[::H]
+        windows = self._windows[frames]
+        frames_in = self.frames[:count]
+        # Per-bin arrays meet the hops one row at a time: numpy buffers an
+        # operand it has to broadcast, or a strided one like these windows
+        for i in range(count):
+            np.multiply(windows[i], self.window, out=frames_in[i])
+        self.history[:N - H] = self.history[frames:frames + N - H]
+
+        # Analysis: magnitude and per-hop phase advance of every bin
+        spectrum = self.spectrum[:count]
+        if _FFT_OUT:
+            np.fft.rfft(frames_in, axis=1, out=spectrum)
+        else:
+            spectrum[:] = np.fft.rfft(frames_in, axis=1)
+        for row in spectrum:
+            row *= self.centre
+        magnitude = self.magnitude[:count]
+        np.abs(spectrum, out=magnitude)
+        phase = self.phase[:count]
+        np.arctan2(spectrum.imag, spectrum.real, out=phase)
+        advance = self.advance[:count]
+        np.subtract(phase[0], self.last_phase, out=advance[0])
+        np.subtract(phase[1:], phase[:-1], out=advance[1:])
+        self.last_phase[:] = phase[count - 1]
+        # Deviation from the bin centre, wrapped to ±pi, gives the true advance
+        for row in advance:
+            row -= self.expected_advance
+        wraps = self.wraps[:count]
+        np.divide(advance, 2 * np.pi, out=wraps)
+        np.round(wraps, out=wraps)
+        wraps *= 2 * np.pi
+        advance -= wraps
+        for row in advance:
+            row += self.expected_advance
+
+        # Shift: output bin k takes bin k / ratio, at ratio times the frequency
+        semitones = self.ramp('semitones', frames)
+        ratio = 2.0 ** ((semitones if isinstance(semitones, float) else float(semitones[-1])) / 12.0)
+        source, valid, starts = self._bin_map(ratio)
+        shifted_magnitude = self.shifted_magnitude[:count]
+        if starts is None:
+            np.take(magnitude, source, axis=1, out=shifted_magnitude, mode='clip')
+            for row in shifted_magnitude:
+                row *= valid
+        else:
+            np.maximum.reduceat(magnitude, starts, axis=1, out=shifted_magnitude[:, :len(starts)])
+            shifted_magnitude[:, len(starts):] = 0.0
+        shifted_advance = self.shifted_advance[:count]
+        np.take(advance, source, axis=1, out=shifted_advance, mode='clip')
+        shifted_advance *= ratio
+
+        # Synthesis: each spectral peak keeps a running phase; the bins around
+        # it follow with their analysis phase offsets (identity phase locking),
+        # otherwise neighbouring bins drift apart and the partial cancels itself
+        synth_phases = self.synth_phases[:count]
+        source_phase = self.source_phase
+        # (mode='clip' on takes into `out`: the default 'raise' copies first)
+        for i in range(count):
+            np.take(phase[i], source, out=source_phase, mode='clip')
+            peak = self._nearest_peak(shifted_magnitude[i])
+            np.add(self.synth_phase, shifted_advance[i], out=self.running)
+            np.take(self.running, peak, out=synth_phases[i], mode='clip')
+            synth_phases[i] += source_phase
+            np.take(source_phase, peak, out=self.peak_phase, mode='clip')
+            synth_phases[i] -= self.peak_phase
+            np.mod(synth_phases[i], 2 * np.pi, out=self.synth_phase)
+        synthesis = self.synthesis[:count]
+        trig = self.trig[:count]
+        np.cos(synth_phases, out=trig)
+        np.multiply(shifted_magnitude, trig, out=synthesis.real)
+        np.sin(synth_phases, out=trig)
+        np.multiply(shifted_magnitude, trig, out=synthesis.imag)
+        for row in synthesis:
+            row *= self.centre
+
+        grains = self.grains[:count]
+        if _FFT_OUT:
+            np.fft.irfft(synthesis, n=N, axis=1, out=grains)
+        else:
+            grains[:] = np.fft.irfft(synthesis, n=N, axis=1)
+        for row in grains:
+            row *= self.synthesis_window
+
+        # Overlap-add; the first `frames` samples are now complete
+        for i in range(count):
+            self.overlap[i * H:i * H + N] += grains[i]
+        output = self.output[:frames]
+        output[:] = self.overlap[:frames]
+        tail = (count - 1) * H + N
+        self.overlap[:tail - frames] = self.overlap[frames:tail]
+        self.overlap[tail - frames:tail] = 0.0
+        return output
+
+    @property
+    def max_latency(self):
+        return self.fft_size - self.hop + self.reblocker.max_latency
+
+    def process(self, audio, frames):
+        out = self.reblocker.process(audio, frames)
+        self.latency = self.fft_size - self.hop + self.reblocker.latency
+        return out
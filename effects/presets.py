@@ -0,0 +1,248 @@
+import json
+import os
+import queue
+import threading
+from collections import deque
+import numpy as np
+from .base import Effect
+from .effect_chain import EffectChain
+from .graph import EffectGraph
+from .clean import Clean
+from .gain_boost import GainBoost
+from .low_pass_filter import LowPassFilter
+from .distortion import Distortion
+from .echo import Echo
+from .wahwah import WahWah
+from .ultra_metal import UltraMetal
+from .tremolo import Tremolo
+from .flanger import Flanger
+from .reverb import Reverb
+from .fdn_reverb import FDNReverb
+from .pitch_bend import PitchBend
+from .learning_effects import LearningEffects
+from .convolution import Convolution
+from .pitch_shift import PitchShifter
+from .multirate import MultiRate
+from .harmonizer import Harmonizer
+
+# Effects a preset may name, by class name
+EFFECT_TYPES = {cls.__name__: cls for cls in [
+    Clean, GainBoost, LowPassFilter, Distortion, Echo, WahWah, UltraMetal,
+    Tremolo, Flanger, Reverb, PitchBend, LearningEffects, Convolution,
+    PitchShifter, Harmonizer, FDNReverb,
+]}
+
+
+def list_presets(directory):
+    """Sorted paths of the .json presets in a directory"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.json')
+    )
+
+
+def load_preset(path):
+    """
+    Read a preset file
+
+    Format:
+        {
+          "name": "Metal Lead",
+          "chain": [
+            {"effect": "UltraMetal", "params": {"post_level": 0.5}},
+            {"effect": "Echo", "params": {"delay_ms": 420}, "active": true}
+          ]
+        }
+
+    An entry with "rate_divisor": 2 (or 4) runs that effect at a reduced
+    sample rate (see MultiRate).
+
+    or, for parallel paths, a graph of named nodes fed by "input" or by
+    each other, where "mix" nodes sum their inputs latency-compensated:
+        {
+          "graph": [
+            {"name": "amp", "effect": "UltraMetal"},
+            {"name": "verb", "effect": "Reverb", "inputs": ["input"]},
+            {"name": "out", "mix": ["amp", "verb"], "gains": [1.0, 0.5]}
+          ]
+        }
+    """
+    with open(path) as f:
+        preset = json.load(f)
+    entries = preset.get('chain', preset.get('graph'))
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: preset needs a 'chain' or 'graph' list")
+    for entry in entries:
+        if 'mix' in entry and 'graph' in preset:
+            continue
+        if entry.get('effect') not in EFFECT_TYPES:
+            raise ValueError(f"{path}: unknown effect {entry.get('effect')!r}")
+    preset.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    return preset
+
+
+def build_effect(entry, sample_rate):
+    """One preset entry's effect, with its parameters applied"""
+    factor = entry.get('rate_divisor', 1)
+    effect = EFFECT_TYPES[entry['effect']](sample_rate // factor)
+    for param, value in entry.get('params', {}).items():
+        if not hasattr(effect, param):
+            raise ValueError(f"{effect.name} has no parameter {param!r}")
+        setattr(effect, param, value)
+    # A fresh chain starts at its preset values rather than gliding to them
+    effect.snap_parameters()
+    # Buffers, delay lengths and coefficients derive from the parameters
+    effect.reset()
+    if factor != 1:
+        effect = MultiRate(sample_rate, effect, factor)
+    return effect
+
+
+def build_chain(preset, sample_rate):
+    """Create an EffectChain (or EffectGraph) for a preset with its parameters applied"""
+    if 'graph' in preset:
+        return build_graph(preset, sample_rate)
+    chain = EffectChain(sample_rate)
+    for entry in preset['chain']:
+        chain.add_effect(build_effect(entry, sample_rate), active=entry.get('active', True))
+    return chain
+
+
+def build_graph(preset, sample_rate):
+    graph = EffectGraph(sample_rate)
+    for entry in preset['graph']:
+        if 'mix' in entry:
+            graph.mix(entry['name'], entry['mix'], entry.get('gains'))
+        else:
+            graph.add(entry['name'], build_effect(entry, sample_rate), entry.get('inputs', ['input']))
+    if 'output' in preset:
+        graph.set_output(preset['output'])
+    # Plan the graph here, off the audio thread
+    graph.compile()
+    return graph
+
+
+def warm_up(effect, block_size, blocks=4):
+    """
+    Run a few silent blocks so first-call costs (lazy allocations,
+    JIT compilation, cache misses) are paid before the chain goes live
+    """
+    silence = np.zeros(block_size, dtype='float32')
+    for _ in range(blocks):
+        effect.process(silence, block_size)
+
+
+class ChainSwitcher(Effect):
+    """
+    Plays one chain and swaps to a prepared one with a short crossfade
+
+    Another thread hands over a fully built chain by setting `pending`; the
+    audio thread picks it up at the next block. Replaced chains are parked
+    in `retired` so they are freed off the audio thread.
+    """
+
+    def __init__(self, sample_rate, chain=None, crossfade_ms=20.0):
+        self.crossfade_samples = max(1, int(sample_rate * crossfade_ms / 1000.0))
+        # Precomputed fade-in curve, sliced per block
+        self.fade_curve = np.linspace(0.0, 1.0, self.crossfade_samples, endpoint=False, dtype='float32')
+        self.current = chain
+        self.pending = None
+        self.retired = deque()
+        super().__init__(sample_rate)
+
+    def reset(self):
+        self.previous = None
+        self.fade_position = 0
+        self._mixed = np.zeros(1024, dtype='float32')  # Crossfade output, grown if a block is bigger
+
+    @property
+    def name(self):
+        return self.current.name if self.current is not None else "Preset"
+
+    def process(self, audio, frames):
+        pending = self.pending
+        if pending is not None and self.previous is None:
+            self.pending = None
+            self.previous = self.current
+            self.current = pending
+            self.fade_position = 0
+
+        if self.current is None:
+            return audio
+        out = self.current.process(audio, frames)
+
+        if self.previous is not None:
+            old = self.previous.process(audio, frames)
+            start = self.fade_position
+            n = min(frames, self.crossfade_samples - start)
+            if len(self._mixed) < frames:
+                self._mixed = np.zeros(frames, dtype='float32')
+            mixed = self._mixed[:frames]
+            # Fade new in over the first n samples, the rest is all new
+            np.subtract(out[:n], old[:n], out=mixed[:n])
+            mixed[:n] *= self.fade_curve[start:start + n]
+            mixed[:n] += old[:n]
+            mixed[n:] = out[n:frames]
+            out = mixed
+            self.fade_position += n
+            if self.fade_position >= self.crossfade_samples:
+                self.retired.append(self.previous)
+                self.previous = None
+        return out
+
+
+class PresetLoader:
+    """
+    Prepares presets on a background thread
+
+    Loading, building, resetting and warming a chain all happen here;
+    the only thing the audio thread sees is the finished chain appearing
+    in the switcher's `pending` slot.
+    """
+
+    def __init__(self, switcher, directory, sample_rate, block_size):
+        self.switcher = switcher
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.status = "No preset loaded"
+        self.current_name = None
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def presets(self):
+        """Available preset files"""
+        return list_presets(self.directory)
+
+    def request(self, path):
+        """Queue a preset to be prepared and switched to"""
+        self.status = f"Loading {os.path.basename(path)}..."
+        self._requests.put(path)
+
+    def _worker(self):
+        while True:
+            try:
+                path = self._requests.get(timeout=0.25)
+            except queue.Empty:
+                path = None
+            # Drop chains the audio thread has finished with
+            while self.switcher.retired:
+                self.switcher.retired.popleft()
+            if path is None:
+                continue
+            try:
+                preset = load_preset(path)
+                chain = build_chain(preset, self.sample_rate)
+                warm_up(chain, self.block_size)
+            except (OSError, ValueError, TypeError) as e:
+                self.status = f"Preset failed: {e}"
+                continue
+            except Exception as e:
+                # A broken preset or effect must not take the loader down with it
+                self.status = f"Preset failed: {type(e).__name__}: {e}"
+                continue
+            self.switcher.pending = chain
+            self.current_name = preset['name']
+            self.status = f"Preset: {preset['name']}"
@@ -0,0 +1,86 @@
+import math
+import numpy as np
+
+
+class Reblocker:
+    """
+    Runs a block-processing function at a fixed block size, whatever
+    size the caller hands in
+
+    Input is queued until a full block is available; finished output is
+    queued until the caller asks for it. The output queue starts primed
+    with `latency` samples of silence, once, so it never runs short:
+
+        latency = block_size - gcd(block_size, every caller block size)
+
+    which is 0 when the caller's blocks are multiples of the block size.
+    `frames` gives the caller's block size (or a list of them) when it is
+    known; None means any size, and a latency of block_size - 1. A caller
+    that breaks its plan gets one gap of silence while the latency grows
+    to block_size - 1 (`max_latency`), where it stays. All buffers are preallocated. The
+    returned array is reused, so it is only valid until the next call.
+    """
+
+    def __init__(self, process, block_size, max_frames=8192, multiple=False, frames=None):
+        self.process_block = process
+        self.block_size = block_size
+        # multiple=True hands every available full block over in one call
+        self.multiple = multiple
+        sizes = [frames] if isinstance(frames, int) else list(frames or ())
+        self.planned_latency = block_size - math.gcd(block_size, *sizes) if sizes else block_size - 1
+        self.max_latency = block_size - 1
+        self._allocate(max_frames)
+        self.reset()
+
+    def _allocate(self, max_frames):
+        self.max_frames = max_frames
+        size = self.block_size + max_frames
+        self._in = np.zeros(size, dtype='float32')
+        self._out = np.zeros(2 * size, dtype='float32')
+        self._result = np.zeros(max_frames, dtype='float32')
+
+    def reset(self):
+        self._in_len = 0
+        self.latency = self.planned_latency  # Samples of delay added on top of the process function's
+        self._out[:self.latency] = 0.0
+        self._out_len = self.latency
+
+    def process(self, audio, frames):
+        if frames > self.max_frames:
+            # Only happens if the device block grows past what we planned for
+            self._allocate(frames)
+            self.reset()
+        block = self.block_size
+
+        self._in[self._in_len:self._in_len + frames] = audio[:frames]
+        self._in_len += frames
+
+        # Process every complete block
+        ready = (self._in_len // block) * block
+        step = ready if self.multiple else block
+        for start in range(0, ready, step) if ready else ():
+            out = self.process_block(self._in[start:start + step], step)
+            self._out[self._out_len:self._out_len + step] = out
+            self._out_len += step
+        if ready:
+            leftover = self._in_len - ready
+            self._in[:leftover] = self._in[ready:self._in_len]
+            self._in_len = leftover
+
+        # Hand back `frames` samples. Only short if the caller broke the plan:
+        # then prime up to the latency that covers any block size, once
+        result = self._result[:frames]
+        missing = frames - self._out_len
+        if missing > 0:
+            grow = max(missing, self.block_size - 1 - self.latency)
+            result[:missing] = 0.0
+            result[missing:] = self._out[:self._out_len]
+            self._out[:grow - missing] = 0.0
+            self._out_len = grow - missing
+            self.latency += grow
+        else:
+            result[:] = self._out[:frames]
+            remaining = self._out_len - frames
+            self._out[:remaining] = self._out[frames:self._out_len]
+            self._out_len = remaining
+        return result
@@ -0,0 +1,325 @@
+"""
+Frozen per-sample reference implementations
+
+These are the original, obviously-correct sample-by-sample loops. They are
+never used for playback; `engine.equivalence` runs them next to the real
+(vectorised, block-based) effects to prove an optimisation didn't change
+the sound. Don't optimise anything in here.
+"""
+import math
+import numpy as np
+from .base import Effect
+from .parameters import parameter_names
+
+
+class ReferenceEffect(Effect):
+    """Per-sample twin of an effect, built with the same settings"""
+
+    def __init__(self, effect):
+        # Copy the effect's settings as plain attributes; state is rebuilt by reset()
+        for name, value in vars(effect).items():
+            if not name.startswith('_') and isinstance(value, (int, float, str, list, tuple)):
+                setattr(self, name, list(value) if isinstance(value, list) else value)
+        for name in parameter_names(effect):
+            setattr(self, name, getattr(effect, name))
+        super().__init__(effect.sample_rate)
+
+
+class ReferenceGainBoost(ReferenceEffect):
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        for i in range(frames):
+            out[i] = audio[i] * self.gain
+        return out
+
+
+class ReferenceDistortion(ReferenceEffect):
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        for i in range(frames):
+            out[i] = math.tanh(audio[i] * self.gain)
+        return out
+
+
+class ReferenceLowPassFilter(ReferenceEffect):
+    def reset(self):
+        self.prev_lpf = 0.0
+
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        for i in range(frames):
+            self.prev_lpf = self.prev_lpf + self.coeff * (audio[i] - self.prev_lpf)
+            out[i] = self.prev_lpf
+        return out
+
+
+class ReferenceEcho(ReferenceEffect):
+    def reset(self):
+        self.echo_delay_samples = int(self.sample_rate * (self.delay_ms / 1000.0))
+        self.echo_buffer_size = int(self.sample_rate * self.max_seconds)
+        self.echo_buffer = np.zeros(self.echo_buffer_size, dtype="float32")
+        self.echo_write_idx = 0
+
+    def process(self, audio, frames):
+        out = np.zeros_like(audio)
+        for i in range(frames):
+            read_idx = (self.echo_write_idx - self.echo_delay_samples) % self.echo_buffer_size
+            delayed_sample = self.echo_buffer[read_idx]
+            dry = audio[i]
+            out[i] = (1.0 - self.mix) * dry + self.mix * delayed_sample
+            self.echo_buffer[self.echo_write_idx] = dry + delayed_sample * self.feedback
+            self.echo_write_idx = (self.echo_write_idx + 1) % self.echo_buffer_size
+        return out
+
+
+class ReferenceWahWah(ReferenceEffect):
+    def reset(self):
+        self.phase = 0.0
+        self.x1 = self.x2 = self.y1 = self.y2 = 0.0
+
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        phase_increment = 2 * np.pi * self.lfo_freq / self.sample_rate
+        for i in range(frames):
+            lfo = 0.5 * (1 + np.sin(self.phase))
+            center_freq = self.min_freq + lfo * (self.max_freq - self.min_freq)
+            w0 = 2 * np.pi * center_freq / self.sample_rate
+            alpha = np.sin(w0) / (2 * self.q_factor)
+            a0 = 1 + alpha
+            b0, b1, b2 = alpha / a0, 0.0, -alpha / a0
+            a1, a2 = -2 * np.cos(w0) / a0, (1 - alpha) / a0
+            x = audio[i]
+            y = b0 * x + b1 * self.x1 + b2 * self.x2 - a1 * self.y1 - a2 * self.y2
+            self.x2, self.x1 = self.x1, x
+            self.y2, self.y1 = self.y1, y
+            out[i] = y
+            self.phase += phase_increment
+            if self.phase >= 2 * np.pi:
+                self.phase -= 2 * np.pi
+        return out
+
+
+class ReferenceTremolo(ReferenceEffect):
+    def reset(self):
+        self.phase = 0.0
+
+    def _lfo_sample(self):
+        if self.waveform == 'triangle':
+            phase_norm = self.phase / (2 * np.pi)
+            return 4 * phase_norm - 1 if phase_norm < 0.5 else 3 - 4 * phase_norm
+        if self.waveform == 'square':
+            return 1.0 if np.sin(self.phase) >= 0 else -1.0
+        return np.sin(self.phase)
+
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        phase_increment = 2 * np.pi * self.rate / self.sample_rate
+        for i in range(frames):
+            out[i] = audio[i] * (1.0 + self._lfo_sample() * self.depth)
+            self.phase += phase_increment
+            if self.phase >= 2 * np.pi:
+                self.phase -= 2 * np.pi
+        return out
+
+
+class ReferenceFlanger(ReferenceEffect):
+    def reset(self):
+        self.buffer_size = int(self.max_delay * self.sample_rate) + 1
+        self.buffer = np.zeros(self.buffer_size, dtype='float32')
+        self.write_pos = 0
+        self.phase = 0.0
+
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        phase_increment = 2 * np.pi * self.rate / self.sample_rate
+        min_delay_samples = self.min_delay * self.sample_rate
+        delay_range = self.max_delay * self.sample_rate - min_delay_samples
+        for i in range(frames):
+            lfo = np.sin(self.phase)
+            current_delay = min_delay_samples + (lfo + 1) * 0.5 * delay_range
+            read_pos = self.write_pos - current_delay
+            if read_pos < 0:
+                read_pos += self.buffer_size
+            index = int(read_pos) % self.buffer_size
+            next_index = (index + 1) % self.buffer_size
+            frac = read_pos - int(read_pos)
+            delayed_sample = self.buffer[index] * (1 - frac) + self.buffer[next_index] * frac
+            input_sample = audio[i]
+            self.buffer[self.write_pos] = input_sample + delayed_sample * self.feedback
+            out[i] = input_sample * (1 - self.mix) + delayed_sample * self.mix
+            self.write_pos = (self.write_pos + 1) % self.buffer_size
+            self.phase += phase_increment
+            if self.phase >= 2 * np.pi:
+                self.phase -= 2 * np.pi
+        return out
+
+
+class ReferenceReverb(ReferenceEffect):
+    def reset(self):
+        self.comb_buffers = [np.zeros(d, dtype='float32') for d in self.comb_delays]
+        self.comb_positions = [0] * len(self.comb_delays)
+        self.comb_filter_states = [0.0] * len(self.comb_delays)
+        self.allpass_buffers = [np.zeros(d, dtype='float32') for d in self.allpass_delays]
+        self.allpass_positions = [0] * len(self.allpass_delays)
+
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        feedback_gain = 0.7 * self.room_size
+        for i in range(frames):
+            input_sample = audio[i]
+            comb_sum = 0.0
+            for j, buffer in enumerate(self.comb_buffers):
+                position = self.comb_positions[j]
+                delayed = buffer[position]
+                state = delayed * (1 - self.damping) + self.comb_filter_states[j] * self.damping
+                buffer[position] = input_sample + state * feedback_gain
+                self.comb_filter_states[j] = state
+                self.comb_positions[j] = (position + 1) % len(buffer)
+                comb_sum += delayed
+            sample = comb_sum / len(self.comb_buffers)
+            for j, buffer in enumerate(self.allpass_buffers):
+                position = self.allpass_positions[j]
+                delayed = buffer[position]
+                buffer[position] = sample + delayed * 0.5
+                sample = -sample + delayed
+                self.allpass_positions[j] = (position + 1) % len(buffer)
+            out[i] = input_sample * self.dry_level + sample * self.wet_level
+        return out
+
+
+class ReferenceUltraMetal(ReferenceEffect):
+    def reset(self):
+        self.states = {band: [0.0, 0.0, 0.0, 0.0] for band in ('pre_mid', 'bass', 'mid', 'high')}
+
+    def _peaking_eq(self, x, band, freq, gain, q):
+        w0 = 2 * np.pi * freq / self.sample_rate
+        A = np.sqrt(gain)
+        alpha = np.sin(w0) / (2 * q)
+        a0 = 1 + alpha / A
+        b0, b1, b2 = (1 + alpha * A) / a0, -2 * np.cos(w0) / a0, (1 - alpha * A) / a0
+        a1, a2 = -2 * np.cos(w0) / a0, (1 - alpha / A) / a0
+        state = self.states[band]
+        x1, x2, y1, y2 = state
+        y = b0 * x + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+        # The original assigns the returned (y, x, x1, y, y1) to (out, x2, x1, y2, y1):
+        # x1/y1 never change and x2/y2 take the newest values. That is the
+        # sound UltraMetal has always had, so it is what we check against
+        state[:] = [x1, x, y1, y]
+        return y
+
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        for i in range(frames):
+            sample = audio[i] * self.pre_gain
+            sample = self._peaking_eq(sample, 'pre_mid', self.pre_mid_freq, self.pre_mid_boost, self.pre_mid_q)
+            z = np.tanh(sample * (1.0 + 2 * self.drive))
+            sample = z + 0.5 * np.power(z, 5)
+            sample = self._peaking_eq(sample, 'bass', self.bass_freq, self.bass_gain, 1.0)
+            sample = self._peaking_eq(sample, 'mid', self.mid_freq, self.mid_gain, self.mid_q)
+            sample = self._peaking_eq(sample, 'high', self.high_freq, self.high_gain, self.high_q)
+            out[i] = sample * self.post_level
+        return out
+
+
+class ReferenceConvolution(ReferenceEffect):
+    """Direct-form FIR: every output sample is the dot product with the IR"""
+
+    def __init__(self, effect):
+        self.impulse_response = np.asarray(effect.impulse_response, dtype='float64')
+        super().__init__(effect)
+
+    def reset(self):
+        self.history = np.zeros(len(self.impulse_response) - 1)
+
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        taps = self.impulse_response[::-1]
+        n = len(taps)
+        x = np.concatenate([self.history, audio[:frames]])
+        for i in range(frames):
+            wet = float(np.dot(x[i:i + n], taps))
+            dry = audio[i]
+            out[i] = (dry + (wet - dry) * self.mix) * self.level
+        self.history = x[frames:]
+        return out
+
+
+class ReferenceHarmonizer(ReferenceEffect):
+    def reset(self):
+        self.window = self.sample_rate * self.window_ms / 1000.0
+        self.buffer_size = int(math.ceil(self.window)) + self.max_frames + 2
+        self.buffer = np.zeros(self.buffer_size, dtype='float32')
+        self.write_pos = 0
+        self.phases = [[0.0, 0.5] for _ in self.intervals]
+
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        for i in range(frames):
+            self.buffer[self.write_pos] = audio[i]
+            wet = 0.0
+            for v, interval in enumerate(self.intervals):
+                step = (1.0 - 2.0 ** (interval / 12.0)) / self.window
+                for h in range(2):
+                    phase = (self.phases[v][h] + step) % 1.0
+                    self.phases[v][h] = phase
+                    position = self.write_pos - 1 - phase * self.window
+                    base = math.floor(position)
+                    fraction = position - base
+                    index = int(base) % self.buffer_size
+                    sample = self.buffer[index]
+                    partner = self.buffer[(index + 1) % self.buffer_size]
+                    wet += self.levels[v] * math.sin(math.pi * phase) ** 2 * (sample + (partner - sample) * fraction)
+            out[i] = audio[i] * self.dry_level + wet * self.wet_level
+            self.write_pos = (self.write_pos + 1) % self.buffer_size
+        return out
+
+
+class ReferenceFDNReverb(ReferenceEffect):
+    def reset(self):
+        self.size = int(math.ceil(max(self.delays) + self.mod_depth)) + 3
+        self.buffers = [np.zeros(self.size, dtype='float32') for _ in self.delays]
+        self.lfo = [i / self.lines for i in range(self.lines)]
+        self.time = 0
+
+    def process(self, audio, frames):
+        out = np.empty_like(audio)
+        n = self.lines
+        longest = max(self.delays)
+        for i in range(frames):
+            outputs = []
+            for j, delay in enumerate(self.delays):
+                buffer = self.buffers[j]
+                position = self.time - delay - self.mod_depth * math.sin(2 * math.pi * self.lfo[j])
+                self.lfo[j] = (self.lfo[j] + self.mod_rates[j]) % 1.0
+                base = math.floor(position)
+                fraction = position - base
+                before, at, after = (float(buffer[(base + k) % self.size]) for k in (-1, 0, 1))
+                newest = at + (after - at) * fraction
+                previous = before + (at - before) * fraction
+                gain = 10.0 ** (-3.0 * delay / (self.decay * self.sample_rate))
+                older = 0.5 * self.damping * delay / longest
+                outputs.append(gain * ((1.0 - older) * newest + older * previous))
+            total = sum(outputs)
+            for j, output in enumerate(outputs):
+                self.buffers[j][self.time % self.size] = output - 2.0 / n * total + audio[i] / math.sqrt(n)
+            wet = sum((-1.0) ** j / math.sqrt(n) * output for j, output in enumerate(outputs))
+            out[i] = audio[i] * self.dry_level + wet * self.wet_level
+            self.time += 1
+        return out
+
+
+# Effect class name -> its reference twin
+REFERENCES = {
+    'GainBoost': ReferenceGainBoost,
+    'Distortion': ReferenceDistortion,
+    'LowPassFilter': ReferenceLowPassFilter,
+    'Echo': ReferenceEcho,
+    'WahWah': ReferenceWahWah,
+    'Tremolo': ReferenceTremolo,
+    'Flanger': ReferenceFlanger,
+    'Reverb': ReferenceReverb,
+    'UltraMetal': ReferenceUltraMetal,
+    'Convolution': ReferenceConvolution,
+    'Harmonizer': ReferenceHarmonizer,
+    'FDNReverb': ReferenceFDNReverb,
+}
@@ -1,5 +1,7 @@
 import numpy as np
 from .base import Effect
+from .parameters import Parameter
+from .denormal import flush_span, flush_value
 
 class Reverb(Effect):
     """
@@ -10,17 +12,26 @@ class Reverb(Effect):
     - All-pass filters: Increase echo density (series)
     - Damping: High-frequency absorption (realistic rooms)
     - Multiple delay lines: Simulate room reflections
+    - Quality tiers: 4, 3 or 2 combs. A dropped comb fades out over
+      quality_fade_ms and then stops running; a restored one starts from
+      silence and fades in. The comb average is weighted by the fades
     
     This is a SIMPLIFIED reverb - pro reverbs use 20+ delay lines
     and sophisticated diffusion networks
     """
     
+    wet_level = Parameter(0.0, 1.0)
+    dry_level = Parameter(0.0, 1.0)
+    quality_tiers = ('4 combs', '3 combs', '2 combs')
+    dry_gain = 1.0  # Of the last block, when wet_only
+    
     def __init__(self, sample_rate):
         # Reverb parameters - set BEFORE super().__init__()
         self.room_size = 0.75      # 0-1: affects delay times
         self.damping = 0.5         # 0-1: high frequency absorption
         self.wet_level = 0.3       # Reverb amount
         self.dry_level = 0.7       # Direct signal amount
+        self.quality_fade_ms = 30.0  # Fade for combs dropped or restored by a tier change
         
         # Comb filter delays (in samples) - these create the "room size"
         # Carefully chosen to be non-harmonic (avoid metallic resonance)
@@ -47,11 +58,15 @@ class Reverb(Effect):
         self.comb_buffers = []
         self.comb_positions = []
         self.comb_filter_states = []  # For damping
+        self.comb_gains = []          # Fades for quality tier changes
+        self.comb_targets = []
         
         for delay in self.comb_delays:
             self.comb_buffers.append(np.zeros(delay, dtype='float32'))
             self.comb_positions.append(0)
             self.comb_filter_states.append(0.0)
+            self.comb_gains.append(1.0)
+            self.comb_targets.append(1.0)
         
         # All-pass filter buffers (series)
         self.allpass_buffers = []
@@ -65,6 +80,21 @@ class Reverb(Effect):
     def name(self):
         return "Reverb"
     
+    def _running_combs(self):
+        """Indices of the combs to run this block, after setting their target gains from the tier"""
+        wanted = max(1, len(self.comb_buffers) - self.quality)
+        running = []
+        for j, gain in enumerate(self.comb_gains):
+            target = 1.0 if j < wanted else 0.0
+            self.comb_targets[j] = target
+            if target or gain:
+                if not gain:
+                    # Restored: don't replay the tail it was stopped with
+                    self.comb_buffers[j][:] = 0.0
+                    self.comb_filter_states[j] = 0.0
+                running.append(j)
+        return running
+    
     def _process_comb_filter(self, input_sample, buffer, position, filter_state, index):
         """
         Comb Filter: Feedback delay line with damping
@@ -141,7 +171,13 @@ class Reverb(Effect):
                   ↑
                   └── Parallel early reflections
         """
-        out = np.empty_like(audio)
+        wet = np.empty_like(audio)
+        
+        running = self._running_combs()
+        gains, targets = self.comb_gains, self.comb_targets
+        gain_total = sum(gains)
+        fading = any(gains[j] != targets[j] for j in running)
+        fade_step = 1000.0 / (self.quality_fade_ms * self.sample_rate)
         
         for i in range(frames):
             input_sample = audio[i]
@@ -149,7 +185,7 @@ class Reverb(Effect):
             # STAGE 1: Parallel comb filters (early reflections)
             # These create the initial "room response"
             comb_sum = 0.0
-            for j in range(len(self.comb_buffers)):
+            for j in running:
                 delayed, new_pos = self._process_comb_filter(
                     input_sample,
                     self.comb_buffers[j],
@@ -158,10 +194,14 @@ class Reverb(Effect):
                     j
                 )
                 self.comb_positions[j] = new_pos
-                comb_sum += delayed
+                comb_sum += delayed * gains[j]
             
-            # Average the comb outputs
-            comb_output = comb_sum / len(self.comb_buffers)
+            # Average the comb outputs (weighted by their fades)
+            comb_output = comb_sum / gain_total
+            if fading:
+                for j in running:
+                    gains[j] = min(gains[j] + fade_step, 1.0) if targets[j] else max(gains[j] - fade_step, 0.0)
+                gain_total = sum(gains)
             
             # STAGE 2: Series all-pass filters (diffusion)
             # These make the reverb dense and smooth
@@ -174,7 +214,18 @@ class Reverb(Effect):
                 )
                 self.allpass_positions[j] = new_pos
             
-            # STAGE 3: Mix dry and wet
-            out[i] = input_sample * self.dry_level + allpass_output * self.wet_level
-        
-        return out
\ No newline at end of file
+            wet[i] = allpass_output
+        
+        # A fading tail ends up as denormals circulating in the combs:
+        # zero them in what was written this block, and in the damping state
+        for buffer, position in zip(self.comb_buffers + self.allpass_buffers,
+                                    self.comb_positions + self.allpass_positions):
+            flush_span(buffer, (position - frames) % len(buffer), frames)
+        for j, state in enumerate(self.comb_filter_states):
+            self.comb_filter_states[j] = flush_value(state)
+        
+        # STAGE 3: Mix dry and wet (for the whole block - levels may be ramping)
+        if self.wet_only:
+            self.dry_gain = self.ramp('dry_level', frames)
+            return wet * self.ramp('wet_level', frames)
+        return audio * self.ramp('dry_level', frames) + wet * self.ramp('wet_level', frames)
\ No newline at end of file
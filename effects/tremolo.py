@@ -1,5 +1,6 @@
 import numpy as np
 from .base import Effect
+from .parameters import Parameter
 
 class Tremolo(Effect):
     """
@@ -11,6 +12,9 @@ class Tremolo(Effect):
     - Phase accumulation: tracking oscillator position
     """
     
+    rate = Parameter(0.01, 50.0)
+    depth = Parameter(0.0, 1.0)
+    
     def __init__(self, sample_rate):
         # Tremolo parameters - set BEFORE super().__init__()
         self.rate = 5.0        # LFO frequency in Hz (how fast it wobbles)
@@ -26,67 +30,63 @@ class Tremolo(Effect):
     def name(self):
         return "Tremolo"
     
-    def _generate_lfo_sample(self):
+    def _generate_lfo(self, phase):
         """
-        Generate one sample of the LFO waveform
+        Generate the LFO waveform for a block of phases
         
         This is the heart of modulation effects!
         The LFO creates a control signal that modulates another parameter
         """
-        if self.waveform == 'sine':
-            # Sine wave: smooth, natural sounding
-            # Goes from -1 to +1
-            lfo = np.sin(self.phase)
-        
-        elif self.waveform == 'triangle':
+        if self.waveform == 'triangle':
             # Triangle wave: linear ramps up and down
             # Normalize phase to 0-1 range
-            phase_norm = self.phase / (2 * np.pi)
-            if phase_norm < 0.5:
-                lfo = 4 * phase_norm - 1  # Rising edge
-            else:
-                lfo = 3 - 4 * phase_norm  # Falling edge
+            phase_norm = phase / (2 * np.pi)
+            return np.where(phase_norm < 0.5,
+                            4 * phase_norm - 1,   # Rising edge
+                            3 - 4 * phase_norm)   # Falling edge
         
         elif self.waveform == 'square':
             # Square wave: abrupt on/off (helicopter effect)
-            lfo = 1.0 if np.sin(self.phase) >= 0 else -1.0
-        
-        else:
-            lfo = np.sin(self.phase)
+            return np.where(np.sin(phase) >= 0, 1.0, -1.0)
         
-        return lfo
+        # Sine wave: smooth, natural sounding
+        # Goes from -1 to +1
+        return np.sin(phase)
     
     def process(self, audio, frames):
         """
-        Process audio buffer sample-by-sample
+        Process audio buffer with a per-sample LFO, computed for the whole block
         
-        Key insight: We need sample-by-sample processing for smooth modulation
-        Block processing would create audible steps
+        Key insight: modulation must change every sample to stay smooth,
+        but the phase of every sample is known up front, so the LFO is
+        computed as one vector instead of in a Python loop
         """
-        out = np.empty_like(audio)
+        # How much to advance phase per sample - this determines the LFO frequency
+        rate = self.ramp('rate', frames)
+        phase_increment = 2 * np.pi * rate / self.sample_rate
+        
+        if np.isscalar(phase_increment):
+            phase = self.phase + phase_increment * np.arange(frames)
+            end_phase = self.phase + phase_increment * frames
+        else:
+            # Rate is ramping: accumulate the changing increments
+            steps = np.cumsum(phase_increment, dtype='float64')
+            phase = self.phase + np.concatenate(([0.0], steps[:-1]))
+            end_phase = self.phase + steps[-1]
+        
+        # Wrap phase to stay in 0 to 2π range
+        # Important: prevents numerical drift over time
+        phase %= 2 * np.pi
+        self.phase = float(end_phase % (2 * np.pi))
         
-        # Calculate how much to advance phase per sample
-        # This determines the LFO frequency
-        phase_increment = 2 * np.pi * self.rate / self.sample_rate
+        # LFO value for every sample (-1 to +1). The phase needs float64, the
+        # LFO itself doesn't: float32 keeps the multiply below in float32
+        lfo = self._generate_lfo(phase).astype('float32')
         
-        for i in range(frames):
-            # Generate LFO value for this sample (-1 to +1)
-            lfo = self._generate_lfo_sample()
-            
-            # Convert LFO to amplitude multiplier
-            # Map from [-1, +1] to [1-depth, 1+depth]
-            # This creates the "tremolo" effect
-            amplitude = 1.0 + (lfo * self.depth)
-            
-            # Apply amplitude modulation
-            out[i] = audio[i] * amplitude
-            
-            # Advance the LFO phase
-            self.phase += phase_increment
-            
-            # Wrap phase to stay in 0 to 2π range
-            # Important: prevents numerical drift over time
-            if self.phase >= 2 * np.pi:
-                self.phase -= 2 * np.pi
+        # Convert LFO to amplitude multiplier
+        # Map from [-1, +1] to [1-depth, 1+depth]
+        # This creates the "tremolo" effect
+        amplitude = 1.0 + lfo * self.ramp('depth', frames)
         
-        return out
\ No newline at end of file
+        # Apply amplitude modulation
+        return audio * amplitude
@@ -1,7 +1,22 @@
+import math
 import numpy as np
 from .base import Effect
+from .parameters import Parameter
+from .denormal import flush_value
+
+# Biquad state of the four EQ bands, flushed once per block
+FILTER_STATES = tuple(f"{band}_{state}" for band in ('pre_mid', 'bass', 'mid', 'high')
+                      for state in ('x1', 'x2', 'y1', 'y2'))
 
 class UltraMetal(Effect):
+    pre_gain = Parameter(0.0, 500.0)
+    drive = Parameter(0.0, 5.0)
+    post_level = Parameter(0.0, 4.0)
+    pre_mid_boost = Parameter(0.01, 20.0)
+    bass_gain = Parameter(0.01, 20.0)
+    mid_gain = Parameter(0.01, 20.0)
+    high_gain = Parameter(0.01, 20.0)
+    
     def __init__(self, sample_rate):
         super().__init__(sample_rate)
         
@@ -38,27 +53,46 @@ class UltraMetal(Effect):
         self.bass_x1, self.bass_x2, self.bass_y1, self.bass_y2 = 0.0, 0.0, 0.0, 0.0
         self.mid_x1, self.mid_x2, self.mid_y1, self.mid_y2 = 0.0, 0.0, 0.0, 0.0
         self.high_x1, self.high_x2, self.high_y1, self.high_y2 = 0.0, 0.0, 0.0, 0.0
+        # Cached EQ coefficients per band, keyed by (freq, gain, q)
+        self._coeffs = {}
     
     @property
     def name(self):
         return "Ultra Metal V3"
     
-    def _peaking_eq(self, x, x1, x2, y1, y2, freq, gain, q):
-        """Biquad Peaking EQ filter (Formula Unchanged)"""
-        w0 = 2 * np.pi * freq / self.sample_rate
-        A = np.sqrt(gain)
-        alpha = np.sin(w0) / (2 * q)
+    def _peaking_coeffs(self, freq, gain, q):
+        """Biquad Peaking EQ coefficients (Formula Unchanged), as Python floats"""
+        w0 = 2 * math.pi * freq / self.sample_rate
+        A = math.sqrt(gain)
+        alpha = math.sin(w0) / (2 * q)
         
         b0 = 1 + alpha * A
-        b1 = -2 * np.cos(w0)
+        b1 = -2 * math.cos(w0)
         b2 = 1 - alpha * A
         a0 = 1 + alpha / A
-        a1 = -2 * np.cos(w0)
+        a1 = -2 * math.cos(w0)
         a2 = 1 - alpha / A
         
         # Normalize by a0
-        b0_norm, b1_norm, b2_norm = b0 / a0, b1 / a0, b2 / a0
-        a1_norm, a2_norm = a1 / a0, a2 / a0
+        return b0 / a0, b1 / a0, b2 / a0, a1 / a0, a2 / a0
+    
+    def _band_coeffs(self, band, freq, gain, q):
+        """Coefficients for a band, only recomputed when freq/gain/q change"""
+        key = (freq, gain, q)
+        cached = self._coeffs.get(band)
+        if cached is None or cached[0] != key:
+            cached = (key, self._peaking_coeffs(freq, gain, q))
+            self._coeffs[band] = cached
+        return cached[1]
+    
+    def _block_value(self, name, frames):
+        """A smoothed parameter's value for this block (its end value while ramping)"""
+        value = self.ramp(name, frames)
+        return value if np.isscalar(value) else float(value[-1])
+    
+    def _peaking_eq(self, x, x1, x2, y1, y2, coeffs):
+        """Biquad Peaking EQ filter"""
+        b0_norm, b1_norm, b2_norm, a1_norm, a2_norm = coeffs
         
         y = b0_norm * x + b1_norm * x1 + b2_norm * x2 - a1_norm * y1 - a2_norm * y2
         
@@ -68,52 +102,61 @@ class UltraMetal(Effect):
         """NEW: Increased harshness for high-order harmonics."""
         
         # Increase the exponent of the drive to force harder clipping at the edges
-        z = np.tanh(x * (1.0 + 2 * drive))
+        z = math.tanh(x * (1.0 + 2 * drive))
         
         # INCREASED power term: This term significantly boosts high-order harmonics,
         # which are the "scream" of the pinch harmonic.
-        return z + 0.5 * np.power(z, 5) 
+        return z + 0.5 * z ** 5
 
     def process(self, audio, frames):
         out = np.empty_like(audio)
         
+        # EQ coefficients only change while a gain is ramping (or a freq/Q is edited),
+        # otherwise they come straight from the cache
+        pre_mid = self._band_coeffs('pre_mid', self.pre_mid_freq, self._block_value('pre_mid_boost', frames), self.pre_mid_q)
+        bass = self._band_coeffs('bass', self.bass_freq, self._block_value('bass_gain', frames), 1.0)
+        mid = self._band_coeffs('mid', self.mid_freq, self._block_value('mid_gain', frames), self.mid_q)
+        high = self._band_coeffs('high', self.high_freq, self._block_value('high_gain', frames), self.high_q)
+        drive = self._block_value('drive', frames)
+        
+        # 1. Pre-Gain Stage (whole block at once)
+        # As Python floats, so the filter state and the maths below stay float64 scalars
+        boosted = (audio * self.ramp('pre_gain', frames)).tolist()
+        
         for i in range(frames):
-            sample = audio[i]
-            
-            # 1. Pre-Gain Stage
-            sample *= self.pre_gain
+            sample = boosted[i]
             
             # 2. NEW PRE-CLIPPING EQ: Focus the pinch harmonic frequencies
             # This aggressive, narrow boost ensures the harmonic partials saturate first.
             sample, self.pre_mid_x2, self.pre_mid_x1, self.pre_mid_y2, self.pre_mid_y1 = self._peaking_eq(
-                sample, self.pre_mid_x1, self.pre_mid_x2, self.pre_mid_y1, self.pre_mid_y2,
-                self.pre_mid_freq, self.pre_mid_boost, self.pre_mid_q
+                sample, self.pre_mid_x1, self.pre_mid_x2, self.pre_mid_y1, self.pre_mid_y2, pre_mid
             )
             
             # 3. Clipping/Saturation: Use the harsher clipper
-            sample = self._harsh_sigmoid_clip(sample, self.drive)
+            sample = self._harsh_sigmoid_clip(sample, drive)
             
             # --- POST-CLIPPING EQ ---
             
             # 4. Bass EQ: Tighten the low end
             sample, self.bass_x2, self.bass_x1, self.bass_y2, self.bass_y1 = self._peaking_eq(
-                sample, self.bass_x1, self.bass_x2, self.bass_y1, self.bass_y2,
-                self.bass_freq, self.bass_gain, 1.0
+                sample, self.bass_x1, self.bass_x2, self.bass_y1, self.bass_y2, bass
             )
 
             # 5. Mid EQ: The classic mid-scoop
             sample, self.mid_x2, self.mid_x1, self.mid_y2, self.mid_y1 = self._peaking_eq(
-                sample, self.mid_x1, self.mid_x2, self.mid_y1, self.mid_y2,
-                self.mid_freq, self.mid_gain, self.mid_q
+                sample, self.mid_x1, self.mid_x2, self.mid_y1, self.mid_y2, mid
             )
             
             # 6. High EQ: Final aggressive high-end boost
             sample, self.high_x2, self.high_x1, self.high_y2, self.high_y1 = self._peaking_eq(
-                sample, self.high_x1, self.high_x2, self.high_y1, self.high_y2,
-                self.high_freq, self.high_gain, self.high_q
+                sample, self.high_x1, self.high_x2, self.high_y1, self.high_y2, high
             )
             
-            # 7. Output Level control
-            out[i] = sample * self.post_level
+            out[i] = sample
+        
+        # Zero EQ state that has rung down toward denormals
+        for state in FILTER_STATES:
+            setattr(self, state, flush_value(getattr(self, state)))
         
-        return out
\ No newline at end of file
+        # 7. Output Level control
+        return out * self.ramp('post_level', frames)
@@ -1,7 +1,15 @@
+import math
 import numpy as np
 from .base import Effect
+from .denormal import flush_value
 
 class WahWah(Effect):
+    # Quality tiers: how often the filter follows the LFO. The sweep is so
+    # slow that coefficients held for 16 samples move the centre frequency
+    # by a fraction of a Hz, so switching tiers needs no fade
+    quality_tiers = ('coefficients every sample', 'every 4 samples', 'every 16 samples')
+    coefficient_intervals = (1, 4, 16)
+    
     def __init__(self, sample_rate):
         super().__init__(sample_rate)
         # Wah parameters
@@ -25,15 +33,16 @@ class WahWah(Effect):
     
     def _calculate_biquad_coeffs(self, center_freq):
         """Calculate biquad bandpass filter coefficients"""
-        w0 = 2 * np.pi * center_freq / self.sample_rate
-        alpha = np.sin(w0) / (2 * self.q_factor)
+        # math, not np: Python floats keep the per-sample filter out of NumPy scalars
+        w0 = 2 * math.pi * center_freq / self.sample_rate
+        alpha = math.sin(w0) / (2 * self.q_factor)
         
         # Bandpass filter coefficients
         b0 = alpha
         b1 = 0.0
         b2 = -alpha
         a0 = 1 + alpha
-        a1 = -2 * np.cos(w0)
+        a1 = -2 * math.cos(w0)
         a2 = 1 - alpha
         
         # Normalize
@@ -48,18 +57,21 @@ class WahWah(Effect):
     def process(self, audio, frames):
         out = np.empty_like(audio)
         
-        phase_increment = 2 * np.pi * self.lfo_freq / self.sample_rate
+        phase_increment = 2 * math.pi * self.lfo_freq / self.sample_rate
+        samples = audio.tolist()  # Python floats: the filter state stays float64
+        interval = self.coefficient_intervals[self.quality]
         
         for i in range(frames):
-            # LFO creates sweep from min to max frequency
-            lfo = 0.5 * (1 + np.sin(self.phase))
-            center_freq = self.min_freq + lfo * (self.max_freq - self.min_freq)
-            
-            # Calculate filter coefficients for current center frequency
-            b0, b1, b2, a1, a2 = self._calculate_biquad_coeffs(center_freq)
+            if i % interval == 0:
+                # LFO creates sweep from min to max frequency
+                lfo = 0.5 * (1 + math.sin(self.phase))
+                center_freq = self.min_freq + lfo * (self.max_freq - self.min_freq)
+                
+                # Calculate filter coefficients for current center frequency
+                b0, b1, b2, a1, a2 = self._calculate_biquad_coeffs(center_freq)
             
             # Apply biquad filter (Direct Form II)
-            x = audio[i]
+            x = samples[i]
             y = b0 * x + b1 * self.x1 + b2 * self.x2 - a1 * self.y1 - a2 * self.y2
             
             # Update state
@@ -72,7 +84,11 @@ class WahWah(Effect):
             
             # Advance LFO phase
             self.phase += phase_increment
-            if self.phase >= 2 * np.pi:
-                self.phase -= 2 * np.pi
+            if self.phase >= 2 * math.pi:
+                self.phase -= 2 * math.pi
+        
+        # A resonant filter rings on toward denormals after the input stops
+        self.x1, self.x2 = flush_value(self.x1), flush_value(self.x2)
+        self.y1, self.y2 = flush_value(self.y1), flush_value(self.y2)
         
         return out
\ No newline at end of file
@@ -0,0 +1,139 @@
+import wave
+import numpy as np
+
+
+def read_wav(path):
+    """
+    Read a WAV file as mono float32 in -1..1
+
+    Handles 16/24/32-bit PCM via the standard library, and 32-bit float
+    files, which `wave` refuses, by parsing the chunks directly.
+    Returns (samples, sample_rate).
+    """
+    try:
+        with wave.open(path, 'rb') as f:
+            channels = f.getnchannels()
+            width = f.getsampwidth()
+            sample_rate = f.getframerate()
+            raw = f.readframes(f.getnframes())
+        data = _pcm_to_float(raw, width)
+    except wave.Error:
+        data, channels, sample_rate = _read_float_wav(path)
+    if channels > 1:
+        data = data.reshape(-1, channels).mean(axis=1)
+    return data.astype('float32'), sample_rate
+
+
+def _pcm_to_float(raw, width):
+    if width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype('float32') - 128) / 128.0
+    if width == 2:
+        return np.frombuffer(raw, dtype='<i2').astype('float32') / 32768.0
+    if width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        return ints.astype('float32') / 8388608.0
+    if width == 4:
+        return np.frombuffer(raw, dtype='<i4').astype('float32') / 2147483648.0
+    raise ValueError(f"Unsupported sample width: {width} bytes")
+
+
+def _read_float_wav(path):
+    with open(path, 'rb') as f:
+        blob = f.read()
+    if blob[:4] not in (b'RIFF', b'RF64') or blob[8:12] != b'WAVE':
+        raise ValueError(f"{path} is not a WAV file")
+    pos = 12
+    fmt = None
+    while pos + 8 <= len(blob):
+        chunk_id = blob[pos:pos + 4]
+        size = int.from_bytes(blob[pos + 4:pos + 8], 'little')
+        body = pos + 8
+        if chunk_id == b'fmt ':
+            field = lambda offset, width: int.from_bytes(blob[body + offset:body + offset + width], 'little')
+            # format tag, channels, sample rate, bits per sample
+            fmt = (field(0, 2), field(2, 2), field(4, 4), field(14, 2))
+        elif chunk_id == b'data' and fmt is not None:
+            tag, channels, sample_rate, bits = fmt
+            if size == 0xFFFFFFFF:
+                size = len(blob) - body  # RF64: real size is in ds64, data runs to the end
+            if bits == 32:
+                return np.frombuffer(blob[body:body + size], dtype='<f4').copy(), channels, sample_rate
+            if bits == 64:
+                return np.frombuffer(blob[body:body + size], dtype='<f8').astype('float32'), channels, sample_rate
+            raise ValueError(f"Unsupported float WAV: {bits} bits")
+        pos = body + size + (size & 1)
+    raise ValueError(f"{path} has no audio data")
+
+
+class WavWriter:
+    """
+    Streams 32-bit float samples to a WAV file, for recordings of any length
+
+    The header reserves a JUNK chunk the size of an RF64 `ds64` chunk.
+    Sizes are patched in after every write, so a crash still leaves a
+    playable file. If the file passes the 4 GB limit of plain WAV, `close()`
+    turns it into RF64 by renaming RIFF and filling JUNK in as ds64.
+    """
+
+    HEADER_SIZE = 80
+    _DATA_SIZE_OFFSET = 76
+
+    def __init__(self, path, sample_rate, channels=1):
+        self.path = path
+        self.channels = channels
+        self.data_bytes = 0
+        self._file = open(path, 'wb')
+        block_align = 4 * channels
+        header = b''.join([
+            b'RIFF', (0).to_bytes(4, 'little'), b'WAVE',
+            b'JUNK', (28).to_bytes(4, 'little'), bytes(28),
+            b'fmt ', (16).to_bytes(4, 'little'),
+            (3).to_bytes(2, 'little'),                          # IEEE float
+            channels.to_bytes(2, 'little'),
+            int(sample_rate).to_bytes(4, 'little'),
+            (int(sample_rate) * block_align).to_bytes(4, 'little'),
+            block_align.to_bytes(2, 'little'),
+            (32).to_bytes(2, 'little'),
+            b'data', (0).to_bytes(4, 'little'),
+        ])
+        assert len(header) == self.HEADER_SIZE
+        self._file.write(header)
+
+    def write(self, samples):
+        """Append float32 samples (frames x channels, or 1-D for mono)"""
+        data = np.ascontiguousarray(samples, dtype='<f4')
+        self._file.write(data.data)
+        self.data_bytes += data.nbytes
+        if self.HEADER_SIZE - 8 + self.data_bytes < 0xFFFFFFFF:
+            self._patch_sizes()
+
+    def _patch_sizes(self):
+        f = self._file
+        end = f.tell()
+        f.seek(4)
+        f.write((self.HEADER_SIZE - 8 + self.data_bytes).to_bytes(4, 'little'))
+        f.seek(self._DATA_SIZE_OFFSET)
+        f.write(self.data_bytes.to_bytes(4, 'little'))
+        f.seek(end)
+
+    def close(self):
+        f = self._file
+        if f.closed:
+            return
+        riff_size = self.HEADER_SIZE - 8 + self.data_bytes
+        if riff_size >= 0xFFFFFFFF:
+            # RF64: the real sizes live in ds64, the 32-bit fields say "see ds64"
+            frames = self.data_bytes // (4 * self.channels)
+            f.seek(0)
+            f.write(b'RF64' + (0xFFFFFFFF).to_bytes(4, 'little'))
+            f.seek(12)
+            f.write(b'ds64' + (28).to_bytes(4, 'little')
+                    + riff_size.to_bytes(8, 'little')
+                    + self.data_bytes.to_bytes(8, 'little')
+                    + frames.to_bytes(8, 'little')
+                    + (0).to_bytes(4, 'little'))
+            f.seek(self._DATA_SIZE_OFFSET)
+            f.write((0xFFFFFFFF).to_bytes(4, 'little'))
+        f.close()
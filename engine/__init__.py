@@ -0,0 +1,14 @@
+from .control import ControlQueue
+from .timing import CallbackTimer
+from .gcmode import GCScheduler
+from .blocksize import AdaptiveBlocksize
+from .governor import QualityGovernor
+from .ring import SampleRing
+from .metering import Meter
+from .recorder import SessionRecorder
+from .tuner import Tuner
+from .pipeline import PipelinedChain
+from .dsp_process import ParameterBlock, EngineProcess
+from .backends import AudioBackend, SoundDeviceBackend, SimulatedBackend
+
+__all__ = ['ControlQueue', 'CallbackTimer', 'GCScheduler', 'AdaptiveBlocksize', 'QualityGovernor', 'SampleRing', 'Meter', 'SessionRecorder', 'Tuner', 'PipelinedChain', 'ParameterBlock', 'EngineProcess', 'AudioBackend', 'SoundDeviceBackend', 'SimulatedBackend']
\ No newline at end of file
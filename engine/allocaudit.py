@@ -0,0 +1,220 @@
+"""
+Allocation audit: how much memory each effect allocates per block
+
+    python -m engine.allocaudit
+    python -m engine.allocaudit --effects Echo,FDNReverb --frames 128
+    python -m engine.allocaudit --check
+    python -m engine.loadtest --effects UltraMetal,Reverb --alloc-audit
+
+Every effect is run standalone on noise until it settles, then each block
+is measured with tracemalloc: the peak bytes allocated during the call,
+temporaries included, even if freed before it returns. Anything that
+allocates in steady state is reported as `ALLOC`.
+`assert_no_steady_state_allocations` is the same check for use in a test.
+
+`--check` holds the effects in ALLOCATION_BUDGETS to their budgets at two
+block sizes and exits 1 if one goes over. The rest are known exceptions:
+the original per-sample effects still build temporaries (a `np.tanh`
+result, the dry/wet mix) that grow with the block, and are only reported.
+In the load test, `--alloc-audit` measures the running app's effects while
+streaming, including the bytes and memory blocks still held after each
+call.
+"""
+import argparse
+import sys
+import tracemalloc
+import numpy as np
+from config import SAMPLE_RATE, BUFFER_SIZE
+from effects.presets import EFFECT_TYPES
+
+# Per-call noise from the interpreter itself (a float result, a bound
+# method). 128 bytes is a 32-sample float32 block
+DEFAULT_TOLERANCE = 128
+
+# Effects written to run on preallocated buffers, and the bytes each may
+# allocate per block: the views and small objects every call makes, which
+# don't grow with the block. A temporary array would
+ALLOCATION_BUDGETS = {
+    'Clean': DEFAULT_TOLERANCE,
+    'PitchShifter': 4096,
+    'Harmonizer': 2048,
+    'FDNReverb': 3072,
+    'Convolution': 2048,
+}
+
+
+class AllocationStats:
+    """Running totals for one audited effect"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.allocating = 0   # Calls whose peak went over the tolerance
+        self.peak_total = 0
+        self.peak_max = 0
+        self.kept_total = 0   # Bytes still held when the call returned
+        self.blocks_total = 0  # Memory blocks (objects, buffers) still held
+
+    def add(self, peak, kept, blocks, tolerance):
+        self.calls += 1
+        self.allocating += peak > tolerance
+        self.peak_total += peak
+        self.peak_max = max(self.peak_max, peak)
+        self.kept_total += kept
+        self.blocks_total += blocks
+
+    def line(self):
+        calls = max(1, self.calls)
+        return (f"{self.name:<28} {self.calls:>7} calls  peak {self.peak_total / calls:>9.0f} B/block "
+                f"(max {self.peak_max:>8})  kept {self.kept_total / calls:>8.0f} B/block  "
+                f"{self.blocks_total / calls:>6.1f} blocks/call  {self.allocating:>6} allocating")
+
+
+class AllocationAudit:
+    """
+    Wraps the `process` of a set of effects with tracemalloc measurements
+
+        audit = AllocationAudit([app.effect_chain, *app.effects, app.looper])
+        audit.start()
+        ...stream...
+        audit.stop()
+        print(audit.report())
+
+    Key Concepts:
+    - tracemalloc sees NumPy's array buffers as well as Python objects.
+      `reset_peak()` before a call and the peak after it catch temporaries
+      (an `np.tanh` result, a `zeros_like`) that are gone by the time the
+      call returns
+    - Wrapped effects nest: a chain's numbers include its effects. A
+      nested call resets the peak, so it hands its own peak back up to the
+      caller's measurement when it returns
+    - tracemalloc is process-wide: allocations by other threads during a
+      call count against the effect. Audit without background load for
+      clean numbers, and expect it to slow everything down
+    """
+
+    def __init__(self, effects, tolerance=DEFAULT_TOLERANCE):
+        self.effects = list(effects)
+        self.tolerance = tolerance
+        self.stats = {}
+        self._stack = []  # [peak seen so far] per call in progress
+        self._started_tracing = False
+
+    def _wrap(self, effect, stats):
+        process = effect.process
+
+        def audited(audio, frames):
+            if self._stack:
+                # Keep the caller's peak before resetting it for this call
+                self._stack[-1] = max(self._stack[-1], tracemalloc.get_traced_memory()[1])
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            self._stack.append(start)
+            blocks = sys.getallocatedblocks()  # Last, so the bookkeeping above isn't counted
+            try:
+                return process(audio, frames)
+            finally:
+                blocks = sys.getallocatedblocks() - blocks
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, self._stack.pop())
+                stats.add(peak - start, current - start, blocks, self.tolerance)
+                if self._stack:
+                    self._stack[-1] = max(self._stack[-1], peak)
+
+        return audited
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        for effect in self.effects:
+            stats = self.stats.setdefault(id(effect), AllocationStats(effect.name))
+            effect.process = self._wrap(effect, stats)  # Shadows the class method
+
+    def stop(self):
+        for effect in self.effects:
+            vars(effect).pop('process', None)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self):
+        rows = sorted(self.stats.values(), key=lambda s: s.peak_total / max(1, s.calls), reverse=True)
+        return "\n".join(stats.line() for stats in rows if stats.calls)
+
+
+def steady_state_allocations(effect, frames=128, warmup=16, blocks=64, seed=0):
+    """Peak bytes allocated by each of `blocks` calls, after `warmup` calls to settle"""
+    noise = (0.1 * np.random.default_rng(seed).standard_normal(frames)).astype('float32')
+    for _ in range(warmup):
+        effect.process(noise.copy(), frames)
+    inputs = [noise.copy() for _ in range(blocks)]  # Made up front, not measured
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        # One more call under tracing, so tracemalloc's own bookkeeping settles
+        effect.process(noise.copy(), frames)
+        peaks = []
+        for audio in inputs:
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            effect.process(audio, frames)
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+    finally:
+        if started:
+            tracemalloc.stop()
+    return peaks
+
+
+def assert_no_steady_state_allocations(effect, frames=128, warmup=16, blocks=64, tolerance=DEFAULT_TOLERANCE):
+    """Raise AssertionError if `effect` allocates more than `tolerance` bytes in any settled block"""
+    peaks = steady_state_allocations(effect, frames, warmup, blocks)
+    worst = max(peaks)
+    if worst > tolerance:
+        allocating = sum(peak > tolerance for peak in peaks)
+        raise AssertionError(
+            f"{effect.name} allocates up to {worst} bytes per {frames}-frame block in steady state "
+            f"({allocating} of {blocks} blocks over {tolerance} bytes)"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--effects', default=','.join(EFFECT_TYPES))
+    parser.add_argument('--frames', type=int, default=BUFFER_SIZE)
+    parser.add_argument('--blocks', type=int, default=64)
+    parser.add_argument('--tolerance', type=int, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--check', action='store_true',
+                        help="hold the effects in ALLOCATION_BUDGETS to their budgets, at --frames and 8x that")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        failures = 0
+        for effect_name, budget in ALLOCATION_BUDGETS.items():
+            for frames in (args.frames, 8 * args.frames):
+                try:
+                    assert_no_steady_state_allocations(EFFECT_TYPES[effect_name](SAMPLE_RATE), frames,
+                                                       blocks=args.blocks, tolerance=budget)
+                except AssertionError as e:
+                    failures += 1
+                    print(f"FAIL {e}")
+                else:
+                    print(f"ok   {effect_name} within {budget} bytes per {frames}-frame block")
+        print(f"\n{failures} failure(s)")
+        return 1 if failures else 0
+
+    allocating = 0
+    for effect_name in args.effects.split(','):
+        effect = EFFECT_TYPES[effect_name](SAMPLE_RATE)
+        peaks = np.array(steady_state_allocations(effect, args.frames, blocks=args.blocks))
+        over = int(np.sum(peaks > args.tolerance))
+        allocating += over > 0
+        print(f"{effect_name:<16} peak mean {peaks.mean():>9.0f} B  max {peaks.max():>8} B  "
+              f"{over:>3}/{len(peaks)} blocks  {'ALLOC' if over else 'ok'}")
+    print(f"\n{allocating} effect(s) allocating in steady state")
+    return 1 if allocating else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
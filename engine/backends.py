@@ -0,0 +1,179 @@
+import threading
+import time
+import numpy as np
+
+
+class AudioBackend:
+    """
+    Where audio comes from and goes to
+
+    `stream()` returns a context manager that, while open, calls
+    `callback(indata, outdata, frames, time, status)` once per block,
+    exactly like a sounddevice.Stream callback.
+    """
+
+    def devices(self):
+        """Human readable list of devices"""
+        return ""
+
+    def stream(self, callback, sample_rate, blocksize, latency="low"):
+        raise NotImplementedError
+
+
+class SoundDeviceBackend(AudioBackend):
+    """Real audio hardware through PortAudio"""
+
+    def __init__(self, input_device, output_device):
+        import sounddevice as sd  # Only needed when talking to hardware
+        self.sd = sd
+        self.device = (input_device, output_device)
+
+    def devices(self):
+        return self.sd.query_devices()
+
+    def stream(self, callback, sample_rate, blocksize, latency="low"):
+        return self.sd.Stream(
+            samplerate=sample_rate,
+            blocksize=blocksize,
+            dtype="float32",
+            channels=1,
+            callback=callback,
+            device=self.device,
+            latency=latency,
+        )
+
+
+class CallbackFlags:
+    """Stand-in for sounddevice.CallbackFlags: falsy unless something went wrong"""
+
+    def __init__(self):
+        self.input_underflow = False
+        self.input_overflow = False
+        self.output_underflow = False
+        self.output_overflow = False
+        self.priming_output = False
+
+    def __bool__(self):
+        return (self.input_underflow or self.input_overflow or self.output_underflow
+                or self.output_overflow or self.priming_output)
+
+    def __repr__(self):
+        names = [name for name, value in vars(self).items() if value]
+        return f"<CallbackFlags: {' | '.join(names) if names else 'none'}>"
+
+
+class CallbackTime:
+    """Stand-in for the time info struct sounddevice passes to callbacks"""
+
+    def __init__(self):
+        self.currentTime = 0.0
+        self.inputBufferAdcTime = 0.0
+        self.outputBufferDacTime = 0.0
+
+
+class SimulatedBackend(AudioBackend):
+    """
+    Drives the callback from a thread on a wall-clock schedule
+
+    Input is a float32 array (recorded or synthetic, looped). Each block
+    has a deadline one block-duration after it was due; a callback that
+    returns later than that is counted in `deadline_misses` and the next
+    callback gets `output_underflow` set, as a real device would report.
+    Slots missed entirely are skipped rather than caught up.
+    """
+
+    def __init__(self, source, record_seconds=0.0):
+        self.source = np.asarray(source, dtype='float32')
+        self.record_seconds = record_seconds
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.callbacks = 0
+        self.deadline_misses = 0
+        self.skipped_blocks = 0
+        self.max_lateness = 0.0
+        self.recorded = None
+
+    def devices(self):
+        return f"Simulated device ({len(self.source)} samples of input, looped)"
+
+    def stream(self, callback, sample_rate, blocksize, latency="low"):
+        return _SimulatedStream(self, callback, sample_rate, blocksize or 128)
+
+
+class _SimulatedStream:
+    def __init__(self, backend, callback, sample_rate, blocksize):
+        self.backend = backend
+        self.callback = callback
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        backend = self.backend
+        frames = self.blocksize
+        period = frames / self.sample_rate
+        source = backend.source
+        indata = np.zeros((frames, 1), dtype='float32')
+        outdata = np.zeros((frames, 1), dtype='float32')
+        time_info = CallbackTime()
+        status = CallbackFlags()
+
+        record = None
+        if backend.record_seconds > 0:
+            record = np.zeros(int(backend.record_seconds * self.sample_rate), dtype='float32')
+            backend.recorded = record
+        recorded = 0
+
+        position = 0
+        start = time.perf_counter()
+        slot = 0
+        late = False
+        while not self._stop.is_set():
+            due = start + slot * period
+            now = time.perf_counter()
+            if due > now:
+                time.sleep(due - now)
+
+            # Next block of input, wrapping around the source
+            idx = (position + np.arange(frames)) % len(source)
+            indata[:, 0] = source[idx]
+            position = (position + frames) % len(source)
+
+            status.output_underflow = late
+            now = time.perf_counter()
+            time_info.currentTime = now
+            time_info.inputBufferAdcTime = due
+            time_info.outputBufferDacTime = due + 2 * period
+            self.callback(indata, outdata, frames, time_info, status)
+            finished = time.perf_counter()
+            backend.callbacks += 1
+
+            if record is not None and recorded < len(record):
+                n = min(frames, len(record) - recorded)
+                record[recorded:recorded + n] = outdata[:n, 0]
+                recorded += n
+
+            # The block had to be ready one period after it was due
+            lateness = finished - (due + period)
+            late = lateness > 0
+            if late:
+                backend.deadline_misses += 1
+                backend.max_lateness = max(backend.max_lateness, lateness)
+
+            slot += 1
+            behind = int((finished - start) / period) - slot
+            if behind > 0:
+                # Those slots came and went with nothing delivered
+                backend.skipped_blocks += behind
+                slot += behind
@@ -0,0 +1,73 @@
+import time
+import numpy as np
+
+
+class AdaptiveBlocksize:
+    """
+    Picks the smallest device block size that runs without xruns
+
+    Watches the callback load recorded by a CallbackTimer. An xrun moves up
+    to the next block size straight away, and so does a peak load above
+    `grow_load` once the current size has been kept for `dwell` seconds.
+    After `settle_seconds` (or `dwell`, if longer) with the peak load below
+    `shrink_load`, it tries the next size down. The stream owner polls
+    `update()` and reopens the stream when it returns True.
+
+    The gap between the two loads is the hysteresis: a size that only just
+    grew is not shrunk again by the same load. The dwell is the backoff: it
+    doubles with every change, up to `max_dwell`, so a load sitting on the
+    edge of a size can't reopen the stream over and over. A change after a
+    size has held for twice `max_dwell` starts the backoff over.
+    """
+
+    def __init__(self, timer, sizes=(128, 256, 512, 1024), start=None,
+                 grow_load=0.7, shrink_load=0.3, settle_seconds=10.0, window=256,
+                 min_dwell=1.0, max_dwell=120.0):
+        self.timer = timer
+        self.sizes = sorted(sizes)
+        self.index = self.sizes.index(start) if start in self.sizes else 0
+        self.grow_load = grow_load
+        self.shrink_load = shrink_load
+        self.settle_seconds = settle_seconds
+        self.window = window
+        self.min_dwell = min_dwell
+        self.max_dwell = max_dwell
+        self.dwell = min_dwell  # Seconds a size is kept before load alone can change it
+        self._restart()
+
+    @property
+    def current(self):
+        return self.sizes[self.index]
+
+    @property
+    def latency(self):
+        """Suggested device latency in seconds for the current block size"""
+        return 2 * self.current / self.timer.sample_rate
+
+    def _restart(self):
+        self._since = time.monotonic()
+        self._first_callback = self.timer.count
+        self._xruns = self.timer.total_xruns
+
+    def update(self):
+        """Re-evaluate from recent callbacks, True if the block size changed"""
+        seen = self.timer.count - self._first_callback
+        if seen < 8:
+            return False  # Let a freshly opened stream settle
+        _, loads, _ = self.timer.recent(min(seen, self.window))
+        peak = float(np.max(loads))
+        xruns = self.timer.total_xruns - self._xruns
+        held = time.monotonic() - self._since
+
+        if (xruns or (peak > self.grow_load and held >= self.dwell)) and self.index < len(self.sizes) - 1:
+            self.index += 1
+        elif (held > max(self.settle_seconds, self.dwell)
+              and peak < self.shrink_load and self.index > 0):
+            self.index -= 1
+        else:
+            return False
+        if held > 2 * self.max_dwell:
+            self.dwell = self.min_dwell  # The last size settled, forget the backoff
+        self.dwell = min(2 * self.dwell, self.max_dwell)
+        self._restart()
+        return True
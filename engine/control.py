@@ -0,0 +1,72 @@
+import asyncio
+import time
+from collections import deque
+
+
+class ControlTicket:
+    """A batch of actions submitted to the audio thread, and their results"""
+
+    def __init__(self, actions):
+        self.actions = actions
+        self.results = None
+        self.done = False
+
+
+class ControlQueue:
+    """
+    Hands state changes to the audio thread
+
+    Control code submits a batch of callables; the audio callback calls
+    `drain()` at the top of every block and runs everything pending, so a
+    command takes effect within one block no matter how many arrive. The
+    callback never blocks: submitting and draining only touch a deque.
+    """
+
+    def __init__(self, idle_timeout=0.2, poll_interval=0.0005):
+        self._pending = deque()
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.last_drain = 0.0
+
+    def submit(self, actions):
+        ticket = ControlTicket(list(actions))
+        self._pending.append(ticket)
+        return ticket
+
+    def drain(self):
+        """Run all pending actions - called from the audio thread"""
+        self.last_drain = time.perf_counter()
+        while self._pending:
+            ticket = self._pending.popleft()
+            results = []
+            for action in ticket.actions:
+                try:
+                    results.append(action())
+                except Exception as e:  # never let a command kill the stream
+                    results.append(e)
+            ticket.results = results
+            ticket.done = True
+
+    @property
+    def audio_running(self):
+        """True while an audio callback has drained the queue recently"""
+        return time.perf_counter() - self.last_drain < self.idle_timeout
+
+    def _drain_if_idle(self):
+        # With no stream running nothing else will apply the commands
+        if not self.audio_running:
+            self.drain()
+
+    def wait(self, ticket):
+        """Block until the audio thread has applied a ticket"""
+        while not ticket.done:
+            self._drain_if_idle()
+            time.sleep(self.poll_interval)
+        return ticket.results
+
+    async def wait_async(self, ticket):
+        """Await a ticket without blocking the event loop"""
+        while not ticket.done:
+            self._drain_if_idle()
+            await asyncio.sleep(self.poll_interval)
+        return ticket.results
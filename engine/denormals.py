@@ -0,0 +1,104 @@
+"""
+Denormal benchmark: CPU per block while recursive effects ring out
+
+    python -m engine.denormals
+    python -m engine.denormals --effects Reverb,FDNReverb --seconds 20
+
+Every effect gets a short burst of noise, then silence, and each block of
+the tail is timed, once with the denormal guards in effects/denormal.py
+switched off and once with them on. Without them the feedback paths
+decay into denormal floats and the tail gets slower the quieter it gets.
+
+The burst is at -660 dBFS, so the tails reach the denormal range within
+seconds instead of the minutes a real note takes; `--loud` plays a real
+one instead.
+Reported per run: mean CPU per block over the first second of the tail,
+the slowest second and the last one, and how many denormal values the
+effect holds at the end.
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from config import SAMPLE_RATE, BUFFER_SIZE
+from effects import denormal
+from effects.presets import EFFECT_TYPES
+
+RECURSIVE = ('Echo', 'Reverb', 'FDNReverb', 'Flanger', 'WahWah', 'UltraMetal', 'LowPassFilter')
+
+# Burst levels: -660 dBFS, a little above the float32 denormal range
+# (1e-38), so tails get there in seconds. A real note's tail takes minutes
+QUIET = 1e-33
+LOUD = 0.5
+FLOAT64_TINY = sys.float_info.min
+
+
+def _is_denormal(value):
+    return value != 0.0 and abs(value) < FLOAT64_TINY
+
+
+def count_denormals(effect):
+    """Denormal values in an effect's buffers and scalar state"""
+    count = 0
+
+    def visit(value):
+        nonlocal count
+        if isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+            tiny = float(np.finfo(value.dtype).tiny)
+            count += int(np.count_nonzero((value != 0) & (np.abs(value) < tiny)))
+        elif isinstance(value, np.floating):
+            count += bool(value != 0 and abs(value) < np.finfo(value.dtype).tiny)
+        elif isinstance(value, float):
+            count += _is_denormal(value)
+        elif isinstance(value, list):
+            for item in value:
+                visit(item)
+
+    for value in vars(effect).values():
+        visit(value)
+    return count
+
+
+def ring_out(effect_name, flush, seconds, frames, level=QUIET, seed=0):
+    """Per-block CPU seconds for an effect's tail after a burst, and the denormals it holds at the end"""
+    denormal.enabled = flush
+    effect = EFFECT_TYPES[effect_name](SAMPLE_RATE)
+    rng = np.random.default_rng(seed)
+    burst_blocks = max(1, int(0.25 * SAMPLE_RATE / frames))
+    for _ in range(burst_blocks):
+        effect.process((level * rng.standard_normal(frames)).astype('float32'), frames)
+    silence = np.zeros(frames, dtype='float32')
+    times = []
+    for _ in range(int(seconds * SAMPLE_RATE / frames)):
+        start = time.perf_counter()
+        effect.process(silence.copy(), frames)
+        times.append(time.perf_counter() - start)
+    return np.array(times), count_denormals(effect)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--effects', default=','.join(RECURSIVE))
+    parser.add_argument('--frames', type=int, default=BUFFER_SIZE)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--loud', action='store_true', help="a real-level burst (needs minutes of tail)")
+    args = parser.parse_args(argv)
+
+    enabled = denormal.enabled
+    second = max(1, int(SAMPLE_RATE / args.frames))
+    print(f"{'effect':<14} {'guards':<7} {'first 1s':>12} {'slowest 1s':>12} {'last 1s':>12} {'denormals':>10}")
+    try:
+        for effect_name in args.effects.split(','):
+            for flush in (False, True):
+                times, denormals = ring_out(effect_name, flush, args.seconds, args.frames,
+                                             LOUD if args.loud else QUIET)
+                seconds = times[:len(times) // second * second].reshape(-1, second).mean(axis=1) * 1e6
+                print(f"{effect_name:<14} {'on' if flush else 'off':<7} {seconds[0]:>9.1f} us "
+                      f"{seconds.max():>9.1f} us {seconds[-1]:>9.1f} us {denormals:>10}")
+    finally:
+        denormal.enabled = enabled
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
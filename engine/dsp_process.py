@@ -0,0 +1,264 @@
+import multiprocessing
+import queue
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+
+class ParameterBlock:
+    """
+    Every registry parameter in one block of shared memory
+
+    Three arrays, one slot per "Effect.param":
+        values    targets written by the UI process
+        versions  bumped after each write, so the DSP side sees what changed
+        current   the targets as the DSP side has them, published back
+
+    The UI process is the only writer of `values`/`versions` and the DSP
+    process the only writer of `current`, so neither side needs a lock.
+    It quacks like a ParameterRegistry (names/get/set/describe), so the
+    menu's `set` and `params` commands work on it unchanged.
+    """
+
+    def __init__(self, names, shm_name=None, bounds=None):
+        self._names = list(names)
+        self.index = {key: i for i, key in enumerate(self._names)}
+        self.bounds = bounds or {}  # key -> (minimum, maximum), for clamping on the UI side
+        n = len(self._names)
+        self._owner = shm_name is None
+        self._shm = shared_memory.SharedMemory(name=shm_name, create=self._owner, size=max(1, n) * 24)
+        self.values = np.ndarray(n, dtype='float64', buffer=self._shm.buf)
+        self.versions = np.ndarray(n, dtype='int64', buffer=self._shm.buf, offset=n * 8)
+        self.current = np.ndarray(n, dtype='float64', buffer=self._shm.buf, offset=n * 16)
+        self._seen = np.zeros(n, dtype='int64')
+        self._changed = np.zeros(n, dtype=bool)
+
+    @classmethod
+    def create(cls, registry):
+        """A new block holding the registry's current targets"""
+        block = cls(registry.names(), bounds={key: registry.bounds(key) for key in registry.names()})
+        block.versions[:] = 0
+        block.publish(registry)
+        block.values[:] = block.current
+        return block
+
+    @property
+    def shm_name(self):
+        return self._shm.name
+
+    def names(self):
+        return list(self._names)
+
+    def get(self, key):
+        return float(self.current[self.index[key]])
+
+    def set(self, key, value):
+        """UI side: write a new target. Raises KeyError, returns the clamped value"""
+        i = self.index[key]
+        minimum, maximum = self.bounds.get(key, (None, None))
+        value = float(value)
+        if minimum is not None:
+            value = max(minimum, value)
+        if maximum is not None:
+            value = min(maximum, value)
+        self.values[i] = value
+        self.versions[i] += 1  # After the value, so the reader never sees a new version with an old value
+        return value
+
+    def describe(self):
+        return [f"{key} = {self.get(key):g}" for key in self._names]
+
+    def apply(self, registry):
+        """DSP side, from the audio callback: hand changed values to the registry"""
+        np.not_equal(self.versions, self._seen, out=self._changed)
+        if not self._changed.any():
+            return
+        for i in np.flatnonzero(self._changed):
+            self._seen[i] = self.versions[i]
+            registry.set(self._names[i], self.values[i])
+
+    def publish(self, registry):
+        """DSP side: copy the registry's targets into `current` for the UI"""
+        for i, key in enumerate(self._names):
+            self.current[i] = registry.get(key)
+
+    def close(self):
+        if self._shm is not None:
+            del self.values, self.versions, self.current
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
+
+
+def serve_commands(app, block, commands, replies, status, interval):
+    """
+    DSP process: run menu commands from the UI and publish status lines
+
+    Only whole command lines arrive here, as (sequence number, line); the
+    reply goes back with the same number. Parameter changes go straight
+    through the shared block and never wake this thread.
+    """
+    sources = app.status_sources()
+    next_status = 0.0
+    while app.running:
+        try:
+            sequence, line = commands.get(timeout=interval)
+        except queue.Empty:
+            line = None
+        if line is not None:
+            try:
+                reply = app.menu.execute(line)
+            except Exception as e:
+                # One failing command must not take the command thread down
+                reply = f"Error: {e}"
+            replies.put((sequence, reply))
+        now = time.monotonic()
+        if now >= next_status:
+            next_status = now + interval
+            block.publish(app.parameters)
+            text = " ".join([app.menu.status_line()] + [source() for source in sources])
+            try:
+                status.put_nowait(text)
+            except queue.Full:
+                pass  # The UI hasn't read the last ones, it only wants the newest
+
+
+def engine_main(session, commands, replies, status, events, status_interval):
+    """
+    Entry point of the DSP process
+
+    `session()` builds the app and returns (app, run); `run()` streams
+    audio until the app stops and returns a result for the UI (or None).
+    """
+    app, run = session()
+    block = ParameterBlock.create(app.parameters)
+    app.parameter_block = block
+    status.cancel_join_thread()  # Unread status lines mustn't hold up exit
+    events.put(("ready", block.shm_name, block.bounds))
+    server = threading.Thread(target=serve_commands,
+                              args=(app, block, commands, replies, status, status_interval), daemon=True)
+    server.start()
+    result = None
+    try:
+        result = run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.running = False
+        server.join(1.0)
+        events.put(("done", result))
+        block.close()
+
+
+class EngineProcess:
+    """
+    The audio stream and effect chain in a process of their own
+
+        engine = EngineProcess(session)   # session() -> (app, run), picklable
+        engine.start()
+        engine.parameters.set("Tremolo.depth", 0.8)
+        engine.execute("c")
+
+    Key Concepts:
+    - One interpreter, one GIL: in a single process the menu, its print
+      calls, the socket server and the audio callback take turns holding
+      it, and a busy UI shows up as callback jitter. Here the UI process
+      can be as busy as it likes, the DSP process never waits on it
+    - Parameter moves (the frequent, continuous kind) go through a shared
+      ParameterBlock: the UI writes a value and bumps its version, the
+      audio callback compares versions at the top of each block. No
+      message, no wakeup, no pickling
+    - Everything else is a menu command line sent over a queue and run by
+      a small command thread in the DSP process, which replies on another
+      queue. Status lines come back on a third, bounded queue; the UI
+      keeps the newest
+    - Spawned, not forked: the DSP process starts from a clean interpreter
+      with no UI threads or sockets inherited
+    """
+
+    def __init__(self, session, status_rate_hz=10.0, timeout=5.0, start_timeout=60.0):
+        self.session = session
+        self.status_interval = 1.0 / max(0.1, status_rate_hz)
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.parameters = None
+        self.result = None
+        self.process = None
+        self._status = ""
+        self._lock = threading.Lock()  # One command in flight at a time
+        self._sequence = 0  # Numbers commands, so a reply that came too late is recognised and dropped
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        ctx = multiprocessing.get_context('spawn')
+        self._commands = ctx.Queue()
+        self._replies = ctx.Queue()
+        self._status_queue = ctx.Queue(maxsize=4)
+        self._events = ctx.Queue()
+        # Not a daemon: it may start pipeline stage processes of its own
+        self.process = ctx.Process(target=engine_main, name="dsp-engine",
+                                   args=(self.session, self._commands, self._replies,
+                                         self._status_queue, self._events, self.status_interval))
+        self.process.start()
+        try:
+            kind, shm_name, bounds = self._events.get(timeout=self.start_timeout)
+        except queue.Empty:
+            self.process.terminate()
+            raise RuntimeError("DSP process did not start") from None
+        self.parameters = ParameterBlock(list(bounds), shm_name=shm_name, bounds=bounds)
+        return f"DSP engine running in process {self.process.pid}"
+
+    def execute(self, line):
+        """Run one menu command in the DSP process, returns its reply"""
+        with self._lock:
+            if not self.alive:
+                return "DSP engine is not running"
+            self._sequence += 1
+            self._commands.put((self._sequence, line))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    sequence, reply = self._replies.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    return "DSP engine not responding"
+                if sequence == self._sequence:
+                    return reply
+                # Otherwise the reply to an earlier command that timed out
+
+    def status_line(self):
+        """Newest status line published by the DSP process"""
+        try:
+            while True:
+                self._status = self._status_queue.get_nowait()
+        except queue.Empty:
+            pass
+        return self._status
+
+    def wait(self, timeout=None):
+        """Block until the session ends, returns what its run() returned"""
+        try:
+            while True:
+                kind, *payload = self._events.get(timeout=timeout)
+                if kind == "done":
+                    self.result = payload[0]
+                    return self.result
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        if self.alive:
+            self._sequence += 1
+            self._commands.put((self._sequence, "q"))
+            self.process.join(self.timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        if self.parameters is not None:
+            self.parameters.close()
+            self.parameters = None
+        return "DSP engine stopped"
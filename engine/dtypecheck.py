@@ -0,0 +1,145 @@
+"""
+dtype check: find effects that leave float32 in their blocks or state
+
+    python -m engine.dtypecheck
+    python -m engine.dtypecheck --effects UltraMetal,Tremolo
+    python -m engine.loadtest --effects UltraMetal,Reverb --dtype-check
+
+Every effect is fed float32 noise, with its parameters moved halfway
+through so ramping paths run too. It fails if it returns anything but its
+`dtype` (float32), or if it keeps float64 arrays or NumPy float64 scalars
+in its state that it hasn't declared in `float64_state`. An undeclared
+float64 scalar is the usual culprit: one `np.float64` coefficient times a
+float32 block gives a float64 block, twice the memory traffic, and a
+conversion back later.
+"""
+import argparse
+import numpy as np
+from config import SAMPLE_RATE, BUFFER_SIZE
+from effects.base import Effect
+from effects.parameters import parameter_names
+from effects.presets import EFFECT_TYPES
+
+WIDE = (np.float64, np.complex128, np.longdouble)
+
+
+def _wide(value):
+    dtype = getattr(value, 'dtype', None)
+    return dtype is not None and dtype.type in WIDE
+
+
+def scan_state(obj, prefix="", seen=None):
+    """Undeclared float64 arrays and scalars kept on an effect and its helpers"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return []
+    seen.add(id(obj))
+    declared = getattr(type(obj), 'float64_state', ())
+    problems = []
+
+    def visit(name, value, depth):
+        if isinstance(value, np.ndarray):
+            if _wide(value):
+                problems.append(f"{prefix}{name} is a {value.dtype} array")
+        elif isinstance(value, np.generic):
+            if _wide(value):
+                problems.append(f"{prefix}{name} is a NumPy {value.dtype} scalar")
+        elif isinstance(value, (list, tuple)) and depth < 3:
+            for i, item in enumerate(value[:64]):
+                visit(f"{name}[{i}]", item, depth + 1)
+        elif isinstance(value, dict) and depth < 3:
+            for key, item in list(value.items())[:64]:
+                visit(f"{name}[{key!r}]", item, depth + 1)
+        elif hasattr(value, '__dict__') and type(value).__module__.startswith('effects') and depth < 3:
+            # Helpers (delay lines, filters, wrapped effects) follow their own declarations
+            problems.extend(scan_state(value, f"{prefix}{name}.", seen))
+
+    for name, value in vars(obj).items():
+        if name not in declared and name != '_smoothed':
+            visit(name, value, 0)
+    return problems
+
+
+def check_dtypes(effect, frames=128, blocks=16, seed=0):
+    """Problems found running `effect` on float32 noise (an empty list if none)"""
+    noise = (0.1 * np.random.default_rng(seed).standard_normal(frames)).astype('float32')
+    problems = set()
+    for block in range(blocks):
+        if block == blocks // 2:
+            # Ramping parameters take other code paths
+            for name in parameter_names(getattr(effect, 'inner', effect)):
+                target = getattr(effect, 'inner', effect)
+                setattr(target, name, getattr(target, name) * 0.9 + 0.01)
+        out = effect.process(noise.copy(), frames)
+        if out.dtype != effect.dtype:
+            problems.add(f"returns {out.dtype} blocks")
+    problems.update(scan_state(effect))
+    return sorted(problems)
+
+
+class DtypeCheck:
+    """
+    Wraps the `process` of a set of effects to catch non-float32 output
+
+        check = DtypeCheck(app.effects)
+        check.start()
+        ...stream...
+        check.stop()
+        print(check.report())
+
+    Costs one dtype comparison per call, so it can run while streaming.
+    `report()` adds what scan_state finds in each effect's state.
+    """
+
+    def __init__(self, effects):
+        self.effects = list(effects)
+        self.returned = {}  # id(effect) -> set of dtypes returned other than its own
+
+    def _wrap(self, effect, returned):
+        process = effect.process
+
+        def checked(audio, frames):
+            out = process(audio, frames)
+            if out.dtype != effect.dtype:
+                returned.add(str(out.dtype))
+            return out
+
+        return checked
+
+    def start(self):
+        for effect in self.effects:
+            effect.process = self._wrap(effect, self.returned.setdefault(id(effect), set()))
+
+    def stop(self):
+        for effect in self.effects:
+            vars(effect).pop('process', None)
+
+    def report(self):
+        lines = []
+        for effect in self.effects:
+            problems = [f"returns {dtype} blocks" for dtype in sorted(self.returned.get(id(effect), ()))]
+            problems += scan_state(effect)
+            lines.append(f"{effect.name:<28} {'; '.join(problems) if problems else 'ok'}")
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--effects', default=','.join(EFFECT_TYPES))
+    parser.add_argument('--frames', type=int, default=BUFFER_SIZE)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for effect_name in args.effects.split(','):
+        effect = EFFECT_TYPES[effect_name](SAMPLE_RATE)
+        problems = check_dtypes(effect, args.frames)
+        failures += bool(problems)
+        print(f"{effect_name:<16} {'ok' if not problems else 'FAIL'}")
+        for problem in problems:
+            print(f"    {problem}")
+    print(f"\n{failures} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
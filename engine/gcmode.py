@@ -0,0 +1,88 @@
+import gc
+import threading
+import time
+
+
+class GCScheduler:
+    """
+    Keeps Python's cyclic garbage collector out of the audio callback
+
+    A collection pauses every thread holding the GIL, the callback included,
+    and the automatic one fires whenever allocation counts cross a
+    threshold, on whichever thread happens to allocate. `enable()` moves
+    everything alive after startup into the permanent generation
+    (`gc.freeze()`), so collections stop rescanning it, and turns automatic
+    collection off. A housekeeping thread then collects itself: it waits
+    for a callback to finish and collects straight away, using the idle
+    time before the next block. Each collection is logged on the
+    CallbackTimer next to the callback timings.
+    """
+
+    def __init__(self, timer, interval=0.01, full_interval=30.0, max_wait=0.5):
+        self.timer = timer
+        self.interval = interval            # How often to look at the allocation counts
+        self.full_interval = full_interval  # Seconds between full (generation 2) collections
+        self.max_wait = max_wait            # Collect anyway if no callback shows up
+        self.enabled = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_full = time.monotonic()
+
+    def enable(self):
+        if self.enabled:
+            return
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+        self.enabled = True
+        self._stop.clear()
+        self._last_full = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self._stop.set()
+        self._thread.join()
+        gc.unfreeze()
+        gc.enable()
+        self.enabled = False
+
+    def _due(self):
+        """Generation to collect now, mirroring the automatic thresholds, or None"""
+        if time.monotonic() - self._last_full >= self.full_interval:
+            return 2
+        count0, count1, _ = gc.get_count()
+        threshold0, threshold1, _ = gc.get_threshold()
+        if count1 >= threshold1:
+            return 1
+        if count0 >= threshold0:
+            return 0
+        return None
+
+    def _wait_for_idle(self):
+        """Return just after a callback ends, when the most time is left before the next"""
+        seen = self.timer.count
+        deadline = time.perf_counter() + self.max_wait
+        while self.timer.count == seen and time.perf_counter() < deadline:
+            if self._stop.wait(0.0005):
+                return
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            generation = self._due()
+            if generation is None:
+                continue
+            self._wait_for_idle()
+            start = time.perf_counter()
+            gc.collect(generation)
+            self.timer.record_gc(start, time.perf_counter() - start, generation)
+            if generation == 2:
+                self._last_full = time.monotonic()
+
+    def status_text(self):
+        """Compact key=value text for streamed status lines"""
+        _, durations, _ = self.timer.recent_gc(self.timer.capacity)
+        worst = durations.max() * 1000 if len(durations) else 0.0
+        return f"gc={'scheduled' if self.enabled else 'auto'} gc_runs={self.timer.gc_count} gc_max_ms={worst:.2f}"
@@ -0,0 +1,86 @@
+import time
+
+
+class QualityGovernor:
+    """
+    Steps effects down to cheaper quality tiers before the callback runs late
+
+    Watches the load of every callback recorded by a CallbackTimer (1.0
+    means the callback used its whole block period) and calls
+    `set_quality` on effects that list more than one tier in
+    `quality_tiers`. `update()` runs at the end of each callback, on the
+    audio thread, so a step applies from the very next block.
+
+    Key Concepts:
+    - A callback over `degrade_load`, or an xrun, drops one running effect
+      by one tier. Then it waits `hold_blocks`, long enough for the
+      effect's fade to finish and the cheaper tier to show in the load,
+      before it drops another
+    - Steps go round the effects: every effect to its tier 1 before any
+      goes to tier 2, so one effect isn't stripped while the rest stay
+      untouched. Effects that are switched off are skipped, degrading them
+      saves nothing
+    - After `settle_seconds` with every callback under `restore_load`, the
+      newest step is undone, then the next after another settle period.
+      The gap between the two loads keeps it from flapping between tiers
+    - The effects fade between tiers themselves, so a step is not heard
+    """
+
+    def __init__(self, timer, effects, is_running=None, degrade_load=0.75, restore_load=0.4,
+                 settle_seconds=5.0, hold_blocks=32):
+        self.timer = timer
+        self.effects = [effect for effect in effects if len(effect.quality_tiers) > 1]
+        self.is_running = is_running or (lambda effect: True)
+        self.degrade_load = degrade_load
+        self.restore_load = restore_load
+        self.settle_seconds = settle_seconds
+        self.hold_blocks = hold_blocks
+        self.enabled = True
+        self.steps = []  # Effects stepped down, oldest first, one entry per tier
+        self.degrades = 0
+        self.restores = 0
+        self._seen = timer.count
+        self._xruns = timer.total_xruns
+        self._hold = 0
+        self._calm_since = time.monotonic()
+
+    def update(self):
+        """Audio thread, after CallbackTimer.end(): step a tier down or up if due"""
+        count = self.timer.count
+        if not self.enabled or count == self._seen:
+            return
+        self._seen = count
+        load = self.timer.loads[(count - 1) % self.timer.capacity]
+        xrun = self.timer.total_xruns != self._xruns
+        self._xruns = self.timer.total_xruns
+        now = time.monotonic()
+        if load >= self.restore_load or xrun:
+            self._calm_since = now
+        if self._hold:
+            self._hold -= 1
+            return
+        if (load > self.degrade_load or xrun) and self._degrade():
+            self._hold = self.hold_blocks
+        elif self.steps and now - self._calm_since >= self.settle_seconds:
+            effect = self.steps.pop()
+            effect.set_quality(effect.quality - 1)
+            self.restores += 1
+            self._calm_since = now
+
+    def _degrade(self):
+        """Drop the running effect at the lowest tier by one, False if none can go lower"""
+        best = None
+        for effect in self.effects:
+            if (effect.quality < len(effect.quality_tiers) - 1 and self.is_running(effect)
+                    and (best is None or effect.quality < best.quality)):
+                best = effect
+        if best is None:
+            return False
+        best.set_quality(best.quality + 1)
+        self.steps.append(best)
+        self.degrades += 1
+        return True
+
+    def status_text(self):
+        """Compact key=value text for streamed status lines"""
+        return f"quality_steps={len(self.steps)} degrades={self.degrades} restores={self.restores}"
@@ -0,0 +1,230 @@
+"""
+Headless load test: run GuitarFX on a simulated device and count deadline misses
+
+    python -m engine.loadtest --seconds 10 --effects UltraMetal,Reverb --load menu,gc
+    python -m engine.loadtest --seconds 10 --effects UltraMetal,Reverb --load menu,cpu --engine-process
+"""
+import argparse
+import os
+import threading
+import time
+import numpy as np
+from functools import partial
+from config import SAMPLE_RATE, BUFFER_SIZE
+from .backends import SimulatedBackend
+from .dsp_process import EngineProcess
+from .allocaudit import AllocationAudit
+from .dtypecheck import DtypeCheck
+from .signals import SIGNALS, make_signal
+
+
+class LoadGenerator:
+    """
+    Background threads competing with the audio callback
+
+    Kinds:
+        menu   render the menu, status and parameter commands, printing to devnull
+        gc     build cyclic garbage, so the collector has work to do
+        cpu    pure-Python busy loop holding the GIL
+        alloc  allocate and drop large NumPy arrays
+    """
+
+    KINDS = ('menu', 'gc', 'cpu', 'alloc')
+
+    def __init__(self, kinds, menu=None, interval=0.001):
+        unknown = set(kinds) - set(self.KINDS)
+        if unknown:
+            raise ValueError(f"Unknown load kinds: {', '.join(sorted(unknown))}")
+        self.kinds = kinds
+        self.menu = menu
+        self.interval = interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for kind in self.kinds:
+            thread = threading.Thread(target=getattr(self, f"_{kind}"), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _menu(self):
+        with open(os.devnull, 'w') as devnull:
+            while not self._stop.wait(self.interval):
+                print(self.menu.menu_text(), file=devnull)
+                print(self.menu.execute("status"), file=devnull)
+                if self.menu.parameters is not None:
+                    print(self.menu.execute("params"), file=devnull)
+
+    def _gc(self):
+        while not self._stop.wait(self.interval):
+            junk = []
+            for _ in range(2000):
+                node = {}
+                node['self'] = node  # Cycle only the collector can free
+                junk.append(node)
+            del junk
+
+    def _cpu(self):
+        while not self._stop.is_set():
+            total = 0
+            for i in range(10000):
+                total += i * i
+
+    def _alloc(self):
+        while not self._stop.wait(self.interval):
+            np.ones(1 << 18, dtype='float64').sum()
+
+
+def load_source(name):
+    if name in SIGNALS:
+        return make_signal(name, 10.0, SAMPLE_RATE)
+    from effects.wavfile import read_wav
+    source, _ = read_wav(name)
+    return source
+
+
+def build_app(source, effects, pipeline=None):
+    """GuitarFX on a simulated device, the named effects switched on in chain mode"""
+    from main import GuitarFX  # Top-level app module, run from the repo root
+
+    backend = SimulatedBackend(source)
+    app = GuitarFX(backend=backend)
+    for i, effect in enumerate(app.effect_chain.effects):
+        if type(getattr(effect, 'inner', effect)).__name__ in effects:
+            app.effect_chain.toggle_effect(i)
+    if effects:
+        app.menu.chain_mode = True
+    if pipeline:
+        app.pipeline.processes = pipeline == 'processes'
+        print(app.pipeline.start())
+    return app, backend
+
+
+def stream(app, backend, blocksize, seconds, gc_scheduled=False, load=None, alloc_audit=False, dtype_check=False):
+    """Run the simulated device for `seconds`, returns the timing stats"""
+    audit = None
+    if alloc_audit:
+        targets = [app.effect_chain, *app.effects, app.looper]
+        if app.limiter is not None:
+            targets.append(app.limiter)
+        audit = AllocationAudit(targets)
+        audit.start()
+    checker = None
+    if dtype_check:
+        checker = DtypeCheck([app.effect_chain, *app.effects, app.looper])
+        checker.start()
+    if gc_scheduled:
+        app.gc.enable()
+    if load is not None:
+        load.start()
+    try:
+        with backend.stream(app.audio_callback, SAMPLE_RATE, blocksize):
+            time.sleep(seconds)
+    finally:
+        if load is not None:
+            load.stop()
+        if app.pipeline.running:
+            print(app.pipeline.status())
+            app.pipeline.stop()
+        app.gc.disable()
+        if audit is not None:
+            audit.stop()
+            print("\nallocations per block (chain figures include its effects):")
+            print(audit.report())
+        if checker is not None:
+            checker.stop()
+            print("\nblock and state dtypes:")
+            print(checker.report())
+        app.looper.close()
+
+    _, loads, _ = app.timer.recent(app.timer.capacity)
+    _, gc_durations, _ = app.timer.recent_gc(app.timer.capacity)
+    return {
+        'callbacks': backend.callbacks,
+        'deadline_misses': backend.deadline_misses,
+        'skipped_blocks': backend.skipped_blocks,
+        'max_lateness': backend.max_lateness,
+        'loads': loads,
+        'gc_durations': gc_durations,
+        'governor': app.governor.status_text() if app.governor is not None else None,
+    }
+
+
+def simulated_session(options):
+    """EngineProcess session: the same run, inside the DSP process"""
+    app, backend = build_app(load_source(options['input']), options['effects'], options['pipeline'])
+    return app, lambda: stream(app, backend, options['blocksize'], options['seconds'], options['gc_scheduled'],
+                               alloc_audit=options['alloc_audit'], dtype_check=options['dtype_check'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--blocksize', type=int, default=BUFFER_SIZE)
+    parser.add_argument('--input', default='pluck',
+                        help=f"WAV file or one of: {', '.join(SIGNALS)}")
+    parser.add_argument('--effects', default='',
+                        help="Comma separated effect class names to switch on in chain mode")
+    parser.add_argument('--pipeline', choices=['threads', 'processes'],
+                        help="Run the chain as a multi-core pipeline")
+    parser.add_argument('--gc-scheduled', action='store_true',
+                        help="Freeze/disable automatic gc and collect between callbacks")
+    parser.add_argument('--alloc-audit', action='store_true',
+                        help="Report bytes allocated per block by each effect (slow, tracemalloc)")
+    parser.add_argument('--dtype-check', action='store_true',
+                        help="Report effects returning or keeping non-float32 data")
+    parser.add_argument('--engine-process', action='store_true',
+                        help="Stream in a separate DSP process, the load runs in this one")
+    parser.add_argument('--load', default='',
+                        help=f"Comma separated background load: {', '.join(LoadGenerator.KINDS)}")
+    args = parser.parse_args(argv)
+
+    kinds = [kind for kind in args.load.split(',') if kind]
+    wanted = [name for name in args.effects.split(',') if name]
+    if args.engine_process:
+        from cli import RemoteMenu
+        options = {'input': args.input, 'effects': wanted, 'pipeline': args.pipeline,
+                   'blocksize': args.blocksize, 'seconds': args.seconds, 'gc_scheduled': args.gc_scheduled, 'alloc_audit': args.alloc_audit,
+                   'dtype_check': args.dtype_check}
+        engine = EngineProcess(partial(simulated_session, options))
+        print(engine.start())
+        load = LoadGenerator(kinds, menu=RemoteMenu(engine))
+        load.start()
+        try:
+            stats = engine.wait(timeout=args.seconds + 60.0)
+        finally:
+            load.stop()
+            engine.stop()
+        if stats is None:
+            print("DSP process did not report back")
+            return 1
+    else:
+        app, backend = build_app(load_source(args.input), wanted, args.pipeline)
+        load = LoadGenerator(kinds, menu=app.menu)
+        stats = stream(app, backend, args.blocksize, args.seconds, args.gc_scheduled, load, args.alloc_audit,
+                       args.dtype_check)
+
+    loads, gc_durations = stats['loads'], stats['gc_durations']
+    callbacks, misses = stats['callbacks'], stats['deadline_misses']
+    print(f"\nblocks of {args.blocksize} @ {SAMPLE_RATE} Hz for {args.seconds:.1f}s, load: {args.load or 'none'}"
+          + (" (DSP process)" if args.engine_process else ""))
+    print(f"  callbacks       : {callbacks}")
+    print(f"  deadline misses : {misses} ({100.0 * misses / max(1, callbacks):.2f}%)")
+    print(f"  skipped blocks  : {stats['skipped_blocks']}")
+    print(f"  worst lateness  : {stats['max_lateness'] * 1000:.2f} ms")
+    if len(loads):
+        print(f"  callback load   : mean {loads.mean():.2f}, p99 {np.percentile(loads, 99):.2f}, max {loads.max():.2f}")
+    if len(gc_durations):
+        print(f"  scheduled gc    : {len(gc_durations)} runs, max {gc_durations.max() * 1000:.2f} ms")
+    if stats['governor'] is not None:
+        print(f"  quality governor: {stats['governor']}")
+    return 1 if misses else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
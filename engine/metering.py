@@ -0,0 +1,150 @@
+import threading
+import time
+import numpy as np
+from .ring import SampleRing
+
+# Octave band centres shown by the optional spectrum
+SPECTRUM_BANDS = [63, 125, 250, 500, 1000, 2000, 4000, 8000, 16000]
+
+
+def to_db(value, floor=-120.0):
+    return max(floor, 20.0 * np.log10(value)) if value > 0 else floor
+
+
+class MeterTap:
+    """
+    One metering point in the signal path
+
+    The audio thread calls `push(audio, frames)`, a plain copy into a
+    preallocated ring. Everything else happens on the meter's thread.
+    """
+
+    def __init__(self, name, sample_rate, ring_seconds=1.0, window_seconds=3.0):
+        self.name = name
+        self.ring = SampleRing(int(sample_rate * ring_seconds))
+        # Consumer side: the last few seconds, for short-term RMS/spectrum
+        self.history = np.zeros(int(sample_rate * window_seconds), dtype='float32')
+        self.history_filled = 0
+        self.scratch = np.zeros(self.ring.capacity, dtype='float32')
+        self.reading = None  # Latest results, replaced whole
+
+    def push(self, audio, frames):
+        self.ring.write(audio, frames)
+
+
+class Meter:
+    """
+    Level metering off the audio thread
+
+    Taps feed raw blocks through lock-free rings; a background thread wakes
+    `rate_hz` times a second, drains them and computes per tap:
+        peak / RMS over the last interval (dBFS), crest factor (dB),
+        short-term RMS over `window_seconds` (dBFS, unweighted, so not a
+        LUFS reading) and optionally a coarse octave-band spectrum.
+    Readers (menu, control server) only look at the last finished reading.
+    """
+
+    def __init__(self, sample_rate, rate_hz=10.0, window_seconds=3.0, spectrum_size=0):
+        self.sample_rate = sample_rate
+        self.interval = 1.0 / max(0.1, rate_hz)
+        self.window_seconds = window_seconds
+        self.spectrum_size = spectrum_size
+        self.taps = {}
+        self._stop = threading.Event()
+        self._thread = None
+        if spectrum_size:
+            self._window = np.hanning(spectrum_size).astype('float32')
+            freqs = np.fft.rfftfreq(spectrum_size, 1.0 / sample_rate)
+            # Bin ranges of each octave band (centre / sqrt 2 .. centre * sqrt 2)
+            self._bands = [
+                (np.searchsorted(freqs, f / np.sqrt(2)), np.searchsorted(freqs, f * np.sqrt(2)))
+                for f in SPECTRUM_BANDS if f * np.sqrt(2) < sample_rate / 2
+            ]
+
+    def tap(self, name, ring_seconds=1.0):
+        """Create (or get) the named metering point"""
+        if name not in self.taps:
+            self.taps[name] = MeterTap(name, self.sample_rate, ring_seconds, self.window_seconds)
+        return self.taps[name]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.update()
+
+    def update(self):
+        """Drain every tap and refresh its reading (meter thread)"""
+        for tap in list(self.taps.values()):
+            n = tap.ring.read(tap.scratch)
+            if n == 0:
+                continue
+            block = tap.scratch[:n]
+
+            # Keep the newest samples at the end of the history window
+            history = tap.history
+            if n >= len(history):
+                history[:] = block[-len(history):]
+            else:
+                history[:-n] = history[n:]
+                history[-n:] = block
+            tap.history_filled = min(len(history), tap.history_filled + n)
+
+            peak = float(np.max(np.abs(block)))
+            rms = float(np.sqrt(np.mean(np.square(block, dtype='float64'))))
+            window = history[len(history) - tap.history_filled:]
+            mean_square = float(np.mean(np.square(window, dtype='float64')))
+            reading = {
+                'peak': to_db(peak),
+                'rms': to_db(rms),
+                'crest': to_db(peak) - to_db(rms) if rms > 0 else 0.0,
+                'rms_short': 10.0 * np.log10(mean_square) if mean_square > 0 else -120.0,
+                'dropped': tap.ring.dropped,
+                'time': time.time(),
+            }
+            if self.spectrum_size and tap.history_filled >= self.spectrum_size:
+                reading['spectrum'] = self._spectrum(history[-self.spectrum_size:])
+            tap.reading = reading
+
+    def _spectrum(self, samples):
+        magnitude = np.abs(np.fft.rfft(samples * self._window)) * (2.0 / np.sum(self._window))
+        return [to_db(float(np.max(magnitude[lo:hi]))) if hi > lo else -120.0
+                for lo, hi in self._bands]
+
+    def readings(self):
+        return {name: tap.reading for name, tap in self.taps.items() if tap.reading is not None}
+
+    def status_text(self):
+        """Compact key=value text for streamed status lines"""
+        parts = []
+        for name, r in self.readings().items():
+            parts.append(f"{name}.peak={r['peak']:.1f} {name}.rms={r['rms']:.1f} "
+                         f"{name}.rms_s_db={r['rms_short']:.1f}")
+        return " ".join(parts)
+
+    def display(self):
+        """Multi-line meter view for the terminal menu"""
+        readings = self.readings()
+        if not readings:
+            return "No meter readings yet"
+        lines = []
+        for name, r in readings.items():
+            # 40 characters for -60..0 dBFS
+            bar = "#" * int(max(0.0, min(60.0, r['rms'] + 60.0)) * 40 / 60)
+            lines.append(f"  {name:<8} [{bar:<40}]")
+            lines.append(f"           peak {r['peak']:6.1f} dBFS  rms {r['rms']:6.1f} dBFS  "
+                         f"crest {r['crest']:5.1f} dB  short-term rms {r['rms_short']:6.1f} dBFS")
+            if 'spectrum' in r:
+                bands = "  ".join(f"{f if f < 1000 else f // 1000}{'' if f < 1000 else 'k'}:{db:.0f}"
+                                  for f, db in zip(SPECTRUM_BANDS, r['spectrum']))
+                lines.append(f"           {bands}")
+            if r['dropped']:
+                lines.append(f"           ({r['dropped']} samples dropped, meter fell behind)")
+        return "\n".join(lines)
@@ -0,0 +1,286 @@
+import copy
+import multiprocessing
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from effects.base import Effect
+from effects.reblock import Reblocker
+
+
+class BlockQueue:
+    """
+    Fixed ring of preallocated audio blocks between two pipeline stages
+
+    One producer `put()`s, one consumer `get()`s then `release()`s; each
+    side keeps its own slot index. Two semaphores count filled and free
+    slots, so a stage thread can sleep until work arrives while the audio
+    thread only ever uses the non-blocking calls. With `ctx` (a
+    multiprocessing context) the slots live in shared memory and the queue
+    can be handed to a stage process.
+    """
+
+    def __init__(self, slots, block_size, ctx=None):
+        self.slots = slots
+        self.block_size = block_size
+        self._shm = None
+        if ctx is None:
+            self.blocks = np.zeros((slots, block_size), dtype='float32')
+            self._filled = threading.Semaphore(0)
+            self._free = threading.Semaphore(slots)
+        else:
+            self._shm = shared_memory.SharedMemory(create=True, size=slots * block_size * 4)
+            self.blocks = np.ndarray((slots, block_size), dtype='float32', buffer=self._shm.buf)
+            self.blocks[:] = 0.0
+            self._filled = ctx.Semaphore(0)
+            self._free = ctx.Semaphore(slots)
+        self._write = 0
+        self._read = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['blocks']
+        state['_shm'] = self._shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Stage processes share the creator's resource tracker, which unlinks on its close()
+        self._shm = shared_memory.SharedMemory(name=state['_shm'])
+        self.blocks = np.ndarray((self.slots, self.block_size), dtype='float32', buffer=self._shm.buf)
+
+    def put(self, block, timeout=None):
+        """Copy a block into the next free slot. False if none freed up in time"""
+        blocking = timeout != 0
+        if not self._free.acquire(blocking, timeout if blocking else None):
+            return False
+        self.blocks[self._write] = block[:self.block_size]
+        self._write = (self._write + 1) % self.slots
+        self._filled.release()  # Publish
+        return True
+
+    def get(self, timeout=None):
+        """The oldest filled slot (a view, valid until release()), or None"""
+        blocking = timeout != 0
+        if not self._filled.acquire(blocking, timeout if blocking else None):
+            return None
+        return self.blocks[self._read]
+
+    def release(self):
+        """Hand the slot from the last get() back to the producer"""
+        self._read = (self._read + 1) % self.slots
+        self._free.release()
+
+    def close(self):
+        if self._shm is not None:
+            del self.blocks
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+def run_stage(effects, active, inbox, outbox, stop, block_size):
+    """
+    One pipeline stage: take a block, run this stage's effects, pass it on
+
+    `effects` is a list of (chain index, effect); an effect is skipped
+    while `active[index]` is off. Runs on a worker thread or in a stage
+    process.
+    """
+    while not stop.is_set():
+        block = inbox.get(timeout=0.1)
+        if block is None:
+            continue
+        out = block
+        for index, effect in effects:
+            if active[index]:
+                out = effect.process(out, block_size)
+        while not outbox.put(out, timeout=0.1):
+            if stop.is_set():
+                return
+        inbox.release()
+
+
+def measure_costs(effects, block_size, blocks=32):
+    """Median seconds per block of each effect, timed on copies so the originals are untouched"""
+    noise = (0.1 * np.random.default_rng(0).standard_normal(block_size)).astype('float32')
+    costs = []
+    for effect in effects:
+        twin = copy.deepcopy(effect)
+        times = []
+        for _ in range(blocks):
+            start = time.perf_counter()
+            twin.process(noise.copy(), block_size)
+            times.append(time.perf_counter() - start)
+        costs.append(float(np.median(times)))
+    return costs
+
+
+def split_stages(costs, stages):
+    """
+    Cut a list of costs into at most `stages` contiguous runs, keeping the
+    most expensive run as cheap as possible (linear partition, by dynamic
+    programming). Returns (start, end) index pairs
+    """
+    n = len(costs)
+    stages = max(1, min(stages, n))
+    prefix = np.concatenate(([0.0], np.cumsum(costs)))
+    # best[k][i]: cheapest max-run cost for the first i costs in k runs
+    best = np.full((stages + 1, n + 1), np.inf)
+    cut = np.zeros((stages + 1, n + 1), dtype=int)
+    best[0][0] = 0.0
+    for k in range(1, stages + 1):
+        for i in range(1, n + 1):
+            for j in range(k - 1, i):
+                worst = max(best[k - 1][j], prefix[i] - prefix[j])
+                if worst < best[k][i]:
+                    best[k][i], cut[k][i] = worst, j
+    k = int(np.argmin(best[1:, n])) + 1  # Fewer runs if more don't help
+    runs, i = [], n
+    while k > 0:
+        j = cut[k][i]
+        runs.append((j, i))
+        i, k = j, k - 1
+    return runs[::-1]
+
+
+class PipelinedChain(Effect):
+    """
+    Runs an EffectChain as a pipeline of stages on other cores
+
+        pipeline = PipelinedChain(chain, stages=2, depth=2)
+        pipeline.start()     # measure, split, launch the stages
+        out = pipeline.process(audio, frames)
+
+    Key Concepts:
+    - Pipelining: stage 1 works on block n while stage 2 finishes block
+      n-1. Each stage only has to keep up with one block period, so a chain
+      too heavy for one core's deadline can run on several. The price is
+      latency: the output is `depth` blocks behind the input
+    - The split comes from measured cost: each active effect is timed on a
+      copy, then the chain is cut where the slowest stage is cheapest
+    - Threads run in parallel only while the effects are inside NumPy (the
+      GIL is released there). Per-sample Python loops hold the GIL, so
+      `processes=True` runs each stage in its own process, on copies of
+      the effects. Later changes in this process (toggles, `set`) don't
+      reach the copies until the pipeline is restarted
+    - The audio thread only copies a block in and a finished block out. If
+      a block isn't ready it plays silence, and the next spare block is
+      skipped, so the latency stays at `depth`
+    """
+
+    def __init__(self, chain, stages=2, depth=2, block_size=128, processes=False, control=None):
+        self.chain = chain
+        self.control = control  # To know when the audio thread has let go of the pipeline
+        self.stages = stages
+        self.depth = max(depth, 1)
+        self.block_size = block_size
+        self.processes = processes
+        self.running = False
+        self.plan = []
+        self.costs = []
+        self._workers = []
+        self._queues = []
+        self._silence = np.zeros(block_size, dtype='float32')
+        self._out = np.zeros(block_size, dtype='float32')
+        self.reblocker = Reblocker(self._process_block, block_size, frames=block_size)
+        super().__init__(chain.sample_rate)
+
+    @property
+    def name(self):
+        return f"Effect Chain ({len(self.plan)} stages)" if self.running else "Effect Chain"
+
+    def reset(self):
+        self.submitted = 0
+        self.dropped = 0     # Input blocks the first stage had no room for
+        self.underruns = 0   # Output blocks that weren't ready in time
+        self._owed = 0
+
+    @property
+    def latency(self):
+        return self.depth * self.block_size + self.reblocker.latency
+
+    @property
+    def max_latency(self):
+        return self.depth * self.block_size + self.reblocker.max_latency
+
+    def start(self):
+        """Measure the active effects, split them into stages and launch them"""
+        if self.running:
+            return self.status()
+        indexed = [(i, e) for i, e in enumerate(self.chain.effects) if self.chain.active_states[i]]
+        if not indexed:
+            return "No active effects to pipeline"
+        self.costs = measure_costs([e for _, e in indexed], self.block_size)
+        self.plan = [indexed[a:b] for a, b in split_stages(self.costs, self.stages)]
+
+        ctx = multiprocessing.get_context('spawn') if self.processes else None
+        self._stop = ctx.Event() if ctx else threading.Event()
+        self._queues = [BlockQueue(self.depth + 1, self.block_size, ctx) for _ in range(len(self.plan) + 1)]
+        active = list(self.chain.active_states) if ctx else self.chain.active_states
+        self._workers = []
+        for k, effects in enumerate(self.plan):
+            args = (effects, active, self._queues[k], self._queues[k + 1], self._stop, self.block_size)
+            if ctx:
+                worker = ctx.Process(target=run_stage, args=args, daemon=True)
+            else:
+                worker = threading.Thread(target=run_stage, args=args, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self.reset()
+        self.reblocker.reset()
+        self.running = True  # The audio thread switches over at its next block
+        return self.status()
+
+    def stop(self):
+        """Stop the stages; the caller switches the audio thread back to the chain afterwards"""
+        if not self.running:
+            return "Pipeline is not running"
+        # Stages first: in thread mode they share the chain's effects
+        self._stop.set()
+        for worker in self._workers:
+            worker.join()
+        self.running = False
+        if self.control is not None:
+            # Once an empty batch has been drained, the callback is on the plain chain
+            self.control.wait(self.control.submit([]))
+        for q in self._queues:
+            q.close()
+        self._workers, self._queues = [], []
+        return "Pipeline stopped"
+
+    def status(self):
+        if not self.running:
+            return "Pipeline off"
+        stages = " | ".join(
+            "+".join(e.name for _, e in effects) for effects in self.plan
+        )
+        return (f"Pipeline: {stages} ({'processes' if self.processes else 'threads'}, "
+                f"{self.latency / self.sample_rate * 1000:.1f} ms latency, "
+                f"{self.underruns} late, {self.dropped} dropped)")
+
+    def _process_block(self, audio, frames):
+        inbox, outbox = self._queues[0], self._queues[-1]
+        if not inbox.put(audio, timeout=0):
+            self.dropped += 1
+        self.submitted += 1
+        if self.submitted <= self.depth:
+            return self._silence  # Filling the pipeline
+        block = outbox.get(timeout=0)
+        if block is None:
+            self.underruns += 1
+            self._owed += 1
+            return self._silence
+        if self._owed:
+            # Catch up after a late block: skip one so the delay stays `depth`
+            outbox.release()
+            self._owed -= 1
+            block = outbox.get(timeout=0)
+            if block is None:
+                return self._silence
+        self._out[:] = block
+        outbox.release()
+        return self._out
+
+    def process(self, audio, frames):
+        return self.reblocker.process(audio, frames)
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+import numpy as np
+from effects.wavfile import WavWriter
+from .ring import SampleRing
+
+
+class SessionRecorder:
+    """
+    Records every performance as separate tracks for later reamping
+
+        dry     the guitar as it came in (DI)
+        wet     the effect chain's output
+        looper  the chain output with the looper mixed in
+
+    All three are taken in the effects' own blocks, so they line up sample
+    for sample. None of them has been through the output limiter, and the
+    tuner's mute doesn't silence them.
+
+    The audio thread only copies blocks into a preallocated ring. A writer
+    thread drains it in chunks of `chunk_seconds` and appends them to one
+    float WAV per track (RF64 past 4 GB), so memory stays flat however long
+    the session runs. If the disk can't keep up the ring fills; blocks are
+    then dropped and counted in `overflows`, the callback never waits.
+    """
+
+    TRACKS = ('dry', 'wet', 'looper')
+
+    def __init__(self, sample_rate, directory, ring_seconds=4.0, chunk_seconds=0.5):
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.ring = SampleRing(int(sample_rate * ring_seconds), channels=len(self.TRACKS))
+        self.chunk_frames = int(sample_rate * chunk_seconds)
+        self.interval = chunk_seconds / 2
+        # Writer-side buffers, reused for every chunk
+        self._chunk = np.zeros((self.chunk_frames, len(self.TRACKS)), dtype='float32')
+        self._track = np.zeros(self.chunk_frames, dtype='float32')
+        self.recording = False
+        self.session = None
+        self.frames_written = 0
+        self._writers = None
+        self._overflows_at_start = 0
+        self._lock = threading.Lock()  # start/stop vs. the writer thread, never the audio thread
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def overflows(self):
+        """Blocks dropped during this session"""
+        return self.ring.overflows - self._overflows_at_start
+
+    def record(self, dry, wet, looper, frames):
+        """Audio thread: queue one block of each track"""
+        if self.recording:
+            self.ring.write_tracks((dry, wet, looper), frames)
+
+    def start(self, name=None):
+        """Open new track files and start capturing"""
+        with self._lock:
+            if self.recording:
+                return f"Already recording {self.session}"
+            os.makedirs(self.directory, exist_ok=True)
+            self.session = name or time.strftime("session-%Y%m%d-%H%M%S")
+            self._writers = [
+                WavWriter(os.path.join(self.directory, f"{self.session}-{track}.wav"), self.sample_rate)
+                for track in self.TRACKS
+            ]
+            self.frames_written = 0
+            # Skip a block that may have slipped in as the last session stopped
+            self.ring.consumed = self.ring.written
+            self._overflows_at_start = self.ring.overflows
+            self.recording = True
+        return f"Recording {self.session} ({', '.join(self.TRACKS)}) to {self.directory}/"
+
+    def stop(self):
+        """Stop capturing, write out what's queued and close the files"""
+        with self._lock:
+            if not self.recording:
+                return "Not recording"
+            self.recording = False
+            self._drain()
+            for writer in self._writers:
+                writer.close()
+            self._writers = None
+        return f"Saved {self.session} ({self.frames_written / self.sample_rate:.1f}s, {self.overflows} dropped blocks)"
+
+    def toggle(self):
+        return self.stop() if self.recording else self.start()
+
+    @property
+    def status(self):
+        if not self.recording:
+            return "Recorder idle"
+        seconds = int(self.frames_written / self.sample_rate)
+        text = f"REC {self.session} {seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        if self.overflows:
+            text += f" ({self.overflows} dropped blocks)"
+        return text
+
+    def _drain(self):
+        """Move everything queued to disk in chunk-sized writes (lock held)"""
+        while self.ring.available():
+            n = self.ring.read(self._chunk)
+            for channel, writer in enumerate(self._writers):
+                np.copyto(self._track[:n], self._chunk[:n, channel])
+                writer.write(self._track[:n])
+            self.frames_written += n
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if self._writers is not None and self.ring.available() >= self.chunk_frames:
+                    self._drain()
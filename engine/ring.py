@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class SampleRing:
+    """
+    Single-producer single-consumer ring of float32 samples
+
+    The audio thread `write()`s, one other thread `read()`s. No locks:
+    each side only advances its own counter, and a counter is bumped only
+    after the samples it covers are copied, so the other side never sees a
+    half-written block. When the reader falls behind, `write()` drops the
+    block and counts it rather than waiting.
+
+    `channels > 1` stores frames of several tracks side by side.
+    """
+
+    def __init__(self, capacity, channels=1):
+        self.capacity = int(capacity)
+        self.channels = channels
+        shape = (self.capacity,) if channels == 1 else (self.capacity, channels)
+        self.buffer = np.zeros(shape, dtype='float32')
+        self.written = 0   # Frames ever written (producer only)
+        self.consumed = 0  # Frames ever read (consumer only)
+        self.overflows = 0
+        self.dropped = 0   # Frames lost to overflows
+
+    def available(self):
+        """Frames waiting to be read"""
+        return self.written - self.consumed
+
+    def free(self):
+        return self.capacity - (self.written - self.consumed)
+
+    def write(self, data, frames=None):
+        """Copy `frames` frames in (audio thread). False if they didn't fit"""
+        n = len(data) if frames is None else frames
+        if n > self.free():
+            self.overflows += 1
+            self.dropped += n
+            return False
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = data[:first]
+        if first < n:
+            self.buffer[:n - first] = data[first:n]
+        self.written += n  # Publish
+        return True
+
+    def write_tracks(self, tracks, frames):
+        """Like write(), one 1-D array per channel, interleaved on the way in"""
+        if frames > self.free():
+            self.overflows += 1
+            self.dropped += frames
+            return False
+        start = self.written % self.capacity
+        first = min(frames, self.capacity - start)
+        for channel, track in enumerate(tracks):
+            self.buffer[start:start + first, channel] = track[:first]
+            if first < frames:
+                self.buffer[:frames - first, channel] = track[first:frames]
+        self.written += frames  # Publish
+        return True
+
+    def read(self, out):
+        """Copy up to len(out) frames into `out`, returns how many"""
+        n = min(len(out), self.available())
+        start = self.consumed % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self.buffer[start:start + first]
+        if first < n:
+            out[first:n] = self.buffer[:n - first]
+        self.consumed += n  # Hand the space back
+        return n
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+def sine(seconds, sample_rate, freq=220.0, amplitude=0.5):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype('float32')
+
+
+def sweep(seconds, sample_rate, start_freq=20.0, end_freq=20000.0, amplitude=0.5):
+    """Exponential sine sweep"""
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    k = np.log(end_freq / start_freq)
+    phase = 2 * np.pi * start_freq * seconds / k * (np.exp(t * k / seconds) - 1)
+    return (amplitude * np.sin(phase)).astype('float32')
+
+
+def impulse(seconds, sample_rate, interval=0.5, amplitude=1.0):
+    """A single-sample click every `interval` seconds"""
+    out = np.zeros(int(seconds * sample_rate), dtype='float32')
+    out[::max(1, int(interval * sample_rate))] = amplitude
+    return out
+
+
+def noise(seconds, sample_rate, amplitude=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    return (amplitude * rng.standard_normal(int(seconds * sample_rate))).astype('float32')
+
+
+def pluck(seconds, sample_rate, freq=110.0, interval=1.0, decay=0.996, amplitude=0.6, seed=0):
+    """Karplus-Strong plucked string, re-plucked every `interval` seconds"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    period = max(2, int(sample_rate / freq))
+    every = max(period, int(interval * sample_rate))
+    out = np.zeros(n, dtype='float32')
+    string = np.zeros(period, dtype='float64')
+    for start in range(0, n, every):
+        string[:] = rng.uniform(-1, 1, period)
+        length = min(every, n - start)
+        note = np.empty(length)
+        for i in range(length):
+            j = i % period
+            note[i] = string[j]
+            string[j] = decay * 0.5 * (string[j] + string[(j + 1) % period])
+        out[start:start + length] = amplitude * note
+    return out
+
+
+SIGNALS = {
+    'sine': sine,
+    'sweep': sweep,
+    'impulse': impulse,
+    'noise': noise,
+    'pluck': pluck,
+}
+
+
+def make_signal(kind, seconds, sample_rate):
+    """One of the SIGNALS by name, with default settings"""
+    return SIGNALS[kind](seconds, sample_rate)
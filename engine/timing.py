@@ -0,0 +1,62 @@
+import time
+import numpy as np
+
+
+class CallbackTimer:
+    """
+    Records how long each audio callback took, relative to its deadline
+
+    `begin()`/`end()` are called from the callback and only write into
+    preallocated arrays. Readers on other threads copy out recent entries.
+    Load is elapsed time divided by the block's duration: 1.0 means the
+    callback used its whole deadline. Garbage collections run elsewhere
+    are logged here too (`record_gc()`), on the same clock, so a slow
+    callback can be checked against them.
+    """
+
+    def __init__(self, sample_rate, capacity=4096):
+        self.sample_rate = sample_rate
+        self.capacity = capacity
+        self.starts = np.zeros(capacity, dtype='float64')
+        self.loads = np.zeros(capacity, dtype='float64')
+        self.xruns = np.zeros(capacity, dtype=bool)
+        self.count = 0
+        self.total_xruns = 0
+        self.gc_starts = np.zeros(capacity, dtype='float64')
+        self.gc_durations = np.zeros(capacity, dtype='float64')
+        self.gc_generations = np.zeros(capacity, dtype=np.int8)
+        self.gc_count = 0
+
+    def begin(self):
+        return time.perf_counter()
+
+    def end(self, start, frames, status=None):
+        elapsed = time.perf_counter() - start
+        i = self.count % self.capacity
+        self.starts[i] = start
+        self.loads[i] = elapsed * self.sample_rate / max(frames, 1)
+        xrun = bool(status)
+        self.xruns[i] = xrun
+        if xrun:
+            self.total_xruns += 1
+        self.count += 1  # Publish after the entry is written
+
+    def recent(self, n):
+        """(starts, loads, xruns) of up to the last n callbacks, oldest first"""
+        n = min(n, self.count, self.capacity)
+        idx = (np.arange(self.count - n, self.count)) % self.capacity
+        return self.starts[idx], self.loads[idx], self.xruns[idx]
+
+    def record_gc(self, start, duration, generation):
+        """Log one garbage collection (perf_counter start, seconds, generation)"""
+        i = self.gc_count % self.capacity
+        self.gc_starts[i] = start
+        self.gc_durations[i] = duration
+        self.gc_generations[i] = generation
+        self.gc_count += 1
+
+    def recent_gc(self, n):
+        """(starts, durations, generations) of up to the last n collections, oldest first"""
+        n = min(n, self.gc_count, self.capacity)
+        idx = (np.arange(self.gc_count - n, self.gc_count)) % self.capacity
+        return self.gc_starts[idx], self.gc_durations[idx], self.gc_generations[idx]
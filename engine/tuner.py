@@ -0,0 +1,202 @@
+import threading
+import time
+import numpy as np
+from .ring import SampleRing
+
+NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+
+def note_of(frequency, reference=440.0):
+    """(note name with octave, cents off it) for a frequency in Hz"""
+    midi = 69.0 + 12.0 * np.log2(frequency / reference)
+    nearest = int(round(midi))
+    return f"{NOTE_NAMES[nearest % 12]}{nearest // 12 - 1}", 100.0 * (midi - nearest)
+
+
+class Tuner:
+    """
+    Chromatic tuner running beside the audio stream
+
+    While the tuner is on the callback calls `push(audio, frames)` on the
+    dry input: every `decimation`-th sample is copied into a lock-free ring
+    and nothing else happens there. A worker thread wakes `rate_hz` times a
+    second and runs YIN pitch detection on the newest `frame_size` samples.
+    The output is muted while tuning (see GuitarFX.audio_callback).
+
+    Key Concepts:
+    - Decimation: guitar fundamentals sit below ~1.3 kHz, so every 2nd
+      sample at 48 kHz is plenty and halves the work. A periodic signal
+      stays periodic whatever it is sampled at, so skipping the anti-alias
+      filter shifts overtones around but not the period YIN looks for.
+      Decimating further shortens the lags and costs accuracy up high
+    - YIN difference d(tau) = sum (x[j] - x[j + tau])^2 is small at the
+      period. Expanded it is two energy sums minus twice the
+      autocorrelation, and the autocorrelation comes from one FFT pair, so
+      a frame costs O(n log n) instead of O(n^2)
+    - The cumulative mean normalised difference d'(tau) divides by the
+      running average, so the first dip under `threshold` is the period and
+      not one of its multiples. A parabola through the dip gives the
+      fractional lag
+    """
+
+    def __init__(self, sample_rate, decimation=2, frame_size=2048, rate_hz=20.0,
+                 min_freq=30.0, max_freq=1200.0, threshold=0.15, reference=440.0):
+        self.sample_rate = sample_rate
+        self.decimation = decimation
+        self.rate = sample_rate / decimation
+        self.frame_size = frame_size
+        self.interval = 1.0 / max(0.1, rate_hz)
+        self.window = frame_size // 2  # Samples compared at each lag
+        self.min_lag = max(2, int(self.rate / max_freq))
+        self.max_lag = min(self.window - 1, int(self.rate / min_freq) + 1)
+        self.threshold = threshold
+        self.reference = reference
+        self.silence = 10 ** (-60.0 / 20)  # RMS below this is not worth a reading
+        self.enabled = False
+        self.reading = None  # Latest result, replaced whole
+        self.ring = SampleRing(int(self.rate))
+        self._phase = 0  # Offset of the next kept sample in the coming block
+        self._fresh = False
+        self._stop = threading.Event()
+        self._thread = None
+        # Worker-side buffers
+        self._scratch = np.zeros(self.ring.capacity, dtype='float32')
+        self._history = np.zeros(frame_size, dtype='float32')
+        self._filled = 0
+        self._fft_size = 1 << int(np.ceil(np.log2(frame_size + self.window)))
+
+    # --- Audio thread ---
+
+    def push(self, audio, frames):
+        if not self.enabled:
+            return
+        kept = audio[self._phase:frames:self.decimation]
+        self.ring.write(kept)
+        self._phase = (self._phase - frames) % self.decimation
+
+    # --- Control ---
+
+    def toggle(self):
+        if self.enabled:
+            self.enabled = False
+            return "Tuner off"
+        self._fresh = True  # The worker drops anything left from last time
+        self.enabled = True
+        return "Tuner on (output muted)"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    # --- Worker thread ---
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.enabled:
+                self.update()
+
+    def update(self):
+        """Drain the ring and refresh the reading (worker thread)"""
+        if self._fresh:
+            self.ring.consumed = self.ring.written
+            self._filled = 0
+            self.reading = None
+            self._fresh = False
+        n = self.ring.read(self._scratch)
+        if n == 0:
+            return
+        history = self._history
+        if n >= len(history):
+            history[:] = self._scratch[n - len(history):n]
+        else:
+            history[:-n] = history[n:]
+            history[-n:] = self._scratch[:n]
+        self._filled = min(len(history), self._filled + n)
+        if self._filled < len(history):
+            return
+
+        frequency, clarity = self.detect(history)
+        if frequency is None:
+            self.reading = {'frequency': None, 'time': time.time()}
+            return
+        note, cents = note_of(frequency, self.reference)
+        self.reading = {
+            'frequency': frequency,
+            'note': note,
+            'cents': float(cents),
+            'clarity': clarity,
+            'time': time.time(),
+        }
+
+    def detect(self, frame):
+        """(frequency in Hz, clarity 0..1) of one frame, or (None, 0.0)"""
+        x = frame.astype('float64')
+        x -= x.mean()
+        w = self.window
+        if np.sqrt(np.mean(np.square(x))) < self.silence:
+            return None, 0.0
+
+        # Autocorrelation of the first window against the whole frame
+        spectrum = np.fft.rfft(x, self._fft_size)
+        head = np.fft.rfft(x[:w], self._fft_size)
+        correlation = np.fft.irfft(spectrum * np.conj(head), self._fft_size)[:self.max_lag + 2]
+
+        # Energy of x[tau:tau + w] for every lag, from a running sum of squares
+        energy = np.concatenate(([0.0], np.cumsum(np.square(x))))
+        lags = np.arange(self.max_lag + 2)
+        difference = energy[w] + (energy[lags + w] - energy[lags]) - 2.0 * correlation
+        difference[0] = 0.0
+
+        # Cumulative mean normalised difference
+        running = np.cumsum(difference[1:])
+        normalised = np.ones_like(difference)
+        normalised[1:] = difference[1:] * lags[1:] / np.maximum(running, 1e-12)
+
+        tau = None
+        below = np.nonzero(normalised[self.min_lag:self.max_lag + 1] < self.threshold)[0]
+        if len(below):
+            tau = self.min_lag + below[0]
+            # Follow the dip down to its bottom
+            while tau + 1 <= self.max_lag and normalised[tau + 1] < normalised[tau]:
+                tau += 1
+        else:
+            tau = self.min_lag + int(np.argmin(normalised[self.min_lag:self.max_lag + 1]))
+            if normalised[tau] > 2 * self.threshold:
+                return None, 0.0
+
+        # Parabolic interpolation around the minimum of the raw difference,
+        # which is less skewed by the normalisation at short lags
+        a, b, c = difference[tau - 1], difference[tau], difference[tau + 1]
+        curve = a - 2 * b + c
+        offset = 0.5 * (a - c) / curve if curve > 0 else 0.0
+        return float(self.rate / (tau + offset)), float(max(0.0, 1.0 - normalised[tau]))
+
+    # --- Readers ---
+
+    def status_text(self):
+        """Compact key=value text for streamed status lines"""
+        r = self.reading
+        if not self.enabled or r is None:
+            return ""
+        if r['frequency'] is None:
+            return "tuner.hz=-"
+        return f"tuner.hz={r['frequency']:.2f} tuner.note={r['note']} tuner.cents={r['cents']:+.1f}"
+
+    def display(self):
+        """Note, frequency and a needle for the terminal menu"""
+        if not self.enabled:
+            return "Tuner is off ('tune' to switch it on)"
+        r = self.reading
+        if r is None or r['frequency'] is None:
+            return "  -- no note --"
+        # 41 characters for -50..+50 cents
+        needle = int(round(max(-50.0, min(50.0, r['cents'])) * 20 / 50)) + 20
+        scale = "".join("|" if i == needle else ("+" if i == 20 else "-") for i in range(41))
+        in_tune = "  ✓" if abs(r['cents']) < 3 else ""
+        return (f"  {r['note']:<4} {r['frequency']:8.2f} Hz  {r['cents']:+5.1f} cents{in_tune}\n"
+                f"  -50 [{scale}] +50")
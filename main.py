@@ -1,26 +1,50 @@
-import sounddevice as sd
 import time
 from config import SAMPLE_RATE, BUFFER_SIZE, INPUT_DEVICE, OUTPUT_DEVICE
-from effects import Clean, GainBoost, LowPassFilter, Distortion, Echo, WahWah, UltraMetal, EffectChain, Looper, Tremolo, Flanger, Reverb, PitchBend, LearningEffects
-from cli import Menu
+from config import INTERNAL_BLOCK_SIZE, ADAPTIVE_BLOCKSIZE, ADAPTIVE_BLOCK_SIZES
+from config import QUALITY_GOVERNOR, GOVERNOR_DEGRADE_LOAD, GOVERNOR_RESTORE_LOAD, GOVERNOR_SETTLE_SECONDS
+from config import LOOPER_STORAGE, LOOPER_MAX_SECONDS, LOOPER_MEMMAP_MAX_SECONDS
+from config import CAB_IR_PATH, RATE_DIVISORS
+from config import LIMITER, LIMITER_CEILING_DB, LIMITER_LOOKAHEAD_MS, LIMITER_HOLD_MS
+from config import PRESET_DIR, PRESET_CROSSFADE_MS
+from config import RECORD_DIR, RECORDER_RING_SECONDS
+from config import GC_SCHEDULED, GC_FULL_INTERVAL
+from config import TUNER_REFERENCE_HZ, TUNER_DECIMATION
+from config import PIPELINE_STAGES, PIPELINE_DEPTH, PIPELINE_PROCESSES
+from config import METER_RATE_HZ, METER_SPECTRUM
+from config import ENGINE_PROCESS
+from config import CONTROL_SERVER, CONTROL_HOST, CONTROL_PORT, CONTROL_UNIX_SOCKET, STATUS_RATE_HZ
+from effects import Clean, GainBoost, LowPassFilter, Distortion, Echo, WahWah, UltraMetal, EffectChain, Looper, Tremolo, Flanger, Reverb, FDNReverb, PitchBend, LearningEffects, Convolution, PitchShifter, Harmonizer, Limiter, ParameterRegistry
+from effects.looper_storage import RamLoopStorage, MemmapLoopStorage
+from effects.presets import ChainSwitcher, PresetLoader
+from effects.reblock import Reblocker
+from effects.multirate import reduced_rate
+from engine import ControlQueue, CallbackTimer, GCScheduler, AdaptiveBlocksize, QualityGovernor, SoundDeviceBackend, Meter, SessionRecorder, Tuner, PipelinedChain, EngineProcess
+from cli import Menu, ControlServer, RemoteMenu
 
 class GuitarFX:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.running = True
-        print(sd.query_devices())
+        # Real hardware unless told otherwise (e.g. a SimulatedBackend for load tests)
+        self.backend = backend or SoundDeviceBackend(INPUT_DEVICE, OUTPUT_DEVICE)
+        print(self.backend.devices())
         # Initialize individual effects
         self.effects = [
             Clean(SAMPLE_RATE),
             GainBoost(SAMPLE_RATE),
             LowPassFilter(SAMPLE_RATE),
             Distortion(SAMPLE_RATE),
-            Echo(SAMPLE_RATE),
+            reduced_rate(Echo, SAMPLE_RATE, RATE_DIVISORS.get("Echo", 1), block_frames=INTERNAL_BLOCK_SIZE),
             WahWah(SAMPLE_RATE),
             UltraMetal(SAMPLE_RATE),
+            Convolution(SAMPLE_RATE, ir_path=CAB_IR_PATH, partition_size=INTERNAL_BLOCK_SIZE,
+                        block_frames=INTERNAL_BLOCK_SIZE),
             Tremolo(SAMPLE_RATE),
             Flanger(SAMPLE_RATE),
-            Reverb(SAMPLE_RATE),
+            reduced_rate(Reverb, SAMPLE_RATE, RATE_DIVISORS.get("Reverb", 1), block_frames=INTERNAL_BLOCK_SIZE),
+            FDNReverb(SAMPLE_RATE),
             PitchBend(SAMPLE_RATE),
+            PitchShifter(SAMPLE_RATE, hop=INTERNAL_BLOCK_SIZE, block_frames=INTERNAL_BLOCK_SIZE),
+            Harmonizer(SAMPLE_RATE),
             LearningEffects(SAMPLE_RATE)
         ]
         
@@ -29,50 +53,203 @@ class GuitarFX:
         for effect in self.effects:
             self.effect_chain.add_effect(effect, active=False)
         
+        # Every smoothed parameter, addressable as "Effect.param"
+        self.parameters = ParameterRegistry()
+        for effect in self.effects:
+            self.parameters.register(effect)
+        
         # Initialize looper (always active, runs after effects)
-        self.looper = Looper(SAMPLE_RATE)
+        if LOOPER_STORAGE == "memmap":
+            storage = MemmapLoopStorage(SAMPLE_RATE, max_seconds=LOOPER_MEMMAP_MAX_SECONDS)
+        else:
+            storage = RamLoopStorage(SAMPLE_RATE, max_seconds=LOOPER_MAX_SECONDS)
+        self.looper = Looper(SAMPLE_RATE, storage=storage)
+        
+        # Presets are built in the background and swapped in by the callback
+        self.preset_switcher = ChainSwitcher(SAMPLE_RATE, crossfade_ms=PRESET_CROSSFADE_MS)
+        self.presets = PresetLoader(self.preset_switcher, PRESET_DIR, SAMPLE_RATE, BUFFER_SIZE)
+        
+        # Meters: the callback only copies blocks into rings, the maths runs on its own thread
+        self.meter = Meter(SAMPLE_RATE, rate_hz=METER_RATE_HZ, spectrum_size=4096 if METER_SPECTRUM else 0)
+        self.output_meter = self.meter.tap("out")
+        for effect in self.effects:
+            if isinstance(effect, LearningEffects):
+                effect.meter_tap = self.meter.tap("analyze")
+        self.meter.start()
+        
+        # Dry/wet/out tracks, copied into a ring here and written to disk by its own thread
+        self.recorder = SessionRecorder(SAMPLE_RATE, RECORD_DIR, ring_seconds=RECORDER_RING_SECONDS)
+        
+        # Tuner: the callback copies decimated input into a ring, pitch detection runs on its own thread
+        self.tuner = Tuner(SAMPLE_RATE, decimation=TUNER_DECIMATION, reference=TUNER_REFERENCE_HZ)
+        self.tuner.start()
+        
+        # Menu commands reach the audio thread through the control queue
+        self.control = ControlQueue()
+        
+        # Opt-in: the chain split into stages running on other cores
+        self.pipeline = PipelinedChain(self.effect_chain, stages=PIPELINE_STAGES, depth=PIPELINE_DEPTH,
+                                       block_size=INTERNAL_BLOCK_SIZE, processes=PIPELINE_PROCESSES,
+                                       control=self.control)
         
         # Initialize menu
-        self.menu = Menu(self.effects, self.effect_chain, self.looper, self.stop)
-    
-    def audio_callback(self, indata, outdata, frames, time_data, status):
-        audio = indata[:, 0]
+        self.menu = Menu(self.effects, self.effect_chain, self.looper, self.stop,
+                         presets=self.presets, parameters=self.parameters, control=self.control,
+                         meter=self.meter, recorder=self.recorder, tuner=self.tuner,
+                         pipeline=self.pipeline)
+        
+        # The chain always sees INTERNAL_BLOCK_SIZE frames, whatever the device sends
+        device_blocks = ADAPTIVE_BLOCK_SIZES + [BUFFER_SIZE] if ADAPTIVE_BLOCKSIZE else BUFFER_SIZE
+        self.reblocker = Reblocker(self.process_block, INTERNAL_BLOCK_SIZE, frames=device_blocks)
+        
+        # Last thing before the device: keeps the looper's sums and big gains from clipping
+        self.limiter = None
+        if LIMITER:
+            self.limiter = Limiter(SAMPLE_RATE, ceiling_db=LIMITER_CEILING_DB,
+                                   lookahead_ms=LIMITER_LOOKAHEAD_MS, hold_ms=LIMITER_HOLD_MS)
+        
+        # Callback load measurements, and the block size picked from them
+        self.timer = CallbackTimer(SAMPLE_RATE)
+        # Garbage collection between callbacks rather than inside them
+        self.gc = GCScheduler(self.timer, full_interval=GC_FULL_INTERVAL)
         
+        self.blocksize = None
+        if ADAPTIVE_BLOCKSIZE:
+            self.blocksize = AdaptiveBlocksize(self.timer, ADAPTIVE_BLOCK_SIZES, start=BUFFER_SIZE)
+        
+        # Cheaper effect quality tiers while the callback is close to its deadline
+        self.governor = None
+        if QUALITY_GOVERNOR:
+            self.governor = QualityGovernor(self.timer, self.effects, is_running=self.effect_running,
+                                            degrade_load=GOVERNOR_DEGRADE_LOAD,
+                                            restore_load=GOVERNOR_RESTORE_LOAD,
+                                            settle_seconds=GOVERNOR_SETTLE_SECONDS)
+        
+        # Set when the UI runs in another process and moves parameters through shared memory
+        self.parameter_block = None
+    
+    def process_block(self, audio, frames):
         # Process through selected effect(s)
         current_effect = self.menu.get_current_effect()
         out = current_effect.process(audio, frames)
         
         # Always process through looper last
-        out = self.looper.process(out, frames)
+        looped = self.looper.process(out, frames)
+        self.recorder.record(audio, out, looped, frames)
+        return looped
+    
+    def audio_callback(self, indata, outdata, frames, time_data, status):
+        start = self.timer.begin()
+        
+        # Apply any pending control commands first
+        self.control.drain()
+        if self.parameter_block is not None:
+            self.parameter_block.apply(self.parameters)
+        
+        audio = indata[:, 0]
+        out = self.reblocker.process(audio, frames)
+        if self.limiter is not None:
+            out = self.limiter.process(out, frames)
         
-        outdata[:] = out.reshape(-1, 1)
+        self.tuner.push(audio, frames)
+        if self.tuner.enabled:
+            outdata.fill(0)  # Tune silently
+        else:
+            outdata[:] = out.reshape(-1, 1)
+        self.output_meter.push(out, frames)
+        self.timer.end(start, frames, status)
+        if self.governor is not None:
+            self.governor.update()
+    
+    def effect_running(self, effect):
+        """Whether an effect is in this process's signal path right now"""
+        current = self.menu.get_current_effect()
+        if current is effect:
+            return True
+        if current is self.pipeline and self.pipeline.processes:
+            return False  # The stage processes run copies of the effects
+        if current is self.effect_chain or current is self.pipeline:
+            return self.effect_chain.is_active(self.effect_chain.effects.index(effect))
+        return False
     
     def stop(self):
         self.running = False
     
-    def run(self):
+    def status_sources(self):
+        """Callables adding key=value text to streamed status lines"""
+        sources = [self.meter.status_text, self.gc.status_text, self.tuner.status_text]
+        if self.limiter is not None:
+            sources.append(self.limiter.status_text)
+        if self.governor is not None:
+            sources.append(self.governor.status_text)
+        return sources
+    
+    def run(self, interactive=True):
         print("Starting real-time guitar FX…")
         
-        # Start menu in separate thread
-        self.menu.start_thread()
+        # Start control server (or the plain menu) in a separate thread.
+        # Not interactive: the UI lives in another process (see run_engine_process)
+        if interactive and CONTROL_SERVER:
+            server = ControlServer(self.menu, CONTROL_HOST, CONTROL_PORT, CONTROL_UNIX_SOCKET,
+                                   status_rate_hz=STATUS_RATE_HZ)
+            server.status_sources.extend(self.status_sources())
+            server.start_thread()
+        elif interactive:
+            self.menu.start_thread()
+        
+        # Everything built so far lives for the whole session
+        if GC_SCHEDULED:
+            self.gc.enable()
         
         try:
-            with sd.Stream(
-                samplerate=SAMPLE_RATE,
-                blocksize=BUFFER_SIZE,
-                dtype="float32",
-                channels=1,
-                callback=self.audio_callback,
-                device=(INPUT_DEVICE, OUTPUT_DEVICE),
-                latency="low",
-            ):
-                while self.running:
-                    time.sleep(0.1)
+            while self.running:
+                blocksize = self.blocksize.current if self.blocksize else BUFFER_SIZE
+                latency = self.blocksize.latency if self.blocksize else "low"
+                with self.backend.stream(self.audio_callback, SAMPLE_RATE, blocksize, latency):
+                    while self.running:
+                        time.sleep(0.1)
+                        if self.blocksize is not None and self.blocksize.update():
+                            # Reopen the stream with the new device block size
+                            print(f"\n[audio] device block size → {self.blocksize.current}")
+                            break
         except KeyboardInterrupt:
             self.running = False
         
+        self.gc.disable()
+        if self.pipeline.running:
+            self.pipeline.stop()
+        self.meter.stop()
+        self.tuner.stop()
+        if self.recorder.recording:
+            print(self.recorder.stop())
+        self.looper.close()
         print("\nStopped.")
 
-if __name__ == "__main__":
+def engine_session():
+    """Builds the app inside the DSP process, see EngineProcess"""
     app = GuitarFX()
-    app.run()
\ No newline at end of file
+    return app, lambda: app.run(interactive=False)
+
+def run_engine_process():
+    """Menu and control server here, audio stream and effects in a DSP process"""
+    engine = EngineProcess(engine_session, status_rate_hz=STATUS_RATE_HZ)
+    print(engine.start())
+    menu = RemoteMenu(engine)
+    if CONTROL_SERVER:
+        ControlServer(menu, CONTROL_HOST, CONTROL_PORT, CONTROL_UNIX_SOCKET,
+                      status_rate_hz=STATUS_RATE_HZ).start_thread()
+    else:
+        menu.start_thread()
+    try:
+        while menu.running and engine.alive:
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    print(engine.stop())
+
+if __name__ == "__main__":
+    if ENGINE_PROCESS:
+        run_engine_process()
+    else:
+        app = GuitarFX()
+        app.run()
\ No newline at end of file